@@ -8,36 +8,118 @@ load_dotenv()
 
 # Import local modules
 from src.factories.llm_factory import LLMFactory
+from src.factories.llm_pool import LLMPool
 from src.services.llm_service import LLMService
+from src.utils.response_cache import ResponseCache
+from src.utils.single_flight import SingleFlight
+from src.utils.prompt_compaction import PromptCompactor
+from src.services.review_history import ReviewHistory
+from src.services.challenge_store import ChallengeStore
+from src.utils.scheduler import LLMScheduler
+from src.utils.resilience import ResilientCaller
+from src.utils.schemas import ResponseRepair
+from src.utils.tracing import FlightRecorder
+from src.utils.profiling import RequestProfiler
+from src.utils.jobs import JobQueue
 from src.routes.llm_routes import llm_bp, init_llm_service
 from src.routes.quiz_routes import quiz_bp, init_quiz_service
 from src.routes.code_review_routes import code_review_bp, init_code_review_service
 from src.routes.coding_challenge_routes import coding_challenge_bp, init_coding_challenge_service
+from src.routes.health_routes import health_bp, init_request_metrics
+from src.routes.admin_routes import admin_bp, init_admin, init_request_tracing
+from src.routes.job_routes import job_bp, init_job_queue
 
-def create_app():
-    """Create and configure the Flask application"""
+def create_app(init_services: bool = True):
+    """
+    Create and configure the Flask application.
+    
+    Also initializes the services unless init_services is false, so a
+    pre-fork server (gunicorn -c gunicorn.conf.py) calling this in every
+    worker gets per-worker thread pools, connections and warmed chains.
+    """
     app = Flask(__name__)
     
+    # Per-route latency, status and in-flight metrics, served at /metrics
+    init_request_metrics(app)
+    
+    # Per-request span traces for the slow request recorder and profiler under /admin
+    init_request_tracing(app)
+    
     # Register blueprints
+    app.register_blueprint(health_bp)
+    app.register_blueprint(admin_bp, url_prefix='/admin')
     app.register_blueprint(llm_bp)
     app.register_blueprint(quiz_bp, url_prefix='/quiz')
     app.register_blueprint(code_review_bp, url_prefix='/code')
     app.register_blueprint(coding_challenge_bp, url_prefix='/challenge')
+    app.register_blueprint(job_bp, url_prefix='/jobs')
+    
+    if init_services:
+        initialize_services()
     
     return app
 
+def create_asgi_app():
+    """
+    Create the ASGI application serving the same API with async services.
+    
+    Services are initialized on startup; each in-flight LLM call is an
+    awaiting coroutine rather than a blocked worker thread.
+    """
+    from contextlib import asynccontextmanager
+    from starlette.applications import Starlette
+    from starlette.middleware import Middleware
+    from src.routes.asgi_routes import asgi_routes, RequestMetricsMiddleware, RequestTracingMiddleware
+    
+    @asynccontextmanager
+    async def lifespan(app):
+        initialize_services()
+        yield
+    
+    return Starlette(routes=asgi_routes, lifespan=lifespan, middleware=[
+        Middleware(RequestMetricsMiddleware),
+        Middleware(RequestTracingMiddleware)
+    ])
+
 def initialize_services():
     """Initialize all services"""
     try:
-        # Create default LLM using Gemini
-        default_llm = LLMFactory.create_llm()
-        llm_service = LLMService(default_llm)
+        # Create a pool when several backends are configured, otherwise a single
+        # LLM of LLM_TYPE (Gemini by default, "fake" for offline load tests)
+        default_llm = LLMPool.from_env() or LLMFactory.create_llm(os.getenv('LLM_TYPE', 'gemini'))
+        scheduler = LLMScheduler.from_env()
+        if scheduler is not None and isinstance(default_llm, LLMPool):
+            # The pool limits each backend itself; admit up to its total capacity
+            scheduler.model_limits.setdefault(default_llm.model, default_llm.capacity)
+        
+        llm_service = LLMService(
+            default_llm,
+            cache=ResponseCache.from_env(),
+            native_json=os.getenv('LLM_JSON_MODE', 'True').lower() == 'true',
+            coalescer=SingleFlight.from_env(),
+            compactor=PromptCompactor.from_env(),
+            scheduler=scheduler,
+            resilience=ResilientCaller.from_env(),
+            repair=ResponseRepair.from_env()
+        )
+        
+        # Set up the provider client before this worker reports ready
+        if os.getenv('LLM_WARMUP', 'True').lower() == 'true':
+            warmup = llm_service.warm_up()
+            if warmup['error']:
+                print(f"LLM warm-up failed: {warmup['error']}")
+        
+        # Code review and submit-solution share the per-session review history
+        review_history = ReviewHistory.from_env()
         
         # Initialize the global services
         init_llm_service(llm_service)
         init_quiz_service(llm_service)
-        init_code_review_service(llm_service)
-        init_coding_challenge_service(llm_service)
+        init_code_review_service(llm_service, review_history)
+        # Generated challenges are reused for repeated objectives (MongoDB when MONGODB_URI is set)
+        init_coding_challenge_service(llm_service, review_history, ChallengeStore.from_env())
+        init_job_queue(JobQueue.from_env())
+        init_admin(FlightRecorder.from_env(), RequestProfiler.from_env())
         
         return llm_service
     except Exception as e:
@@ -45,18 +127,15 @@ def initialize_services():
         return None
 
 def main():
-    """Main application entry point"""
-    # Create the Flask app
+    """Development server entry point; use gunicorn -c gunicorn.conf.py in production"""
+    # Create the Flask app and initialize services
     app = create_app()
     
-    # Initialize services
-    initialize_services()
-    
     # Run the application
     app.run(
         host=os.getenv('HOST', '0.0.0.0'), 
         port=int(os.getenv('PORT', 5000)), 
-        debug=os.getenv('DEBUG', 'True').lower() == 'true'
+        debug=os.getenv('DEBUG', 'False').lower() == 'true'
     )
 
 if __name__ == '__main__':
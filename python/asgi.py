@@ -0,0 +1,8 @@
+# ASGI entry point: uvicorn asgi:app --host 0.0.0.0 --port 5000
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from app import create_asgi_app
+
+app = create_asgi_app()
@@ -0,0 +1,88 @@
+"""
+Micro-benchmark: JSON extraction from model responses.
+
+Compares the previous per-service approach (json.loads, then a greedy
+regex fallback) with src.utils.json_parser over the recorded outputs in
+benchmarks/corpus, and also times incremental parsing of each response
+fed in small chunks as it would arrive from a stream.
+
+Usage:
+    python benchmarks/bench_json_parser.py [--iterations N]
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.json_parser import IncrementalJSONParser, parse_json_response
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus")
+
+
+def legacy_parse(text):
+    """The extraction every service used before the shared parser"""
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        json_match = re.search(r'\{.*\}', text, re.DOTALL)
+        if json_match:
+            return json.loads(json_match.group(0))
+        raise ValueError("Could not extract valid JSON from response")
+
+
+def incremental_parse(text, chunk_size=32):
+    parser = IncrementalJSONParser()
+    for start in range(0, len(text), chunk_size):
+        parser.feed(text[start:start + chunk_size])
+    return parser.result()
+
+
+def measure(func, text, iterations):
+    try:
+        func(text)
+    except (ValueError, json.JSONDecodeError):
+        return None
+    seconds = timeit.timeit(lambda: func(text), number=iterations)
+    return seconds / iterations
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--iterations", type=int, default=2000)
+    args = arg_parser.parse_args()
+
+    approaches = [("legacy", legacy_parse), ("shared", parse_json_response), ("incremental", incremental_parse)]
+    header = f"{'corpus file':<36}{'bytes':>7}" + "".join(f"{name + ' us':>16}" for name, _ in approaches)
+    print(header)
+    print("-" * len(header))
+
+    totals = {name: 0.0 for name, _ in approaches}
+    parsed_bytes = {name: 0 for name, _ in approaches}
+    failures = {name: 0 for name, _ in approaches}
+    for filename in sorted(os.listdir(CORPUS_DIR)):
+        with open(os.path.join(CORPUS_DIR, filename), encoding="utf-8") as f:
+            text = f.read()
+        row = f"{filename:<36}{len(text):>7}"
+        for name, func in approaches:
+            per_call = measure(func, text, args.iterations)
+            if per_call is None:
+                failures[name] += 1
+                row += f"{'FAILED':>16}"
+            else:
+                totals[name] += per_call
+                parsed_bytes[name] += len(text)
+                row += f"{per_call * 1e6:>16.1f}"
+        print(row)
+
+    print("-" * len(header))
+    for name, _ in approaches:
+        throughput = parsed_bytes[name] / totals[name] / 1e6 if totals[name] else 0.0
+        print(f"{name:<12} failures: {failures[name]}  throughput over parsed files: {throughput:.1f} MB/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Micro-benchmark: per-request prompt and chain construction overhead.
+
+Compares the previous approach (f-string prompt, PromptTemplate.from_template
+and chain composition on every call) with a registered PromptSpec rendered
+into a chain compiled once by LLMService. The model is a trivial runnable
+that returns a constant, so only the framework overhead is measured.
+
+Usage:
+    python benchmarks/bench_prompt_overhead.py [--iterations N]
+"""
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import PromptTemplate
+from langchain_core.runnables import RunnableLambda
+
+from src.prompts import prompt_registry
+from src.services.llm_service import LLMService
+
+VARIABLES = {"code": "def add(a, b):\n    return a + b\n", "language": "Python"}
+RESPONSE = '{"overall_assessment": {}, "detailed_review": [], "learning_recommendations": []}'
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--iterations", type=int, default=2000)
+    args = arg_parser.parse_args()
+
+    llm = RunnableLambda(lambda _: RESPONSE)
+    spec = prompt_registry.get("code_review.review")
+    service = LLMService(llm, cache=None)
+
+    def legacy():
+        # What every service call did before: build the prompt text, parse
+        # it into a PromptTemplate and compose a new chain
+        prompt = spec.raw_template.format(**VARIABLES)
+        chain = PromptTemplate.from_template("{prompt}") | llm | StrOutputParser()
+        return chain.invoke({"prompt": prompt})
+
+    def compiled():
+        return service.generate_from_prompt(spec, VARIABLES)
+
+    def render_only():
+        return spec.render(VARIABLES)
+
+    assert legacy() == compiled() == RESPONSE
+
+    for name, func in (("legacy", legacy), ("compiled", compiled), ("render only", render_only)):
+        seconds = timeit.timeit(func, number=args.iterations)
+        print(f"{name:<12}{seconds / args.iterations * 1e6:>10.1f} us/call")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Benchmark: import time and cold start of a worker.
+
+Each run starts a fresh interpreter that imports the app, builds it with
+create_app() (service initialization and, unless disabled, the LLM
+warm-up call), checks /health and sends a first request. Reported per
+phase as the median and minimum over the runs. --importtime lists the
+modules with the largest cumulative import time.
+
+Usage:
+    python benchmarks/bench_startup.py [--runs N] [--llm-type fake] [--latency-ms 200] [--no-warmup] [--importtime 15]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in the child interpreter; prints the phase timings as JSON
+CHILD = """
+import json, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+flask_app = app.create_app()
+client = flask_app.test_client()
+assert client.get('/health').status_code == 200, 'services failed to initialize'
+ready = time.perf_counter()
+response = client.post('/code/chat', json={'message': 'What is a closure?', 'cache': False})
+assert response.status_code == 200, response.get_data(as_text=True)
+first = time.perf_counter()
+print(json.dumps({'import': imported - started, 'init': ready - imported, 'cold_start': ready - started, 'first_request': first - ready}))
+"""
+
+
+def run_child(env):
+    output = subprocess.run([sys.executable, "-c", CHILD], cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def import_profile(env, top):
+    """Modules with the largest cumulative import time, from python -X importtime"""
+    output = subprocess.run([sys.executable, "-X", "importtime", "-c", "import app"], cwd=ROOT, env=env,
+                            capture_output=True, text=True, check=True)
+    modules = []
+    for line in output.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        modules.append((int(cumulative), name.strip()))
+    return sorted(modules, reverse=True)[:top]
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--runs", type=int, default=5)
+    arg_parser.add_argument("--llm-type", default="fake", help="LLM_TYPE of the measured workers")
+    arg_parser.add_argument("--latency-ms", type=float, default=0, help="Latency of the fake LLM")
+    arg_parser.add_argument("--no-warmup", action="store_true", help="Start workers with LLM_WARMUP=False")
+    arg_parser.add_argument("--importtime", type=int, default=0, help="List the N slowest imports")
+    args = arg_parser.parse_args()
+
+    env = dict(os.environ, LLM_TYPE=args.llm_type, FAKE_LLM_LATENCY_MS=str(args.latency_ms),
+               LLM_WARMUP="False" if args.no_warmup else "True", QUIZ_POOL_LANGUAGES="")
+
+    runs = [run_child(env) for _ in range(args.runs)]
+    print(f"{args.runs} runs, LLM_TYPE={args.llm_type}, warm-up {'off' if args.no_warmup else 'on'}")
+    for phase in ("import", "init", "cold_start", "first_request"):
+        values = [run[phase] * 1000 for run in runs]
+        print(f"{phase:<14}median {statistics.median(values):>8.1f} ms   min {min(values):>8.1f} ms")
+
+    if args.importtime:
+        print()
+        for cumulative, name in import_profile(env, args.importtime):
+            print(f"{cumulative / 1000:>8.1f} ms  {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+"""
+End-to-end load test: every blueprint at a fixed concurrency.
+
+By default the Flask app runs in-process on the fake LLM (LLM_TYPE=fake), so
+no Gemini quota is used; --url targets a server that is already running
+(e.g. one started with LLM_TYPE=fake and gunicorn or uvicorn) instead.
+A weighted mix of /generate, /quiz/*, /code/* and /challenge/* requests is
+sent by --concurrency closed-loop workers. Throughput, p50/p95/p99 latency,
+error rates and status codes per endpoint are written to a JSON file; pass
+--baseline with an earlier results file to print the change per endpoint.
+
+Usage:
+    python benchmarks/load_test.py [--concurrency N] [--duration S | --requests N]
+        [--latency-ms MS] [--latency-distribution fixed|uniform|exponential|lognormal]
+        [--failure-rate R] [--url URL] [--output PATH] [--baseline PATH]
+"""
+import argparse
+import itertools
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+LANGUAGES = ["Python", "JavaScript", "Java", "Go", "Rust"]
+TOPICS = ["closures", "recursion", "hash maps", "generators", "pointers", "async/await", "sorting", "interfaces"]
+
+
+def _code(i):
+    return f"def solve(values):\n    total = 0\n    for value in values:\n        total += value * {i}\n    return total\n"
+
+
+def _challenge(i):
+    return {"objective": f"Practice {TOPICS[i % len(TOPICS)]}", "description": f"Exercise {i}",
+            "language": LANGUAGES[i % len(LANGUAGES)], "difficulty": ["beginner", "moderate", "advanced"][i % 3]}
+
+
+# (name, method, path, weight, payload builder taking a variant number)
+SCENARIOS = [
+    ("generate", "POST", "/generate", 2, lambda i: {"prompt": f"Summarize {TOPICS[i % len(TOPICS)]} in one sentence ({i})"}),
+    ("quiz.generate", "GET", lambda i: f"/quiz/generate?language={LANGUAGES[i % len(LANGUAGES)]}", 1, None),
+    ("quiz.evaluate", "POST", "/quiz/evaluate", 2, lambda i: {
+        "language": LANGUAGES[i % len(LANGUAGES)],
+        "responses": [{"question": f"Question {n} ({i})", "answer": f"Option {'ABCD'[n % 4]}"} for n in range(5)]
+    }),
+    ("code.review", "POST", "/code/review", 3, lambda i: {
+        "code": _code(i), "language": "Python", "session_id": f"load-{i % 50}"
+    }),
+    ("code.review_batch", "POST", "/code/review/batch", 1, lambda i: {
+        "items": [{"code": _code(i * 4 + n), "language": "Python"} for n in range(4)]
+    }),
+    ("code.chat", "POST", "/code/chat", 3, lambda i: {"message": f"How do {TOPICS[i % len(TOPICS)]} work? ({i})"}),
+    ("challenge.incomplete_code", "POST", "/challenge/incomplete-code", 1, _challenge),
+    ("challenge.output_based", "POST", "/challenge/output-based", 1, _challenge),
+    ("challenge.problem_solving", "POST", "/challenge/problem-solving", 1, _challenge),
+    ("challenge.submit_solution", "POST", "/challenge/submit-solution", 1, lambda i: {
+        "code": _code(i), "language": "Python", "challenge_type": "problem-solving", "session_id": f"load-submit-{i % 50}"
+    })
+]
+
+
+class InProcessClient:
+    """Send requests to the Flask app through its test client"""
+
+    def __init__(self, app):
+        self.app = app
+        self._local = threading.local()
+
+    def request(self, method, path, payload):
+        client = getattr(self._local, "client", None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        response = client.open(path, method=method, json=payload)
+        return response.status_code, response.get_json(silent=True)
+
+
+class HTTPClient:
+    """Send requests to a running server"""
+
+    def __init__(self, base_url, timeout):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+
+    def request(self, method, path, payload):
+        data = json.dumps(payload).encode("utf-8") if payload is not None else None
+        request = urllib.request.Request(self.base_url + path, data=data, method=method,
+                                         headers={"Content-Type": "application/json"})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return response.status, json.loads(response.read() or b"null")
+        except urllib.error.HTTPError as e:
+            return e.code, None
+        except (urllib.error.URLError, TimeoutError, ConnectionError):
+            return 0, None
+
+
+def percentile(ordered, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not ordered:
+        return 0.0
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def summarize(samples, elapsed):
+    latencies = sorted(latency for _, latency in samples)
+    errors = sum(1 for status, _ in samples if not 200 <= status < 300)
+    status_codes = {}
+    for status, _ in samples:
+        status_codes[str(status)] = status_codes.get(str(status), 0) + 1
+    return {
+        "requests": len(samples),
+        "errors": errors,
+        "error_rate": round(errors / len(samples), 4) if samples else 0.0,
+        "throughput_rps": round(len(samples) / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 0.50) * 1000, 2),
+            "p95": round(percentile(latencies, 0.95) * 1000, 2),
+            "p99": round(percentile(latencies, 0.99) * 1000, 2),
+            "mean": round(sum(latencies) / len(latencies) * 1000, 2) if latencies else 0.0,
+            "max": round(latencies[-1] * 1000, 2) if latencies else 0.0
+        },
+        "status_codes": status_codes
+    }
+
+
+def run(client, scenarios, concurrency, duration, total_requests, variants, seed):
+    """Drive the scenarios with closed-loop workers; returns samples per scenario and elapsed seconds"""
+    weighted = [scenario for scenario in scenarios for _ in range(scenario[3])]
+    order = random.Random(seed)
+    counter = itertools.count()
+    lock = threading.Lock()
+    samples = {scenario[0]: [] for scenario in scenarios}
+    started = time.monotonic()
+    stop_at = started + duration if duration else None
+
+    def worker():
+        while True:
+            with lock:
+                sequence = next(counter)
+                if total_requests and sequence >= total_requests:
+                    return
+                name, method, path, _, build = order.choice(weighted)
+                variant = order.randrange(variants)
+            if stop_at and time.monotonic() >= stop_at:
+                return
+            target = path(variant) if callable(path) else path
+            request_started = time.perf_counter()
+            status, _ = client.request(method, target, build(variant) if build else None)
+            latency = time.perf_counter() - request_started
+            with lock:
+                samples[name].append((status, latency))
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples, time.monotonic() - started
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def print_report(results, baseline):
+    header = f"{'endpoint':<28} {'reqs':>6} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}"
+    if baseline:
+        header += f" {'rps vs base':>12} {'p95 vs base':>12}"
+    print(header)
+    rows = list(results["endpoints"].items()) + [("TOTAL", results["totals"])]
+    for name, entry in rows:
+        latency = entry["latency_ms"]
+        line = (f"{name:<28} {entry['requests']:>6} {entry['throughput_rps']:>8} {latency['p50']:>9} "
+                f"{latency['p95']:>9} {latency['p99']:>9} {entry['error_rate']:>7.2%}")
+        if baseline:
+            before = baseline["totals"] if name == "TOTAL" else baseline["endpoints"].get(name)
+            line += f" {_change(before and before['throughput_rps'], entry['throughput_rps']):>12}"
+            line += f" {_change(before and before['latency_ms']['p95'], latency['p95']):>12}"
+        print(line)
+
+
+def _change(before, after):
+    if not before:
+        return "-"
+    return f"{(after - before) / before:+.1%}"
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--concurrency", type=int, default=16)
+    arg_parser.add_argument("--duration", type=float, default=10.0, help="Seconds to run; ignored with --requests")
+    arg_parser.add_argument("--requests", type=int, default=0, help="Total requests to send instead of a duration")
+    arg_parser.add_argument("--endpoints", default="", help="Comma-separated scenario names (default: all)")
+    arg_parser.add_argument("--variants", type=int, default=1000,
+                            help="Distinct payloads per endpoint; lower values raise the cache hit rate")
+    arg_parser.add_argument("--seed", type=int, default=1)
+    arg_parser.add_argument("--latency-ms", type=float, default=200.0, help="Mean fake LLM latency")
+    arg_parser.add_argument("--latency-distribution", default="lognormal",
+                            choices=["fixed", "uniform", "exponential", "lognormal"])
+    arg_parser.add_argument("--latency-spread", type=float, default=0.5)
+    arg_parser.add_argument("--failure-rate", type=float, default=0.0)
+    arg_parser.add_argument("--url", help="Base URL of a running server instead of the in-process app")
+    arg_parser.add_argument("--timeout", type=float, default=120.0, help="HTTP timeout with --url")
+    arg_parser.add_argument("--output", default="load_test_results.json")
+    arg_parser.add_argument("--baseline", help="Earlier results file to compare against")
+    args = arg_parser.parse_args()
+
+    scenarios = SCENARIOS
+    if args.endpoints:
+        wanted = {name.strip() for name in args.endpoints.split(",")}
+        scenarios = [scenario for scenario in SCENARIOS if scenario[0] in wanted]
+        if not scenarios:
+            arg_parser.error(f"No scenario matches --endpoints; choose from {', '.join(s[0] for s in SCENARIOS)}")
+
+    if args.url:
+        client = HTTPClient(args.url, args.timeout)
+    else:
+        os.environ["LLM_TYPE"] = "fake"
+        os.environ["FAKE_LLM_LATENCY_MS"] = str(args.latency_ms)
+        os.environ["FAKE_LLM_LATENCY_DISTRIBUTION"] = args.latency_distribution
+        os.environ["FAKE_LLM_LATENCY_SPREAD"] = str(args.latency_spread)
+        os.environ["FAKE_LLM_FAILURE_RATE"] = str(args.failure_rate)
+        os.environ["FAKE_LLM_SEED"] = str(args.seed)
+        # Do not let a local .env point the in-process app at real backends
+        os.environ["LLM_BACKENDS"] = ""
+        os.environ["GOOGLE_API_KEYS"] = ""
+        import app as app_module
+        app = app_module.create_app()
+        if app_module.initialize_services() is None:
+            sys.exit("Could not initialize services")
+        client = InProcessClient(app)
+
+    samples, elapsed = run(client, scenarios, args.concurrency, 0 if args.requests else args.duration,
+                           args.requests, max(1, args.variants), args.seed)
+
+    all_samples = [sample for entries in samples.values() for sample in entries]
+    status, service_stats = client.request("GET", "/stats", None)
+    results = {
+        "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "baseline")},
+        "environment": {"python": platform.python_version(), "platform": platform.platform(),
+                        "cpus": os.cpu_count(), "git_commit": git_commit()},
+        "elapsed_s": round(elapsed, 3),
+        "totals": summarize(all_samples, elapsed),
+        "endpoints": {name: summarize(entries, elapsed) for name, entries in samples.items() if entries},
+        "service_stats": service_stats if status == 200 else None
+    }
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as baseline_file:
+            baseline = json.load(baseline_file)
+    print_report(results, baseline)
+
+    with open(args.output, "w", encoding="utf-8") as output_file:
+        json.dump(results, output_file, indent=2)
+    print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+# Production server: gunicorn -c gunicorn.conf.py
+import os
+
+# Every worker calls the factory after the fork, so thread pools, SQLite
+# connections and LLM clients are created per process, and a worker only
+# accepts connections once its services are initialized and warmed up
+wsgi_app = "app:create_app()"
+preload_app = False
+
+bind = f"{os.getenv('HOST', '0.0.0.0')}:{os.getenv('PORT', 5000)}"
+
+# One worker by default: jobs, caches, answer keys, review history, the quiz
+# pool and metrics live in process memory unless their SQLite paths are set.
+# Raise WEB_CONCURRENCY (up to about the CPU count) once they are
+workers = int(os.getenv("WEB_CONCURRENCY", 1))
+
+SHARED_STATE_PATHS = ("JOB_STORE_PATH", "QUIZ_STORE_PATH", "REVIEW_HISTORY_PATH", "LLM_CACHE_PATH", "QUESTION_BANK_PATH")
+_unshared = [name for name in SHARED_STATE_PATHS if not os.getenv(name)]
+if workers > 1 and _unshared:
+    print(f"Warning: {workers} workers without {', '.join(_unshared)}; "
+          "that state is kept per worker (see Production mode in README.md)")
+
+# Requests mostly wait on the LLM; threads keep a worker busy while they do
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", 8))
+
+# Restarts a worker that stops responding, including one whose boot and
+# warm-up call take longer (bounded by LLM_TIMEOUT); with gthread, slow
+# requests running in the threads do not count against it
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 120))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", 30))
+keepalive = 5
+
+# Recycle workers now and then to bound memory growth of in-process caches
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", 0))
+max_requests_jitter = max_requests // 10
+
+accesslog = "-"
@@ -0,0 +1,342 @@
+import asyncio
+import json
+import os
+import random
+import re
+import string
+import threading
+import time
+import zlib
+from typing import Any, Callable, Dict, List, Optional, Pattern, Tuple
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from pydantic import PrivateAttr
+from ..prompts import prompt_registry
+from ..utils.prompt_compaction import estimate_tokens
+
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "exponential", "lognormal")
+DIFFICULTIES = ("beginner", "moderate", "advanced")
+
+
+class ServiceUnavailable(Exception):
+    """Simulated transient provider error, retried like a real 503"""
+
+
+# Distinct subjects so fake questions are not near-duplicates of each other
+TOPICS = (
+    "variable scoping rules", "integer overflow", "string immutability", "list slicing", "dictionary ordering",
+    "exception chaining", "closures capturing loop variables", "default argument evaluation", "operator precedence",
+    "garbage collection", "thread safety of counters", "generator exhaustion", "recursion depth limits",
+    "floating point comparison", "module import caching", "shallow versus deep copies", "method resolution order",
+    "context managers", "unicode normalization", "regular expression greediness", "file descriptor leaks",
+    "lazy evaluation", "hash collisions", "bitwise shifts", "sorting stability", "async cancellation",
+    "type coercion", "memory aliasing", "pattern matching", "iterator protocols"
+)
+
+
+def _quiz(variables: Dict[str, str], seed: int) -> Dict[str, Any]:
+    language = variables["language"]
+    questions = []
+    for index in range(20):
+        topic = TOPICS[(seed + index) % len(TOPICS)]
+        options = [f"{language} option {index + 1}{letter}" for letter in "ABCD"]
+        questions.append({
+            "text": f"Question {index + 1}: which statement about {topic} in {language} is correct?",
+            "options": options,
+            "correct_answer": options[(seed + index) % 4],
+            "difficulty": DIFFICULTIES[index * len(DIFFICULTIES) // 20],
+            "topic": topic,
+            "explanation": f"Option {'ABCD'[(seed + index) % 4]} describes how {language} behaves."
+        })
+    return {"questions": questions}
+
+
+def _quiz_shard(variables: Dict[str, str], seed: int) -> Dict[str, Any]:
+    language, difficulty = variables["language"], variables["difficulty"]
+    questions = []
+    for index in range(int(variables["count"])):
+        topic = TOPICS[(seed + index) % len(TOPICS)]
+        options = [f"{language} {topic} answer {letter}" for letter in "ABCD"]
+        questions.append({
+            "text": f"How does {language} handle {topic}?",
+            "options": options,
+            "correct_answer": options[(seed + index) % 4],
+            "difficulty": difficulty,
+            "topic": topic,
+            "explanation": f"Option {'ABCD'[(seed + index) % 4]} describes {topic} in {language}."
+        })
+    return {"questions": questions}
+
+
+def _enrich_feedback(variables: Dict[str, str], seed: int) -> Dict[str, Any]:
+    items = json.loads(variables["items"])
+    return {"feedback": [
+        {
+            "index": item["index"],
+            "explanation": f"'{item['user_answer']}' is wrong; '{item['correct_answer']}' is right."
+        }
+        for item in items
+    ]}
+
+
+def _evaluate(variables: Dict[str, str], seed: int) -> Dict[str, Any]:
+    responses = json.loads(variables["responses"]) if variables["responses"].strip() else []
+    feedback = []
+    for index, response in enumerate(responses if isinstance(responses, list) else []):
+        response = response if isinstance(response, dict) else {"user_answer": response}
+        is_correct = (seed + index) % 3 != 0
+        answer = response.get("user_answer") or response.get("answer", "")
+        feedback.append({
+            "question": response.get("question", f"Question {index + 1}"),
+            "user_answer": answer,
+            "correct_answer": answer if is_correct else "Another option",
+            "is_correct": is_correct,
+            "explanation": "Matches the expected answer." if is_correct else "Does not match the expected answer."
+        })
+    correct = sum(item["is_correct"] for item in feedback)
+    percentage = round(correct / len(feedback) * 100, 2) if feedback else 0.0
+    return {
+        "total_questions": len(feedback),
+        "correct_answers": correct,
+        "score_percentage": percentage,
+        "skill_level": "advanced" if percentage >= 80 else "moderate" if percentage >= 50 else "beginner",
+        "detailed_feedback": feedback
+    }
+
+
+def _review(variables: Dict[str, str], seed: int) -> Dict[str, Any]:
+    categories = ("Structure/Organization", "Performance", "Best Practices")
+    return {
+        "overall_assessment": {
+            "code_quality": ("poor", "average", "good", "excellent")[seed % 4],
+            "potential_improvements": ["Name variables after their purpose", "Handle invalid input"],
+            "complexity_score": seed % 11
+        },
+        "detailed_review": [
+            {
+                "category": category,
+                "observations": [f"{category} observation for this {variables['language']} code"],
+                "suggestions": [f"{category} suggestion"]
+            }
+            for category in categories
+        ],
+        "learning_resources": [{"topic": f"{variables['language']} style guide", "url": "https://example.com/style"}]
+    }
+
+
+def _review_diff(variables: Dict[str, str], seed: int) -> Dict[str, Any]:
+    review = _review(variables, seed)
+    review["detailed_review"] = review["detailed_review"][:1]
+    review["learning_resources"] = []
+    return review
+
+
+def _chat(variables: Dict[str, str], seed: int) -> Dict[str, Any]:
+    topic = " ".join(variables["message"].split()[:8])
+    return {
+        "response_type": ("explanation", "guidance", "resource")[seed % 3],
+        "main_points": [f"Key point {index} about {topic}" for index in range(1, 4)],
+        "detailed_explanation": f"An explanation of {topic}.",
+        "learning_resources": [{"title": "Reference", "url": "https://example.com/reference", "type": "documentation"}],
+        "recommended_next_steps": ["Read the reference", "Write a small example"]
+    }
+
+
+def _incomplete_code(variables: Dict[str, str], seed: int) -> Dict[str, Any]:
+    return {
+        "language": variables["language"],
+        "code": "def solve(values):\n    # TODO: complete the loop\n    pass\n",
+        "missing_parts": [{"location": "line 2", "hint": variables["objective"], "difficulty": variables["difficulty"]}],
+        "learning_goals": [variables["objective"], "Iteration"]
+    }
+
+
+def _output_challenge(variables: Dict[str, str], seed: int) -> Dict[str, Any]:
+    return {
+        "language": variables["language"],
+        "expected_output": str(seed % 1000),
+        "input_description": variables["description"],
+        "challenge_details": {"difficulty": variables["difficulty"], "key_concepts": [variables["objective"]]},
+        "test_cases": [{"input": str(index), "expected_output": str(index * 2)} for index in range(3)]
+    }
+
+
+def _problem_solving(variables: Dict[str, str], seed: int) -> Dict[str, Any]:
+    return {
+        "language": variables["language"],
+        "problem_statement": f"{variables['objective']}: {variables['description']}",
+        "challenge_details": {
+            "difficulty": variables["difficulty"],
+            "key_concepts": [variables["objective"]],
+            "constraints": ["1 <= n <= 10^5"]
+        },
+        "input_specification": {"parameters": [{"name": "values", "type": "list[int]", "description": "Input values"}]},
+        "output_specification": {"type": "int", "description": "The answer"},
+        "example_cases": [{"input": "[1, 2, 3]", "output": "6", "explanation": "Sum of the values"}]
+    }
+
+
+def _solution_guidance(variables: Dict[str, str], seed: int) -> Dict[str, Any]:
+    return {
+        "overall_assessment": {"strengths": ["Readable"], "areas_for_improvement": ["Edge cases"]},
+        "learning_insights": [{
+            "concept": f"{variables['challenge_type']} techniques",
+            "explanation": f"How the {variables['language']} solution could be structured.",
+            "resources": [{"title": "Guide", "url": "https://example.com/guide"}]
+        }],
+        "alternative_approaches": [{"description": "Iterative approach", "pros": ["Less memory"], "cons": ["Longer code"]}]
+    }
+
+
+def _repair(variables: Dict[str, str], seed: int) -> Dict[str, Any]:
+    # Placeholder values of the requested types
+    placeholders = {"string": "Repaired value", "integer": 0, "number": 0.0, "boolean": False, "array": [], "object": {}}
+
+    def value(outline: Any) -> Any:
+        if isinstance(outline, list):
+            return [value(outline[0])]
+        if isinstance(outline, dict):
+            return {key: value(item) for key, item in outline.items()}
+        return placeholders[outline]
+
+    return {name: value(outline) for name, outline in json.loads(variables["fields"]).items()}
+
+
+# Canned response per registered prompt; builders get the prompt's variables
+RESPONSES: Dict[str, Callable[[Dict[str, str], int], Dict[str, Any]]] = {
+    "quiz.generate": _quiz,
+    "quiz.generate_shard": _quiz_shard,
+    "quiz.enrich_feedback": _enrich_feedback,
+    "quiz.evaluate": _evaluate,
+    "code_review.review": _review,
+    "code_review.review_diff": _review_diff,
+    "code_review.chat": _chat,
+    "coding_challenge.incomplete_code": _incomplete_code,
+    "coding_challenge.output_challenge": _output_challenge,
+    "coding_challenge.problem_solving": _problem_solving,
+    "coding_challenge.solution_guidance": _solution_guidance,
+    "response.repair": _repair
+}
+
+_patterns: Optional[List[Tuple[str, Pattern]]] = None
+_patterns_lock = threading.Lock()
+
+
+def _prompt_patterns() -> List[Tuple[str, Pattern]]:
+    """Regexes matching each registered prompt as rendered, capturing its variables"""
+    global _patterns
+    with _patterns_lock:
+        if _patterns is None:
+            _patterns = []
+            for spec in prompt_registry:
+                parts, seen = [], set()
+                for literal, field, _, _ in string.Formatter().parse(spec.template):
+                    parts.append(re.escape(literal))
+                    if field:
+                        parts.append(f"(?P={field})" if field in seen else f"(?P<{field}>.*?)")
+                        seen.add(field)
+                _patterns.append((spec.name, re.compile("".join(parts), re.DOTALL)))
+        return _patterns
+
+
+def fake_response(prompt: str, malformed: bool = False) -> str:
+    """
+    Deterministic response for a prompt.
+
+    Registered prompts get schema-valid JSON built from their variables,
+    or with one top-level field dropped when malformed is set; anything
+    else (e.g. /generate) gets a short text reply.
+    """
+    seed = zlib.crc32(prompt.encode("utf-8"))
+    for name, pattern in _prompt_patterns():
+        match = pattern.fullmatch(prompt)
+        if match and name in RESPONSES:
+            response = RESPONSES[name](match.groupdict(), seed)
+            if malformed and name != "response.repair" and len(response) > 1:
+                response.pop(sorted(response)[seed % len(response)])
+            return json.dumps(response)
+    return f"Fake response #{seed % 10000} to: {' '.join(prompt.split()[:12])}"
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Offline chat model for benchmarks and load tests.
+
+    Answers every registered prompt with schema-valid JSON after a latency
+    drawn from the configured distribution, and fails with a retryable
+    ServiceUnavailable error at failure_rate. At malformed_rate a response
+    is missing one of its fields, to exercise response repair.
+    """
+
+    model: str = "fake"
+    latency_ms: float = 0.0
+    latency_distribution: str = "fixed"
+    # Relative spread: half-width for uniform, sigma for lognormal
+    latency_spread: float = 0.5
+    failure_rate: float = 0.0
+    malformed_rate: float = 0.0
+    seed: Optional[int] = None
+
+    _random: random.Random = PrivateAttr()
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    def model_post_init(self, __context: Any) -> None:
+        if self.latency_distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution: {self.latency_distribution}")
+        self._random = random.Random(self.seed)
+
+    @classmethod
+    def from_env(cls, **overrides: Any) -> "FakeChatModel":
+        """Build a fake model configured by FAKE_LLM_* environment variables"""
+        seed = os.getenv("FAKE_LLM_SEED")
+        settings = {
+            "latency_ms": float(os.getenv("FAKE_LLM_LATENCY_MS", 0)),
+            "latency_distribution": os.getenv("FAKE_LLM_LATENCY_DISTRIBUTION", "fixed").lower(),
+            "latency_spread": float(os.getenv("FAKE_LLM_LATENCY_SPREAD", 0.5)),
+            "failure_rate": float(os.getenv("FAKE_LLM_FAILURE_RATE", 0)),
+            "malformed_rate": float(os.getenv("FAKE_LLM_MALFORMED_RATE", 0)),
+            "seed": int(seed) if seed else None
+        }
+        settings.update(overrides)
+        return cls(**settings)
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake"
+
+    def _draw(self) -> Tuple[float, bool, bool]:
+        """Latency in seconds, whether the call fails and whether its response is malformed"""
+        with self._lock:
+            mean = self.latency_ms / 1000
+            if self.latency_distribution == "uniform":
+                latency = self._random.uniform(mean * (1 - self.latency_spread), mean * (1 + self.latency_spread))
+            elif self.latency_distribution == "exponential":
+                latency = self._random.expovariate(1 / mean) if mean else 0.0
+            elif self.latency_distribution == "lognormal":
+                # Median equals latency_ms; the tail grows with the spread
+                latency = mean * self._random.lognormvariate(0, self.latency_spread)
+            else:
+                latency = mean
+            return max(0.0, latency), self._random.random() < self.failure_rate, self._random.random() < self.malformed_rate
+
+    def _result(self, messages: List[BaseMessage], failed: bool, malformed: bool) -> ChatResult:
+        if failed:
+            raise ServiceUnavailable("503 simulated provider failure")
+        prompt = "\n".join(str(message.content) for message in messages)
+        content = fake_response(prompt, malformed)
+        input_tokens, output_tokens = estimate_tokens(prompt), estimate_tokens(content)
+        message = AIMessage(content=content, usage_metadata={
+            "input_tokens": input_tokens, "output_tokens": output_tokens, "total_tokens": input_tokens + output_tokens
+        })
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        latency, failed, malformed = self._draw()
+        time.sleep(latency)
+        return self._result(messages, failed, malformed)
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        latency, failed, malformed = self._draw()
+        await asyncio.sleep(latency)
+        return self._result(messages, failed, malformed)
@@ -1,7 +1,6 @@
 import os
-from typing import Dict, Any
 from langchain_core.language_models.base import BaseLanguageModel
-from langchain_google_genai import ChatGoogleGenerativeAI
+from langchain_core.runnables import Runnable
 
 class LLMFactory:
     """Factory class to create different LLM instances"""
@@ -18,20 +17,73 @@ class LLMFactory:
         Returns:
             An instance of BaseLanguageModel
         """
+        # Provider SDKs are imported on first use; langchain_google_genai alone
+        # takes about half a second to import
         if llm_type == "gemini":
+            from langchain_google_genai import ChatGoogleGenerativeAI
+            
             model_name = kwargs.get("model_name", "gemini-2.0-flash")
             api_key = kwargs.get("api_key", os.getenv("GOOGLE_API_KEY"))
             
             if not api_key:
                 raise ValueError("GOOGLE_API_KEY not found in environment variables")
                 
-            return ChatGoogleGenerativeAI(model=model_name, google_api_key=api_key)
+            # Retries with backoff are done by LLMService (LLM_MAX_RETRIES) within
+            # the request deadline; client-side retries would stack on top of them
+            max_retries = kwargs.get("max_retries", int(os.getenv("LLM_CLIENT_MAX_RETRIES", 0)))
+            return ChatGoogleGenerativeAI(model=model_name, google_api_key=api_key, max_retries=max_retries)
+            
+        elif llm_type == "openai_compatible":
+            # Any server exposing the OpenAI chat completions API, e.g. a
+            # local vLLM, llama.cpp or Ollama endpoint
+            try:
+                from langchain_openai import ChatOpenAI
+            except ImportError:
+                raise ValueError("The openai_compatible LLM type requires the langchain-openai package")
+            
+            model_name = kwargs.get("model_name")
+            base_url = kwargs.get("base_url", os.getenv("OPENAI_BASE_URL"))
+            if not model_name or not base_url:
+                raise ValueError("openai_compatible LLMs need a model_name and a base_url")
+            
+            # Local servers usually accept any key
+            api_key = kwargs.get("api_key") or os.getenv("OPENAI_API_KEY") or "not-needed"
+            max_retries = kwargs.get("max_retries", int(os.getenv("LLM_CLIENT_MAX_RETRIES", 0)))
+            return ChatOpenAI(model=model_name, base_url=base_url, api_key=api_key, max_retries=max_retries)
+            
+        elif llm_type == "fake":
+            # Offline model with canned responses for benchmarks and load tests
+            from .fake_llm import FakeChatModel
+            return FakeChatModel.from_env(**kwargs)
             
         # Add support for more LLM types here
-        # elif llm_type == "openai":
-        #     return ChatOpenAI(...)
         # elif llm_type == "anthropic":
         #     return ChatAnthropic(...)
             
         else:
-            raise ValueError(f"Unsupported LLM type: {llm_type}") 
\ No newline at end of file
+            raise ValueError(f"Unsupported LLM type: {llm_type}")
+    
+    @staticmethod
+    def with_json_mode(llm: BaseLanguageModel) -> Runnable:
+        """
+        Return the LLM configured for native JSON output, where supported.
+        
+        Args:
+            llm: LLM instance created by create_llm
+            
+        Returns:
+            A runnable that makes the model emit bare JSON, or the LLM
+            unchanged if it has no native JSON mode
+        """
+        # Matched by name so checking does not import the provider SDKs
+        if type(llm).__name__ == "ChatGoogleGenerativeAI":
+            return llm.bind(response_mime_type="application/json")
+        
+        # An LLMPool switches each of its backends to JSON mode
+        if hasattr(llm, "with_json_mode"):
+            return llm.with_json_mode()
+        
+        if type(llm).__name__ == "ChatOpenAI":
+            return llm.bind(response_format={"type": "json_object"})
+        
+        return llm 
\ No newline at end of file
@@ -0,0 +1,323 @@
+import asyncio
+import copy
+import json
+import math
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+from langchain_core.language_models.base import BaseLanguageModel
+from langchain_core.runnables import Runnable, RunnableConfig
+from .llm_factory import LLMFactory
+from ..utils.llm_errors import CircuitOpenError, QueueFullError
+from ..utils.resilience import is_retryable
+
+STRATEGIES = ("latency", "least_loaded")
+
+# Seconds a backend that just failed is tried last, so retries land elsewhere
+FAILURE_COOLDOWN = 5
+
+# Seconds between checks for a free slot while every backend is at its concurrency limit
+SATURATED_POLL = 0.05
+
+
+class LLMBackend:
+    """One model endpoint in an LLMPool, with its load, latency and health"""
+
+    def __init__(self,
+                 name: str,
+                 llm: BaseLanguageModel,
+                 max_concurrency: int = 8,
+                 rpm: Optional[int] = None):
+        self.name = name
+        self.llm = llm
+        self.json_llm = LLMFactory.with_json_mode(llm)
+        self.max_concurrency = max_concurrency
+        self.rpm = rpm
+        self.active = 0
+        self.selected = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.ejections = 0
+        self.ejected_until = 0.0
+        self.failed_at = float("-inf")
+        # Set when the backend returns from ejection; one more failure ejects it again
+        self.probation = False
+        # Moving average of successful call latency; None until measured
+        self.latency: Optional[float] = None
+        # Start times of the calls made in the last minute, for the rate limit
+        self._recent: deque = deque()
+
+    def rate_wait(self, now: float) -> float:
+        """Seconds until the backend may start another call under its rate limit"""
+        if not self.rpm:
+            return 0.0
+        while self._recent and self._recent[0] <= now - 60:
+            self._recent.popleft()
+        if len(self._recent) < self.rpm:
+            return 0.0
+        return self._recent[0] + 60 - now
+
+    def score(self, strategy: str, now: float) -> Tuple:
+        """Sort key; the backend with the lowest key gets the next call"""
+        load = self.active / self.max_concurrency
+        latency = self.latency or 0.0
+        if strategy == "least_loaded":
+            primary = (load, latency)
+        else:
+            # Expected time to finish one more call given the calls in flight
+            primary = (latency * (1 + self.active / self.max_concurrency), load)
+        # Backends that just failed go last; ties rotate through the backends
+        return (now - self.failed_at < FAILURE_COOLDOWN,) + primary + (self.selected,)
+
+    def wait(self, now: float) -> float:
+        """Seconds until the backend may take another call; 0 when it can now"""
+        rate_wait = self.rate_wait(now)
+        if self.active >= self.max_concurrency:
+            return max(rate_wait, SATURATED_POLL)
+        return rate_wait
+
+    def stats(self, now: float) -> Dict[str, Any]:
+        return {
+            "active": self.active,
+            "max_concurrency": self.max_concurrency,
+            "rpm": self.rpm,
+            "calls_last_minute": len(self._recent),
+            "selected": self.selected,
+            "failures": self.failures,
+            "ejections": self.ejections,
+            "ejected": self.ejected_until > now,
+            "latency_ms": round(self.latency * 1000, 2) if self.latency is not None else None
+        }
+
+
+class LLMPool(Runnable):
+    """
+    Several LLM backends served as one model.
+
+    Every call goes to the healthy backend with the lowest recent latency
+    (or the fewest calls in flight relative to its concurrency, with the
+    least_loaded strategy) that is under its concurrency and
+    requests-per-minute limits. A backend that fails failure_threshold
+    times in a row with a transient error is taken out of rotation for
+    eject_seconds. When every backend is at one of its limits the call
+    waits up to max_wait seconds for one to free up, then QueueFullError
+    is raised.
+    """
+
+    def __init__(self,
+                 backends: List[LLMBackend],
+                 strategy: str = "latency",
+                 failure_threshold: int = 3,
+                 eject_seconds: float = 30,
+                 max_wait: float = 5,
+                 json_mode: bool = False):
+        if not backends:
+            raise ValueError("LLMPool needs at least one backend")
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown LLM pool strategy: {strategy}")
+        self.backends = backends
+        self.strategy = strategy
+        self.failure_threshold = failure_threshold
+        self.eject_seconds = eject_seconds
+        self.max_wait = max_wait
+        self.json_mode = json_mode
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> Optional["LLMPool"]:
+        """
+        Build a pool from environment variables.
+
+        LLM_BACKENDS is a JSON list of backends, each an object with
+        "type" ("gemini" or "openai_compatible"), "model_name" and optionally
+        "name", "api_key_env", "base_url", "max_concurrency" and "rpm", e.g.
+        [{"type": "gemini", "api_key_env": "GOOGLE_API_KEY_2", "rpm": 15},
+         {"type": "openai_compatible", "base_url": "http://localhost:8000/v1",
+          "model_name": "llama3"}].
+        As a shorthand, GOOGLE_API_KEYS (comma-separated) creates one Gemini
+        backend per key.
+
+        Returns:
+            A configured LLMPool, or None when no pool is configured
+        """
+        configs = json.loads(os.getenv("LLM_BACKENDS", "") or "[]")
+        if not configs:
+            keys = [key.strip() for key in os.getenv("GOOGLE_API_KEYS", "").split(",") if key.strip()]
+            configs = [{"type": "gemini", "api_key": key} for key in keys]
+        if not configs:
+            return None
+
+        default_rpm = int(os.getenv("LLM_BACKEND_RPM", 0)) or None
+        backends = []
+        for index, config in enumerate(configs):
+            config = dict(config)
+            llm_type = config.pop("type", "gemini")
+            name = config.pop("name", None)
+            max_concurrency = int(config.pop("max_concurrency", os.getenv("LLM_BACKEND_CONCURRENCY", 8)))
+            rpm = config.pop("rpm", default_rpm)
+            api_key_env = config.pop("api_key_env", None)
+            if api_key_env:
+                config["api_key"] = os.getenv(api_key_env)
+            llm = LLMFactory.create_llm(llm_type, **config)
+            backends.append(LLMBackend(
+                name=name or f"{index}:{config.get('model_name') or llm_type}",
+                llm=llm,
+                max_concurrency=max_concurrency,
+                rpm=int(rpm) if rpm else None
+            ))
+
+        return cls(
+            backends,
+            strategy=os.getenv("LLM_POOL_STRATEGY", "latency").lower(),
+            failure_threshold=int(os.getenv("LLM_POOL_FAILURES", 3)),
+            eject_seconds=float(os.getenv("LLM_POOL_EJECT_SECONDS", 30)),
+            max_wait=float(os.getenv("LLM_POOL_MAX_WAIT", 5))
+        )
+
+    @property
+    def model(self) -> str:
+        """Name the pool is scheduled and cached under"""
+        return "pool:" + ",".join(backend.name for backend in self.backends)
+
+    @property
+    def capacity(self) -> int:
+        """Sum of the backends' concurrency limits"""
+        return sum(backend.max_concurrency for backend in self.backends)
+
+    def with_json_mode(self) -> "LLMPool":
+        """Return a view of the pool calling each backend in native JSON mode"""
+        view = copy.copy(self)
+        view.json_mode = True
+        return view
+
+    def invoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Any:
+        backend = self._acquire()
+        started = time.monotonic()
+        error = None
+        try:
+            return self._runnable(backend).invoke(input, config, **kwargs)
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            self._release(backend, started, error)
+
+    async def ainvoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Any:
+        backend = await self._aacquire()
+        started = time.monotonic()
+        error = None
+        try:
+            return await self._runnable(backend).ainvoke(input, config, **kwargs)
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            self._release(backend, started, error)
+
+    def stream(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Iterator[Any]:
+        backend = self._acquire()
+        started = time.monotonic()
+        error = None
+        try:
+            yield from self._runnable(backend).stream(input, config, **kwargs)
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            self._release(backend, started, error)
+
+    async def astream(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> AsyncIterator[Any]:
+        backend = await self._aacquire()
+        started = time.monotonic()
+        error = None
+        try:
+            async for chunk in self._runnable(backend).astream(input, config, **kwargs):
+                yield chunk
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            self._release(backend, started, error)
+
+    def _runnable(self, backend: LLMBackend) -> Runnable:
+        return backend.json_llm if self.json_mode else backend.llm
+
+    def _acquire(self) -> LLMBackend:
+        """Pick a backend for one call, waiting for a slot or rate limit to free up if needed"""
+        give_up_at = time.monotonic() + self.max_wait
+        while True:
+            backend, wait = self._try_acquire(give_up_at)
+            if backend is not None:
+                return backend
+            time.sleep(wait)
+
+    async def _aacquire(self) -> LLMBackend:
+        """Asynchronous variant of _acquire"""
+        give_up_at = time.monotonic() + self.max_wait
+        while True:
+            backend, wait = self._try_acquire(give_up_at)
+            if backend is not None:
+                return backend
+            await asyncio.sleep(wait)
+
+    def _try_acquire(self, give_up_at: float) -> Tuple[Optional[LLMBackend], float]:
+        """Return the chosen backend, or None and how long to wait before trying again"""
+        with self._lock:
+            now = time.monotonic()
+            healthy = [backend for backend in self.backends if backend.ejected_until <= now]
+            if not healthy:
+                reopen = min(backend.ejected_until for backend in self.backends)
+                raise CircuitOpenError("All LLM backends are out of rotation", retry_after=max(1, math.ceil(reopen - now)))
+
+            # Saturated backends are skipped, so the concurrency limit is a hard cap
+            waits = {backend.name: backend.wait(now) for backend in healthy}
+            ready = [backend for backend in healthy if waits[backend.name] == 0]
+            if ready:
+                backend = min(ready, key=lambda candidate: candidate.score(self.strategy, now))
+                backend.active += 1
+                backend.selected += 1
+                if backend.rpm:
+                    backend._recent.append(now)
+                return backend, 0.0
+
+            wait = min(waits.values())
+            if now + wait > give_up_at:
+                raise QueueFullError("Every LLM backend is at its concurrency or rate limit", retry_after=max(1, math.ceil(wait)))
+            return None, wait
+
+    def _release(self, backend: LLMBackend, started: float, error: Optional[BaseException] = None) -> None:
+        """Record the outcome of a call and eject the backend if it keeps failing"""
+        with self._lock:
+            backend.active -= 1
+            if error is not None and not isinstance(error, Exception):
+                # Cancelled or closed early: neither a latency sample nor a failure
+                return
+            if error is None:
+                elapsed = time.monotonic() - started
+                backend.latency = elapsed if backend.latency is None else 0.8 * backend.latency + 0.2 * elapsed
+                backend.consecutive_failures = 0
+                backend.probation = False
+                return
+            # Invalid requests fail the same way on every backend; only
+            # provider-side errors say something about this backend's health
+            if not is_retryable(error):
+                return
+            backend.failures += 1
+            backend.consecutive_failures += 1
+            backend.failed_at = time.monotonic()
+            if backend.probation or backend.consecutive_failures >= self.failure_threshold:
+                backend.ejected_until = time.monotonic() + self.eject_seconds
+                backend.ejections += 1
+                # Back in rotation after eject_seconds, on probation
+                backend.consecutive_failures = 0
+                backend.probation = True
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            now = time.monotonic()
+            return {
+                "strategy": self.strategy,
+                "backends": {backend.name: backend.stats(now) for backend in self.backends}
+            }
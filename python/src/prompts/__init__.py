@@ -0,0 +1,3 @@
+# Prompts package initialization
+from .registry import PromptRegistry, PromptSpec, prompt_registry
+from . import quiz_prompts, code_review_prompts, coding_challenge_prompts, repair_prompts
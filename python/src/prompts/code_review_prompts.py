@@ -0,0 +1,135 @@
+from .registry import prompt_registry
+from ..utils.schemas import ResponseSchema
+
+# Prompt for code review with explicit JSON formatting
+REVIEW_CODE = prompt_registry.register("code_review.review", """
+        Perform a detailed code review for the following {language} code.
+        
+        Provide the review in the following strict JSON format:
+        {{
+            "overall_assessment": {{
+                "code_quality": "poor/average/good/excellent",
+                "potential_improvements": ["Improvement 1", "Improvement 2"],
+                "complexity_score": 0-10
+            }},
+            "detailed_review": [
+                {{
+                    "category": "Structure/Organization",
+                    "observations": ["Observation 1", "Observation 2"],
+                    "suggestions": ["Suggestion 1", "Suggestion 2"]
+                }},
+                {{
+                    "category": "Performance",
+                    "observations": ["Observation 1", "Observation 2"],
+                    "suggestions": ["Suggestion 1", "Suggestion 2"]
+                }},
+                {{
+                    "category": "Best Practices",
+                    "observations": ["Observation 1", "Observation 2"],
+                    "suggestions": ["Suggestion 1", "Suggestion 2"]
+                }}
+            ],
+            "learning_resources": [
+                {{
+                    "topic": "Related concept",
+                    "url": "https://example.com/resource"
+                }}
+            ]
+        }}
+
+        Code to review:
+        {code}
+
+        Ensure:
+        1. Do NOT provide the corrected code
+        2. Focus on constructive guidance
+        3. Provide actionable insights
+        4. Include learning resources
+        """, schema=ResponseSchema({
+            "overall_assessment": dict,
+            "detailed_review": [dict],
+            "learning_resources": list
+        }))
+
+# Prompt for re-reviewing only the lines changed since the previous review
+REVIEW_CODE_DIFF = prompt_registry.register("code_review.review_diff", """
+        A learner resubmitted {language} code that was reviewed before.
+        
+        Summary of the previous review:
+        {previous_review}
+        
+        Changes since the previous submission (unified diff):
+        {diff}
+        
+        Review only the effect of these changes. Provide the response in the following strict JSON format:
+        {{
+            "overall_assessment": {{
+                "code_quality": "poor/average/good/excellent",
+                "potential_improvements": ["Improvement 1", "Improvement 2"],
+                "complexity_score": 0-10
+            }},
+            "detailed_review": [
+                {{
+                    "category": "Structure/Organization, Performance or Best Practices",
+                    "observations": ["Observation 1", "Observation 2"],
+                    "suggestions": ["Suggestion 1", "Suggestion 2"]
+                }}
+            ],
+            "learning_resources": [
+                {{
+                    "topic": "Related concept",
+                    "url": "https://example.com/resource"
+                }}
+            ]
+        }}
+        
+        Ensure:
+        1. overall_assessment describes the code as it is now
+        2. detailed_review only contains categories affected by the changes
+        3. learning_resources only lists new topics and may be empty
+        4. Do NOT provide the corrected code
+        """, schema=ResponseSchema({
+            "overall_assessment": dict,
+            "detailed_review": [dict]
+        }))
+
+# Prompt for chat response with explicit JSON formatting
+CHAT = prompt_registry.register("code_review.chat", """
+        Provide a helpful, educational response to the following programming-related query:
+        
+        Query: {message}
+        
+        Provide the response in the following strict JSON format:
+        {{
+            "response_type": "explanation/guidance/resource",
+            "main_points": [
+                "Key point 1",
+                "Key point 2",
+                "Key point 3"
+            ],
+            "detailed_explanation": "Comprehensive explanation of the topic",
+            "learning_resources": [
+                {{
+                    "title": "Resource title",
+                    "url": "https://example.com/resource",
+                    "type": "tutorial/documentation/video"
+                }}
+            ],
+            "recommended_next_steps": [
+                "Step 1 to learn more",
+                "Step 2 to improve understanding"
+            ]
+        }}
+
+        Ensure:
+        1. Explain underlying concepts
+        2. Provide clear, concise guidance
+        3. Avoid direct code solutions
+        4. Include learning resources
+        """, schema=ResponseSchema({
+            "response_type": str,
+            "main_points": list,
+            "detailed_explanation": str,
+            "learning_resources": list,
+            "recommended_next_steps": list
+        }))
@@ -0,0 +1,185 @@
+from .registry import prompt_registry
+from ..utils.schemas import ResponseSchema
+
+# Prompt for generating incomplete code
+INCOMPLETE_CODE = prompt_registry.register("coding_challenge.incomplete_code", """
+        Generate an incomplete code snippet with the following specifications:
+        Objective: {objective}
+        Description: {description}
+        Language: {language}
+        Difficulty: {difficulty}
+        
+        Provide the response in the following strict JSON format:
+        {{
+            "language": "{language}",
+            "code": "Incomplete code with placeholders/missing parts",
+            "missing_parts": [
+                {{
+                    "location": "line or section",
+                    "hint": "Guidance for completing the code",
+                    "difficulty": "{difficulty}"
+                }}
+            ],
+            "learning_goals": [
+                "Specific skill to learn",
+                "Concept to understand"
+            ]
+        }}
+        
+        Ensure:
+        1. Code is syntactically valid but incomplete
+        2. Provide clear hints for completion
+        3. Align with the given objective
+        4. Match the specified language and difficulty
+        """, schema=ResponseSchema({
+            "language": str,
+            "code": str,
+            "missing_parts": [dict],
+            "learning_goals": list
+        }))
+
+# Prompt for generating output-based challenge
+OUTPUT_CHALLENGE = prompt_registry.register("coding_challenge.output_challenge", """
+        Create an output-based coding challenge with the following specifications:
+        Objective: {objective}
+        Description: {description}
+        Language: {language}
+        Difficulty: {difficulty}
+        
+        Provide the response in the following strict JSON format:
+        {{
+            "language": "{language}",
+            "expected_output": "Specific output to be generated",
+            "input_description": "Description of input parameters or context",
+            "challenge_details": {{
+                "difficulty": "{difficulty}",
+                "key_concepts": [
+                    "Concept 1 to demonstrate",
+                    "Concept 2 to understand"
+                ]
+            }},
+            "test_cases": [
+                {{
+                    "input": "Sample input",
+                    "expected_output": "Corresponding expected output"
+                }}
+            ]
+        }}
+        
+        Ensure:
+        1. Clear and specific expected output
+        2. Meaningful test cases
+        3. Align with the given objective
+        4. Match the specified language and difficulty
+        """, schema=ResponseSchema({
+            "language": str,
+            "expected_output": str,
+            "input_description": str,
+            "challenge_details": dict,
+            "test_cases": [dict]
+        }))
+
+# Prompt for generating problem-solving challenge
+PROBLEM_SOLVING = prompt_registry.register("coding_challenge.problem_solving", """
+        Create a comprehensive problem-solving coding challenge with the following specifications:
+        Objective: {objective}
+        Description: {description}
+        Language: {language}
+        Difficulty: {difficulty}
+        
+        Provide the response in the following strict JSON format:
+        {{
+            "language": "{language}",
+            "problem_statement": "Detailed description of the coding problem",
+            "challenge_details": {{
+                "difficulty": "{difficulty}",
+                "key_concepts": [
+                    "Concept 1 to demonstrate",
+                    "Concept 2 to understand"
+                ],
+                "constraints": [
+                    "Specific coding or algorithmic constraints"
+                ]
+            }},
+            "input_specification": {{
+                "parameters": [
+                    {{
+                        "name": "parameter_name",
+                        "type": "parameter_type",
+                        "description": "Parameter description"
+                    }}
+                ]
+            }},
+            "output_specification": {{
+                "type": "return_type",
+                "description": "Description of expected output"
+            }},
+            "example_cases": [
+                {{
+                    "input": "Sample input",
+                    "output": "Corresponding output",
+                    "explanation": "Explanation of the example"
+                }}
+            ]
+        }}
+        
+        Ensure:
+        1. Comprehensive and clear problem statement
+        2. Meaningful constraints and specifications
+        3. Illustrative example cases
+        4. Align with the given objective
+        5. Match the specified language and difficulty
+        """, schema=ResponseSchema({
+            "language": str,
+            "problem_statement": str,
+            "challenge_details": dict,
+            "input_specification": dict,
+            "output_specification": dict,
+            "example_cases": [dict]
+        }))
+
+# Prompt for generating solution guidance
+SOLUTION_GUIDANCE = prompt_registry.register("coding_challenge.solution_guidance", """
+        Provide comprehensive guidance for the following {language} code solution 
+        in the context of a {challenge_type} challenge:
+        
+        Code:
+        {code}
+        
+        Provide the response in the following strict JSON format:
+        {{
+            "overall_assessment": {{
+                "strengths": ["Strength 1", "Strength 2"],
+                "areas_for_improvement": ["Improvement 1", "Improvement 2"]
+            }},
+            "learning_insights": [
+                {{
+                    "concept": "Specific programming concept",
+                    "explanation": "Detailed explanation of the concept",
+                    "resources": [
+                        {{
+                            "title": "Resource title",
+                            "url": "https://example.com/resource"
+                        }}
+                    ]
+                }}
+            ],
+            "alternative_approaches": [
+                {{
+                    "description": "Alternative solution approach",
+                    "pros": ["Advantage 1", "Advantage 2"],
+                    "cons": ["Limitation 1", "Limitation 2"]
+                }}
+            ]
+        }}
+        
+        Ensure:
+        1. Constructive and specific feedback
+        2. Actionable learning insights
+        3. Alternative solution approaches
+        4. Relevant learning resources
+        """, schema=ResponseSchema({
+            "overall_assessment": dict,
+            "learning_insights": [dict],
+            "alternative_approaches": [dict]
+        }))
@@ -0,0 +1,109 @@
+from .registry import prompt_registry
+from ..utils.schemas import ResponseSchema
+
+# Prompt for generating quiz questions with explicit JSON formatting
+GENERATE_QUIZ = prompt_registry.register("quiz.generate", """
+        Generate a comprehensive {language} programming quiz with 20 questions 
+        that test knowledge from beginner to advanced levels. 
+        
+        Provide the response in the following strict JSON format:
+        {{
+            "questions": [
+                {{
+                    "text": "Question text here",
+                    "options": ["Option A", "Option B", "Option C", "Option D"],
+                    "correct_answer": "Correct option",
+                    "difficulty": "beginner/moderate/advanced",
+                    "topic": "Short name of the concept tested, e.g. closures",
+                    "explanation": "Brief explanation of the correct answer"
+                }},
+                ... (19 more questions)
+            ]
+        }}
+
+        Ensure:
+        1. Exactly 20 questions
+        2. Four multiple-choice options for each question
+        3. Clear, concise language
+        4. Varied difficulty levels
+        5. Relevant to {language} programming
+        """, schema=ResponseSchema({"questions": [dict]}))
+
+# Prompt for one difficulty band of a sharded quiz; several run concurrently
+GENERATE_QUIZ_SHARD = prompt_registry.register("quiz.generate_shard", """
+        Generate {count} {difficulty} level {language} programming quiz questions.
+        {avoid}
+        
+        Provide the response in the following strict JSON format:
+        {{
+            "questions": [
+                {{
+                    "text": "Question text here",
+                    "options": ["Option A", "Option B", "Option C", "Option D"],
+                    "correct_answer": "Correct option",
+                    "difficulty": "{difficulty}",
+                    "topic": "Short name of the concept tested, e.g. closures",
+                    "explanation": "Brief explanation of the correct answer"
+                }}
+            ]
+        }}
+
+        Ensure:
+        1. Exactly {count} questions
+        2. Four multiple-choice options for each question
+        3. Clear, concise language
+        4. Distinct topics; no two questions test the same fact
+        5. Relevant to {language} programming
+        """, schema=ResponseSchema({"questions": [dict]}))
+
+# Prompt for explaining wrong answers after local scoring
+ENRICH_FEEDBACK = prompt_registry.register("quiz.enrich_feedback", """
+        A learner answered the following {language} quiz questions incorrectly:
+        {items}
+        
+        For each item explain why the learner's answer is wrong and why the correct answer is right.
+        Provide the response in the following strict JSON format:
+        {{
+            "feedback": [
+                {{
+                    "index": 0,
+                    "explanation": "Explanation addressing the learner's answer"
+                }}
+            ]
+        }}
+        """, schema=ResponseSchema({"feedback": [dict]}))
+
+# Prompt for evaluating quiz responses with explicit JSON formatting
+EVALUATE_QUIZ = prompt_registry.register("quiz.evaluate", """
+        Evaluate the following {language} programming quiz responses:
+        Responses: {responses}
+        
+        Provide the evaluation in the following strict JSON format:
+        {{
+            "total_questions": 20,
+            "correct_answers": 0,
+            "score_percentage": 0.0,
+            "skill_level": "beginner/moderate/advanced",
+            "detailed_feedback": [
+                {{
+                    "question": "Question text",
+                    "user_answer": "User's answer",
+                    "correct_answer": "Correct answer",
+                    "is_correct": true/false,
+                    "explanation": "Detailed explanation"
+                }},
+                ... (more detailed feedback)
+            ]
+        }}
+        
+        Ensure:
+        1. Accurate scoring
+        2. Detailed feedback for each question
+        3. Clear skill level assessment
+        """, schema=ResponseSchema({
+            "total_questions": int,
+            "correct_answers": int,
+            "score_percentage": float,
+            "skill_level": str,
+            "detailed_feedback": [dict]
+        }))
@@ -0,0 +1,77 @@
+import string
+from typing import Dict, Any, Iterator, FrozenSet, Optional
+from ..utils.prompt_compaction import compact_template
+from ..utils.schemas import ResponseSchema
+
+
+class PromptSpec:
+    """A prompt template declared once with named variables"""
+
+    def __init__(self, name: str, template: str, json_mode: bool = True, schema: Optional[ResponseSchema] = None):
+        self.name = name
+        self.raw_template = template
+        # Compact the template once; the source indentation is not sent to the model
+        self.template = compact_template(template)
+        self.json_mode = json_mode
+        self.schema = schema
+        # Parse the template once; rendering is then plain str.format
+        self.input_variables: FrozenSet[str] = frozenset(
+            field for _, field, _, _ in string.Formatter().parse(template) if field
+        )
+
+    def render(self, variables: Dict[str, Any]) -> str:
+        """
+        Substitute variables into the template.
+
+        Args:
+            variables: Values for every input variable
+
+        Returns:
+            The rendered prompt text
+        """
+        missing = self.input_variables - variables.keys()
+        if missing:
+            raise ValueError(f"Missing variables for prompt '{self.name}': {', '.join(sorted(missing))}")
+        return self.template.format(**variables)
+
+
+class PromptRegistry:
+    """Registry of every service prompt, keyed by name"""
+
+    def __init__(self):
+        self._prompts: Dict[str, PromptSpec] = {}
+
+    def register(self, name: str, template: str, json_mode: bool = True, schema: Optional[ResponseSchema] = None) -> PromptSpec:
+        """
+        Declare a prompt.
+
+        Args:
+            name: Unique prompt name, e.g. "quiz.generate"
+            template: str.format template; literal braces are doubled
+            json_mode: Whether the prompt expects a JSON response
+            schema: Fields the JSON response must contain
+
+        Returns:
+            The registered PromptSpec
+        """
+        if name in self._prompts:
+            raise ValueError(f"Prompt '{name}' is already registered")
+        spec = PromptSpec(name, template, json_mode, schema)
+        self._prompts[name] = spec
+        return spec
+
+    def get(self, name: str) -> PromptSpec:
+        try:
+            return self._prompts[name]
+        except KeyError:
+            raise ValueError(f"Unknown prompt: {name}")
+
+    def __iter__(self) -> Iterator[PromptSpec]:
+        return iter(self._prompts.values())
+
+    def __len__(self) -> int:
+        return len(self._prompts)
+
+
+# Registry shared by all services
+prompt_registry = PromptRegistry()
@@ -0,0 +1,14 @@
+from .registry import prompt_registry
+
+# Prompt asking only for the fields a generated response is missing or got wrong
+REPAIR_RESPONSE = prompt_registry.register("response.repair", """
+        A JSON response was generated for the following request:
+        {request}
+        
+        The response so far:
+        {response}
+        
+        These fields are missing or invalid. Provide only them, consistent with the
+        rest of the response, in the following strict JSON format:
+        {fields}
+        """)
@@ -0,0 +1,128 @@
+import hmac
+import os
+from typing import Any, Dict, Optional, Tuple
+from flask import Blueprint, Flask, g, jsonify, request
+from ..utils.profiling import RequestProfiler
+from ..utils.tracing import FlightRecorder, Trace, begin_trace, current_trace, end_trace
+
+# Create a Blueprint for admin routes
+admin_bp = Blueprint('admin', __name__)
+
+# Global flight recorder and profiler (can be initialized in the main app)
+flight_recorder: Optional[FlightRecorder] = None
+request_profiler: Optional[RequestProfiler] = None
+
+TRACE_HEADER = "X-Trace-Id"
+
+def init_admin(recorder: Optional[FlightRecorder], profiler: Optional[RequestProfiler]):
+    """Initialize the global flight recorder and request profiler"""
+    global flight_recorder, request_profiler
+    flight_recorder = recorder
+    request_profiler = profiler
+
+def admin_denied(token: Optional[str]) -> Optional[Tuple[Dict[str, Any], int]]:
+    """
+    Check the X-Admin-Token header against ADMIN_TOKEN.
+
+    Returns:
+        None when access is granted, otherwise the error payload and status:
+        404 while ADMIN_TOKEN is unset (the endpoints do not exist), 403 for
+        a missing or wrong token
+    """
+    expected = os.getenv("ADMIN_TOKEN")
+    if not expected:
+        return {"error": "Not found"}, 404
+    if not token or not hmac.compare_digest(token.encode("utf-8"), expected.encode("utf-8")):
+        return {"error": "Invalid admin token"}, 403
+    return None
+
+def slow_requests(limit: Optional[str]) -> Tuple[Dict[str, Any], int]:
+    """Recorded slow request traces, most recent first"""
+    if flight_recorder is None:
+        return {"error": "Slow request tracing is disabled"}, 404
+    try:
+        limit = int(limit) if limit else None
+    except ValueError:
+        return {"error": "limit must be an integer"}, 400
+    return {**flight_recorder.stats(), "requests": flight_recorder.recent(limit)}, 200
+
+def profile_status() -> Tuple[Dict[str, Any], int]:
+    """Profiler state and the captured profiles"""
+    if request_profiler is None:
+        return {"error": "Profiler not initialized"}, 500
+    return {**request_profiler.status(), "results": request_profiler.captures()}, 200
+
+def arm_profiler(data: Any) -> Tuple[Dict[str, Any], int]:
+    """Arm the profiler from a {"requests", "mode", "sample_rate"} body"""
+    if request_profiler is None:
+        return {"error": "Profiler not initialized"}, 500
+    if not isinstance(data, dict) or 'requests' not in data:
+        return {"error": "requests is required"}, 400
+    try:
+        status = request_profiler.arm(
+            int(data['requests']),
+            mode=data.get('mode', 'cpu'),
+            sample_rate=float(data.get('sample_rate', 1.0))
+        )
+    except (TypeError, ValueError) as e:
+        return {"error": str(e)}, 400
+    return status, 200
+
+@admin_bp.route('/slow-requests', methods=['GET'])
+def get_slow_requests():
+    """Return the traces of requests slower than SLOW_REQUEST_THRESHOLD_MS"""
+    denied = admin_denied(request.headers.get('X-Admin-Token'))
+    if denied:
+        return jsonify(denied[0]), denied[1]
+    payload, status = slow_requests(request.args.get('limit'))
+    return jsonify(payload), status
+
+@admin_bp.route('/profile', methods=['POST'])
+def start_profile():
+    """Profile the next N requests"""
+    denied = admin_denied(request.headers.get('X-Admin-Token'))
+    if denied:
+        return jsonify(denied[0]), denied[1]
+    payload, status = arm_profiler(request.get_json(silent=True))
+    return jsonify(payload), status
+
+@admin_bp.route('/profile', methods=['GET'])
+def get_profile():
+    """Return the profiler state and captured profiles"""
+    denied = admin_denied(request.headers.get('X-Admin-Token'))
+    if denied:
+        return jsonify(denied[0]), denied[1]
+    payload, status = profile_status()
+    return jsonify(payload), status
+
+def init_request_tracing(app: Flask) -> None:
+    """Trace every request, keep slow ones and profile them when armed"""
+
+    @app.before_request
+    def start_trace():
+        route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+        begin_trace(Trace(request.method, route, request.path))
+        if request_profiler is not None:
+            g.profile = request_profiler.capture(request.method, route)
+            g.profile.__enter__()
+
+    @app.after_request
+    def add_trace_header(response):
+        trace = current_trace()
+        if trace is not None:
+            trace.status = response.status_code
+            response.headers[TRACE_HEADER] = trace.id
+        return response
+
+    @app.teardown_request
+    def finish_trace(exc):
+        profile = g.pop('profile', None)
+        if profile is not None:
+            profile.__exit__(None, None, None)
+        trace = end_trace()
+        if trace is None:
+            return
+        # Unhandled exceptions never reach after_request
+        trace.finish(trace.status or 500)
+        if flight_recorder is not None:
+            flight_recorder.record(trace)
@@ -0,0 +1,503 @@
+import os
+import time
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Match, Route
+from ..factories.llm_factory import LLMFactory
+from ..utils.fanout import afan_out
+from ..utils.response_cache import no_cache
+from ..services.quiz_store import UnknownQuizError
+from ..utils.sse import format_sse, SSE_HEADERS
+from ..utils.llm_errors import LLMUnavailableError, DeadlineExceededError
+from ..utils.resilience import deadline
+from ..utils.scheduler import priority, aprioritized, PRIORITY_INTERACTIVE, PRIORITY_BACKGROUND
+from ..utils.metrics import registry, CONTENT_TYPE, HTTP_REQUESTS, HTTP_REQUEST_DURATION, HTTP_REQUESTS_IN_FLIGHT
+from ..utils.tracing import Trace, request_trace
+from . import llm_routes, quiz_routes, code_review_routes, coding_challenge_routes, admin_routes, job_routes
+from .health_routes import health_status
+
+# Async counterparts of the Flask blueprints. They share the service
+# instances created by the init_* functions, so the quiz pool, answer store
+# and response cache are the same in both serving modes.
+
+
+async def _json_body(request: Request):
+    """Return the parsed JSON body, or None when it is missing or invalid"""
+    try:
+        return await request.json()
+    except ValueError:
+        return None
+
+
+def _error(message: str, status: int) -> JSONResponse:
+    return JSONResponse({"error": message}, status_code=status)
+
+
+def _exception_error(e: Exception) -> JSONResponse:
+    """Counterpart of errors.error_response for the ASGI app"""
+    if isinstance(e, LLMUnavailableError):
+        return JSONResponse({"error": str(e)}, status_code=e.status_code, headers={"Retry-After": str(e.retry_after)})
+    return _error(str(e), 500)
+
+
+@deadline("generate")
+async def generate(request: Request):
+    """Generate text from prompt"""
+    llm_service = llm_routes.llm_service
+    if not llm_service:
+        return _error("LLM service not initialized", 500)
+
+    data = await _json_body(request)
+    if not data or 'prompt' not in data:
+        return _error("Prompt is required", 400)
+    use_cache = data.get('cache', True)
+    if not isinstance(use_cache, bool):
+        return _error("cache must be a boolean", 400)
+
+    if data.get('stream'):
+        return StreamingResponse(
+            _stream_tokens(llm_service, data['prompt'], data.get('template'), use_cache),
+            media_type='text/event-stream',
+            headers=SSE_HEADERS
+        )
+
+    try:
+        response = await llm_service.agenerate_response(
+            data['prompt'], data.get('template'), use_cache=use_cache
+        )
+        return JSONResponse({"response": response})
+    except Exception as e:
+        return _exception_error(e)
+
+
+async def _stream_tokens(llm_service, prompt, template, use_cache):
+    """Yield SSE messages for each generated chunk, then the full response"""
+    chunks = []
+    try:
+        async for chunk in llm_service.astream_response(prompt, template, use_cache=use_cache):
+            chunks.append(chunk)
+            yield format_sse("token", {"text": chunk})
+        yield format_sse("done", {"response": "".join(chunks)})
+    except Exception as e:
+        yield format_sse("error", {"error": str(e)})
+
+
+async def update_llm(request: Request):
+    """Update the LLM instance"""
+    llm_service = llm_routes.llm_service
+    if not llm_service:
+        return _error("LLM service not initialized", 500)
+
+    data = await _json_body(request)
+    if not data or 'llm_type' not in data:
+        return _error("LLM type is required", 400)
+
+    try:
+        new_llm = LLMFactory.create_llm(data['llm_type'], **data.get('kwargs', {}))
+        llm_service.update_llm(new_llm)
+        return JSONResponse({"message": f"LLM updated to {data['llm_type']}"})
+    except Exception as e:
+        return _error(str(e), 500)
+
+
+async def stats(request: Request):
+    """Return LLM service statistics such as cache hit/miss counters"""
+    if not llm_routes.llm_service:
+        return _error("LLM service not initialized", 500)
+    return JSONResponse(llm_routes.llm_service.stats())
+
+
+@priority(PRIORITY_BACKGROUND)
+@deadline("quiz.generate")
+async def generate_quiz(request: Request):
+    """Generate a quiz for a specific programming language"""
+    language = request.query_params.get('language')
+    if not language:
+        return _error("Language parameter is required", 400)
+
+    try:
+        quiz = await quiz_routes.quiz_service.agenerate_language_quiz(language)
+        return JSONResponse(quiz)
+    except Exception as e:
+        return _exception_error(e)
+
+
+@no_cache
+@deadline("quiz.evaluate")
+async def evaluate_quiz(request: Request):
+    """Evaluate user's quiz responses"""
+    data = await _json_body(request)
+    if not data or 'responses' not in data or not (data.get('language') or data.get('quiz_id')):
+        return _error("Language or quiz_id, and responses are required", 400)
+
+    try:
+        evaluation = await quiz_routes.quiz_service.aevaluate_quiz(
+            data.get('language'),
+            data['responses'],
+            quiz_id=data.get('quiz_id'),
+            enrich_feedback=data.get('enrich_feedback', False)
+        )
+        return JSONResponse(evaluation)
+    except UnknownQuizError as e:
+        return _error(str(e), 404)
+    except Exception as e:
+        return _exception_error(e)
+
+
+async def quiz_pool_stats(request: Request):
+    """Return pool depth, refill latency and miss rate per language"""
+    quiz_service = quiz_routes.quiz_service
+    if not quiz_service or quiz_service.pool is None:
+        return _error("Quiz pool is not enabled", 404)
+    return JSONResponse(quiz_service.pool.stats())
+
+
+async def question_bank_stats(request: Request):
+    """Return banked questions per language and difficulty, and growth counters"""
+    quiz_service = quiz_routes.quiz_service
+    if not quiz_service or quiz_service.bank is None:
+        return _error("Question bank is not enabled", 404)
+    return JSONResponse(quiz_service.bank.stats())
+
+
+@deadline("code.review")
+async def review_code(request: Request):
+    """Review submitted code and provide guidance"""
+    data = await _json_body(request)
+    if not data or 'code' not in data or 'language' not in data:
+        return _error("Code and language are required", 400)
+
+    try:
+        review = await code_review_routes.code_review_service.areview_code(
+            data['code'], data['language'], session_id=data.get('session_id')
+        )
+        return JSONResponse(review)
+    except Exception as e:
+        return _exception_error(e)
+
+
+@priority(PRIORITY_BACKGROUND)
+@deadline("code.review_batch")
+async def review_code_batch(request: Request):
+    """Review many code submissions in one request"""
+    data = await _json_body(request)
+    error = code_review_routes.validate_batch(data)
+    if error:
+        return _error(error, 400)
+
+    try:
+        results = await code_review_routes.code_review_service.areview_code_batch(
+            data['items'],
+            max_concurrency=int(os.getenv('CODE_REVIEW_BATCH_CONCURRENCY', 8))
+        )
+        return JSONResponse({"results": results})
+    except Exception as e:
+        return _exception_error(e)
+
+
+@priority(PRIORITY_INTERACTIVE)
+@deadline("code.chat")
+async def code_chat(request: Request):
+    """Provide coding-related chat assistance"""
+    data = await _json_body(request)
+    if not data or 'message' not in data:
+        return _error("Message is required", 400)
+
+    if data.get('stream'):
+        events = aprioritized(
+            PRIORITY_INTERACTIVE, code_review_routes.code_review_service.astream_chat_response(data['message'])
+        )
+        return StreamingResponse(
+            (format_sse(event, payload) async for event, payload in events),
+            media_type='text/event-stream',
+            headers=SSE_HEADERS
+        )
+
+    try:
+        response = await code_review_routes.code_review_service.aget_chat_response(data['message'])
+        return JSONResponse(response)
+    except Exception as e:
+        return _exception_error(e)
+
+
+async def chat_cache_stats(request: Request):
+    """Return hit rate, size and evictions of the semantic chat cache"""
+    code_review_service = code_review_routes.code_review_service
+    if not code_review_service or code_review_service.semantic_cache is None:
+        return _error("Semantic chat cache is not enabled", 404)
+    return JSONResponse(code_review_service.semantic_cache.stats())
+
+
+async def _challenge_request(request: Request):
+    """Validate a challenge generation request and return its arguments"""
+    data = await _json_body(request)
+    if not data or 'objective' not in data or 'description' not in data:
+        return None
+    return {
+        "objective": data['objective'],
+        "description": data['description'],
+        "language": data.get('language', 'Python'),
+        "difficulty": data.get('difficulty', 'moderate')
+    }
+
+
+@deadline("challenge")
+async def generate_incomplete_code(request: Request):
+    """Generate incomplete code for a specific objective"""
+    params = await _challenge_request(request)
+    if params is None:
+        return _error("Objective and description are required", 400)
+
+    try:
+        incomplete_code = await coding_challenge_routes.coding_challenge_service.agenerate_incomplete_code(**params)
+        code_review = await coding_challenge_routes.code_review_service.areview_code(
+            code=incomplete_code['code'],
+            language=incomplete_code['language']
+        )
+        return JSONResponse({
+            "incomplete_code": incomplete_code,
+            "initial_review": code_review
+        })
+    except Exception as e:
+        return _exception_error(e)
+
+
+@deadline("challenge")
+async def generate_output_challenge(request: Request):
+    """Generate output-based coding challenge"""
+    params = await _challenge_request(request)
+    if params is None:
+        return _error("Objective and description are required", 400)
+
+    try:
+        output_challenge = await coding_challenge_routes.coding_challenge_service.agenerate_output_challenge(**params)
+        return JSONResponse(output_challenge)
+    except Exception as e:
+        return _exception_error(e)
+
+
+@deadline("challenge")
+async def generate_problem_solving_challenge(request: Request):
+    """Generate problem-solving coding challenge"""
+    params = await _challenge_request(request)
+    if params is None:
+        return _error("Objective and description are required", 400)
+
+    try:
+        problem_challenge = await coding_challenge_routes.coding_challenge_service.agenerate_problem_solving_challenge(**params)
+        return JSONResponse(problem_challenge)
+    except Exception as e:
+        return _exception_error(e)
+
+
+@deadline("challenge")
+async def submit_solution(request: Request):
+    """Submit and review a solution to a coding challenge"""
+    data = await _json_body(request)
+    if not data or 'code' not in data or 'language' not in data or 'challenge_type' not in data:
+        return _error("Code, language, and challenge type are required", 400)
+
+    try:
+        # Review the solution and generate guidance concurrently
+        outcome = await afan_out({
+            "code_review": lambda: coding_challenge_routes.code_review_service.areview_code(
+                code=data['code'],
+                language=data['language'],
+                session_id=data.get('session_id')
+            ),
+            "guidance": lambda: coding_challenge_routes.coding_challenge_service.agenerate_solution_guidance(
+                code=data['code'],
+                language=data['language'],
+                challenge_type=data['challenge_type']
+            )
+        }, deadline=float(os.getenv('SUBMIT_SOLUTION_DEADLINE', 60)))
+
+        if not outcome.results:
+            rejected = [e for e in outcome.exceptions.values() if isinstance(e, LLMUnavailableError)]
+            if rejected:
+                return _exception_error(rejected[0])
+            if len(outcome.timed_out) == len(outcome.errors):
+                return _exception_error(DeadlineExceededError("; ".join(outcome.errors.values())))
+            return _error("; ".join(outcome.errors.values()), 500)
+
+        response = {
+            "code_review": outcome.results.get("code_review"),
+            "guidance": outcome.results.get("guidance")
+        }
+        if outcome.errors:
+            response["errors"] = outcome.errors
+        return JSONResponse(response)
+    except Exception as e:
+        return _exception_error(e)
+
+
+async def health(request: Request):
+    """Liveness and readiness probe used by the Docker healthcheck"""
+    payload, status = health_status()
+    return JSONResponse(payload, status_code=status)
+
+
+async def metrics(request: Request):
+    """Expose request and LLM call metrics in the Prometheus text format"""
+    return Response(registry.render(), headers={"Content-Type": CONTENT_TYPE})
+
+
+
+async def challenge_store_stats(request: Request):
+    """Return hit, miss and error counters of the generated challenge store"""
+    service = coding_challenge_routes.coding_challenge_service
+    if not service or service.store is None:
+        return _error("Challenge store is not enabled", 404)
+    return JSONResponse(service.store.stats())
+
+
+async def create_job(request: Request):
+    """Run a long generation in the background and return its job id immediately"""
+    payload, status = job_routes.submit_job(await _json_body(request))
+    headers = {}
+    if status == 202:
+        headers["Location"] = payload["status_url"]
+    elif "retry_after" in payload:
+        headers["Retry-After"] = str(payload["retry_after"])
+    return JSONResponse(payload, status_code=status, headers=headers)
+
+
+async def get_job(request: Request):
+    """Poll a job for its status and result"""
+    payload, status = job_routes.job_status(request.path_params["job_id"])
+    return JSONResponse(payload, status_code=status)
+
+
+async def job_stats(request: Request):
+    """Return queue depth, job counters and queue and run latency"""
+    if job_routes.job_queue is None:
+        return _error("Job queue is not enabled", 404)
+    return JSONResponse(job_routes.job_queue.stats())
+
+async def get_slow_requests(request: Request):
+    """Return the traces of requests slower than SLOW_REQUEST_THRESHOLD_MS"""
+    denied = admin_routes.admin_denied(request.headers.get('X-Admin-Token'))
+    if denied:
+        return JSONResponse(denied[0], status_code=denied[1])
+    payload, status = admin_routes.slow_requests(request.query_params.get('limit'))
+    return JSONResponse(payload, status_code=status)
+
+
+async def start_profile(request: Request):
+    """Profile the next N requests"""
+    denied = admin_routes.admin_denied(request.headers.get('X-Admin-Token'))
+    if denied:
+        return JSONResponse(denied[0], status_code=denied[1])
+    payload, status = admin_routes.arm_profiler(await _json_body(request))
+    return JSONResponse(payload, status_code=status)
+
+
+async def get_profile(request: Request):
+    """Return the profiler state and captured profiles"""
+    denied = admin_routes.admin_denied(request.headers.get('X-Admin-Token'))
+    if denied:
+        return JSONResponse(denied[0], status_code=denied[1])
+    payload, status = admin_routes.profile_status()
+    return JSONResponse(payload, status_code=status)
+
+asgi_routes = [
+    Route('/admin/slow-requests', get_slow_requests, methods=['GET']),
+    Route('/admin/profile', start_profile, methods=['POST']),
+    Route('/admin/profile', get_profile, methods=['GET']),
+    Route('/health', health, methods=['GET']),
+    Route('/metrics', metrics, methods=['GET']),
+    Route('/generate', generate, methods=['POST']),
+    Route('/update_llm', update_llm, methods=['POST']),
+    Route('/stats', stats, methods=['GET']),
+    Route('/quiz/generate', generate_quiz, methods=['GET']),
+    Route('/quiz/evaluate', evaluate_quiz, methods=['POST']),
+    Route('/quiz/pool/stats', quiz_pool_stats, methods=['GET']),
+    Route('/quiz/bank/stats', question_bank_stats, methods=['GET']),
+    Route('/code/review', review_code, methods=['POST']),
+    Route('/code/review/batch', review_code_batch, methods=['POST']),
+    Route('/code/chat', code_chat, methods=['POST']),
+    Route('/code/chat/cache/stats', chat_cache_stats, methods=['GET']),
+    Route('/challenge/incomplete-code', generate_incomplete_code, methods=['POST']),
+    Route('/challenge/output-based', generate_output_challenge, methods=['POST']),
+    Route('/challenge/problem-solving', generate_problem_solving_challenge, methods=['POST']),
+    Route('/challenge/submit-solution', submit_solution, methods=['POST']),
+    Route('/challenge/store/stats', challenge_store_stats, methods=['GET']),
+    Route('/jobs', create_job, methods=['POST']),
+    Route('/jobs/stats', job_stats, methods=['GET']),
+    Route('/jobs/{job_id}', get_job, methods=['GET']),
+]
+
+
+class RequestMetricsMiddleware:
+    """Counterpart of health_routes.init_request_metrics for the ASGI app"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        route = next((candidate.path for candidate in asgi_routes
+                      if candidate.matches(scope)[0] != Match.NONE), "unmatched")
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        HTTP_REQUESTS_IN_FLIGHT.inc(route=route)
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_REQUESTS_IN_FLIGHT.dec(route=route)
+            HTTP_REQUEST_DURATION.observe(time.perf_counter() - started, method=scope["method"], route=route)
+            HTTP_REQUESTS.inc(method=scope["method"], route=route, status=status)
+
+
+class RequestTracingMiddleware:
+    """
+    Counterpart of admin_routes.init_request_tracing for the ASGI app.
+
+    cProfile follows the event loop thread, so a CPU capture also includes
+    other requests' coroutines that ran while the profiled one awaited.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        route = next((candidate.path for candidate in asgi_routes
+                      if candidate.matches(scope)[0] != Match.NONE), "unmatched")
+        trace = Trace(scope["method"], route, scope["path"])
+        status = 500
+
+        async def send_with_trace_id(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((admin_routes.TRACE_HEADER.lower().encode("latin-1"), trace.id.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        profiler = admin_routes.request_profiler
+        try:
+            with request_trace(trace):
+                if profiler is None:
+                    await self.app(scope, receive, send_with_trace_id)
+                else:
+                    with profiler.capture(scope["method"], route):
+                        await self.app(scope, receive, send_with_trace_id)
+        finally:
+            trace.finish(status)
+            if admin_routes.flight_recorder is not None:
+                admin_routes.flight_recorder.record(trace)
@@ -1,6 +1,12 @@
-from flask import Blueprint, request, jsonify
+import os
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 from ..services.code_review_service import CodeReviewService
+from ..utils.semantic_cache import SemanticCache
 from ..factories.llm_factory import LLMFactory
+from ..utils.sse import format_sse, SSE_HEADERS
+from ..utils.scheduler import priority, prioritized, PRIORITY_INTERACTIVE, PRIORITY_BACKGROUND
+from ..utils.resilience import deadline
+from .errors import error_response
 
 # Create a Blueprint for code review routes
 code_review_bp = Blueprint('code_review', __name__)
@@ -8,12 +14,13 @@ code_review_bp = Blueprint('code_review', __name__)
 # Global Code Review service 
 code_review_service = None
 
-def init_code_review_service(llm_service):
+def init_code_review_service(llm_service, review_history=None):
     """Initialize the global Code Review service"""
     global code_review_service
-    code_review_service = CodeReviewService(llm_service)
+    code_review_service = CodeReviewService(llm_service, review_history, SemanticCache.from_env())
 
 @code_review_bp.route('/review', methods=['POST'])
+@deadline("code.review")
 def review_code():
     """Review submitted code and provide guidance"""
     data = request.json
@@ -25,13 +32,49 @@ def review_code():
         # Review code and get guidance
         review = code_review_service.review_code(
             data['code'], 
-            data['language']
+            data['language'],
+            session_id=data.get('session_id')
         )
         return jsonify(review)
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        return error_response(e)
+
+def validate_batch(data):
+    """Return the error message for an invalid batch review request, or None"""
+    if not data or not isinstance(data.get('items'), list) or not data['items']:
+        return "A non-empty list of items is required"
+    max_items = int(os.getenv('CODE_REVIEW_BATCH_MAX_ITEMS', 100))
+    if len(data['items']) > max_items:
+        return f"At most {max_items} items are allowed per batch"
+    for index, item in enumerate(data['items']):
+        if not isinstance(item, dict) or 'code' not in item or 'language' not in item:
+            return f"Item {index}: code and language are required"
+    return None
+
+@code_review_bp.route('/review/batch', methods=['POST'])
+@deadline("code.review_batch")
+@priority(PRIORITY_BACKGROUND)
+def review_code_batch():
+    """Review many code submissions in one request"""
+    data = request.json
+    
+    error = validate_batch(data)
+    if error:
+        return jsonify({"error": error}), 400
+    
+    try:
+        # Review all items through the model's batch API
+        results = code_review_service.review_code_batch(
+            data['items'],
+            max_concurrency=int(os.getenv('CODE_REVIEW_BATCH_CONCURRENCY', 8))
+        )
+        return jsonify({"results": results})
+    except Exception as e:
+        return error_response(e)
 
 @code_review_bp.route('/chat', methods=['POST'])
+@deadline("code.chat")
+@priority(PRIORITY_INTERACTIVE)
 def code_chat():
     """Provide coding-related chat assistance"""
     data = request.json
@@ -39,6 +82,15 @@ def code_chat():
     if not data or 'message' not in data:
         return jsonify({"error": "Message is required"}), 400
     
+    if data.get('stream'):
+        # Forward each field over SSE as soon as it is parsed
+        events = prioritized(PRIORITY_INTERACTIVE, code_review_service.stream_chat_response(data['message']))
+        return Response(
+            stream_with_context(format_sse(event, payload) for event, payload in events),
+            mimetype='text/event-stream',
+            headers=SSE_HEADERS
+        )
+    
     try:
         # Get chat response
         response = code_review_service.get_chat_response(
@@ -46,4 +98,11 @@ def code_chat():
         )
         return jsonify(response)
     except Exception as e:
-        return jsonify({"error": str(e)}), 500 
\ No newline at end of file
+        return error_response(e)
+
+@code_review_bp.route('/chat/cache/stats', methods=['GET'])
+def chat_cache_stats():
+    """Return hit rate, size and evictions of the semantic chat cache"""
+    if not code_review_service or code_review_service.semantic_cache is None:
+        return jsonify({"error": "Semantic chat cache is not enabled"}), 404
+    return jsonify(code_review_service.semantic_cache.stats())
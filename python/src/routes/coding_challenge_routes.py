@@ -1,7 +1,13 @@
 import json
+import os
+from typing import Dict, Any
 from flask import Blueprint, request, jsonify
 from ..services.coding_challenge_service import CodingChallengeService
 from ..services.code_review_service import CodeReviewService
+from ..utils.fanout import fan_out
+from ..utils.llm_errors import LLMUnavailableError, DeadlineExceededError
+from ..utils.resilience import deadline
+from .errors import error_response
 
 # Create a Blueprint for coding challenge routes
 coding_challenge_bp = Blueprint('coding_challenge', __name__)
@@ -10,13 +16,88 @@ coding_challenge_bp = Blueprint('coding_challenge', __name__)
 coding_challenge_service = None
 code_review_service = None
 
-def init_coding_challenge_service(llm_service):
+def init_coding_challenge_service(llm_service, review_history=None, challenge_store=None):
     """Initialize the global Coding Challenge service"""
     global coding_challenge_service, code_review_service
-    coding_challenge_service = CodingChallengeService(llm_service)
-    code_review_service = CodeReviewService(llm_service)
+    coding_challenge_service = CodingChallengeService(llm_service, challenge_store)
+    code_review_service = CodeReviewService(llm_service, review_history)
+
+def incomplete_code_challenge(data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Generate an incomplete code challenge and review the generated code.
+
+    Args:
+        data: Validated request body with objective and description
+
+    Returns:
+        The incomplete code and its initial review
+    """
+    incomplete_code = coding_challenge_service.generate_incomplete_code(
+        objective=data['objective'], 
+        description=data['description'],
+        language=data.get('language', 'Python'),
+        difficulty=data.get('difficulty', 'moderate')
+    )
+    
+    # Perform initial code review
+    code_review = code_review_service.review_code(
+        code=incomplete_code['code'], 
+        language=incomplete_code['language']
+    )
+    
+    return {
+        "incomplete_code": incomplete_code,
+        "initial_review": code_review
+    }
+
+def solution_feedback(data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Review a submitted solution and generate guidance concurrently.
+
+    Args:
+        data: Validated request body with code, language and challenge_type
+
+    Returns:
+        The review and the guidance; when one of them failed or missed the
+        deadline it is None and "errors" names the failed part
+
+    Raises:
+        LLMUnavailableError: If both parts failed and one was rejected for
+            capacity, or both missed the deadline
+        ValueError: If both parts failed otherwise
+    """
+    outcome = fan_out({
+        "code_review": lambda: code_review_service.review_code(
+            code=data['code'], 
+            language=data['language'],
+            session_id=data.get('session_id')
+        ),
+        "guidance": lambda: coding_challenge_service.generate_solution_guidance(
+            code=data['code'],
+            language=data['language'],
+            challenge_type=data['challenge_type']
+        )
+    }, deadline=float(os.getenv('SUBMIT_SOLUTION_DEADLINE', 60)))
+    
+    if not outcome.results:
+        rejected = [e for e in outcome.exceptions.values() if isinstance(e, LLMUnavailableError)]
+        if rejected:
+            raise rejected[0]
+        if len(outcome.timed_out) == len(outcome.errors):
+            raise DeadlineExceededError("; ".join(outcome.errors.values()))
+        raise ValueError("; ".join(outcome.errors.values()))
+    
+    # Return partial results when one branch failed or timed out
+    response = {
+        "code_review": outcome.results.get("code_review"),
+        "guidance": outcome.results.get("guidance")
+    }
+    if outcome.errors:
+        response["errors"] = outcome.errors
+    return response
 
 @coding_challenge_bp.route('/incomplete-code', methods=['POST'])
+@deadline("challenge")
 def generate_incomplete_code():
     """Generate incomplete code for a specific objective"""
     data = request.json
@@ -25,33 +106,13 @@ def generate_incomplete_code():
     if not data or 'objective' not in data or 'description' not in data:
         return jsonify({"error": "Objective and description are required"}), 400
     
-    # Optional parameters with defaults
-    language = data.get('language', 'Python')
-    difficulty = data.get('difficulty', 'moderate')
-    
     try:
-        # Generate incomplete code
-        incomplete_code = coding_challenge_service.generate_incomplete_code(
-            objective=data['objective'], 
-            description=data['description'],
-            language=language,
-            difficulty=difficulty
-        )
-        
-        # Perform initial code review
-        code_review = code_review_service.review_code(
-            code=incomplete_code['code'], 
-            language=incomplete_code['language']
-        )
-        
-        return jsonify({
-            "incomplete_code": incomplete_code,
-            "initial_review": code_review
-        })
+        return jsonify(incomplete_code_challenge(data))
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        return error_response(e)
 
 @coding_challenge_bp.route('/output-based', methods=['POST'])
+@deadline("challenge")
 def generate_output_challenge():
     """Generate output-based coding challenge"""
     data = request.json
@@ -75,9 +136,10 @@ def generate_output_challenge():
         
         return jsonify(output_challenge)
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        return error_response(e)
 
 @coding_challenge_bp.route('/problem-solving', methods=['POST'])
+@deadline("challenge")
 def generate_problem_solving_challenge():
     """Generate problem-solving coding challenge"""
     data = request.json
@@ -101,9 +163,10 @@ def generate_problem_solving_challenge():
         
         return jsonify(problem_challenge)
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        return error_response(e)
 
 @coding_challenge_bp.route('/submit-solution', methods=['POST'])
+@deadline("challenge")
 def submit_solution():
     """Submit and review a solution to a coding challenge"""
     data = request.json
@@ -113,22 +176,14 @@ def submit_solution():
         return jsonify({"error": "Code, language, and challenge type are required"}), 400
     
     try:
-        # Review the submitted solution
-        code_review = code_review_service.review_code(
-            code=data['code'], 
-            language=data['language']
-        )
-        
-        # Generate additional guidance based on the challenge type
-        guidance = coding_challenge_service.generate_solution_guidance(
-            code=data['code'],
-            language=data['language'],
-            challenge_type=data['challenge_type']
-        )
-        
-        return jsonify({
-            "code_review": code_review,
-            "guidance": guidance
-        })
+        return jsonify(solution_feedback(data))
     except Exception as e:
-        return jsonify({"error": str(e)}), 500 
\ No newline at end of file
+        return error_response(e)
+
+@coding_challenge_bp.route('/store/stats', methods=['GET'])
+def challenge_store_stats():
+    """Return hit, miss and error counters of the generated challenge store"""
+    if not coding_challenge_service or coding_challenge_service.store is None:
+        return jsonify({"error": "Challenge store is not enabled"}), 404
+    
+    return jsonify(coding_challenge_service.store.stats())
@@ -0,0 +1,18 @@
+from flask import jsonify
+from ..utils.llm_errors import LLMUnavailableError
+
+
+def error_response(e: Exception, status: int = 500):
+    """
+    Build the JSON error response for an exception raised by a service.
+
+    Calls rejected by the LLM scheduler (429), the circuit breaker (503)
+    or a deadline (504) carry a Retry-After header so clients back off
+    instead of retrying immediately.
+    """
+    if isinstance(e, LLMUnavailableError):
+        response = jsonify({"error": str(e)})
+        response.status_code = e.status_code
+        response.headers['Retry-After'] = str(e.retry_after)
+        return response
+    return jsonify({"error": str(e)}), status
@@ -0,0 +1,64 @@
+import time
+from flask import Blueprint, Flask, Response, g, jsonify, request
+from ..utils.metrics import registry, CONTENT_TYPE, HTTP_REQUESTS, HTTP_REQUEST_DURATION, HTTP_REQUESTS_IN_FLIGHT
+from . import llm_routes
+
+# Create a Blueprint for health and metrics routes
+health_bp = Blueprint('health', __name__)
+
+def health_status():
+    """
+    Describe whether the service can take requests.
+
+    Returns:
+        The health payload and its HTTP status: 503 until the services are
+        initialized, 200 otherwise ("degraded" while the LLM circuit is open)
+    """
+    llm_service = llm_routes.llm_service
+    if not llm_service:
+        return {"status": "unavailable", "reason": "LLM service not initialized"}, 503
+
+    circuit = None
+    if llm_service.resilience is not None:
+        circuit = llm_service.resilience.breaker.state
+    return {
+        "status": "degraded" if circuit == "open" else "ok",
+        "model": llm_service.model_name,
+        "circuit": circuit
+    }, 200
+
+@health_bp.route('/health', methods=['GET'])
+def health():
+    """Liveness and readiness probe used by the Docker healthcheck"""
+    payload, status = health_status()
+    return jsonify(payload), status
+
+@health_bp.route('/metrics', methods=['GET'])
+def metrics():
+    """Expose request and LLM call metrics in the Prometheus text format"""
+    return Response(registry.render(), content_type=CONTENT_TYPE)
+
+def init_request_metrics(app: Flask) -> None:
+    """Record latency, status and in-flight count of every request by route template"""
+
+    @app.before_request
+    def start_request_timer():
+        g.metrics_route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+        g.metrics_started = time.perf_counter()
+        HTTP_REQUESTS_IN_FLIGHT.inc(route=g.metrics_route)
+
+    @app.after_request
+    def record_status(response):
+        g.metrics_status = response.status_code
+        return response
+
+    @app.teardown_request
+    def record_request(exc):
+        route = g.pop('metrics_route', None)
+        if route is None:
+            return
+        HTTP_REQUESTS_IN_FLIGHT.dec(route=route)
+        # Unhandled exceptions never reach after_request
+        status = g.pop('metrics_status', 500)
+        HTTP_REQUEST_DURATION.observe(time.perf_counter() - g.pop('metrics_started'), method=request.method, route=route)
+        HTTP_REQUESTS.inc(method=request.method, route=route, status=status)
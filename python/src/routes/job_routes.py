@@ -0,0 +1,100 @@
+from typing import Any, Callable, Dict, Optional, Tuple
+from flask import Blueprint, request, jsonify
+from ..utils.jobs import JobQueue
+from ..utils.llm_errors import LLMUnavailableError
+from ..utils.resilience import deadline
+from ..utils.scheduler import priority, PRIORITY_BACKGROUND
+from . import quiz_routes, coding_challenge_routes
+
+# Create a Blueprint for job routes
+job_bp = Blueprint('jobs', __name__)
+
+# Global job queue (can be initialized in the main app)
+job_queue: Optional[JobQueue] = None
+
+def init_job_queue(queue: Optional[JobQueue]):
+    """Initialize the global job queue"""
+    global job_queue
+    job_queue = queue
+
+# Job functions apply the deadline and priority of the route they stand in
+# for; the deadline starts when a worker picks the job up
+
+@deadline("quiz.generate")
+@priority(PRIORITY_BACKGROUND)
+def _generate_quiz(params: Dict[str, Any]) -> Dict[str, Any]:
+    return quiz_routes.quiz_service.generate_language_quiz(params['language'])
+
+@deadline("challenge")
+def _incomplete_code(params: Dict[str, Any]) -> Dict[str, Any]:
+    return coding_challenge_routes.incomplete_code_challenge(params)
+
+@deadline("challenge")
+def _submit_solution(params: Dict[str, Any]) -> Dict[str, Any]:
+    return coding_challenge_routes.solution_feedback(params)
+
+# Job type -> (required params, job function)
+JOB_TYPES: Dict[str, Tuple[Tuple[str, ...], Callable[[Dict[str, Any]], Any]]] = {
+    "quiz.generate": (("language",), _generate_quiz),
+    "challenge.incomplete-code": (("objective", "description"), _incomplete_code),
+    "challenge.submit-solution": (("code", "language", "challenge_type"), _submit_solution)
+}
+
+def submit_job(data: Any) -> Tuple[Dict[str, Any], int]:
+    """
+    Queue a job from a {"type", "params"} request body.
+
+    Returns:
+        The queued job and 202, or an error payload and its status
+    """
+    if job_queue is None:
+        return {"error": "Job queue is not enabled"}, 404
+    if not isinstance(data, dict) or data.get('type') not in JOB_TYPES:
+        return {"error": f"type must be one of {', '.join(JOB_TYPES)}"}, 400
+
+    params = data.get('params')
+    required, func = JOB_TYPES[data['type']]
+    if not isinstance(params, dict) or not all(name in params for name in required):
+        return {"error": f"params must include {', '.join(required)}"}, 400
+
+    try:
+        job = job_queue.submit(data['type'], lambda: func(params))
+    except LLMUnavailableError as e:
+        return {"error": str(e), "retry_after": e.retry_after}, e.status_code
+    job["status_url"] = f"/jobs/{job['job_id']}"
+    return job, 202
+
+def job_status(job_id: str) -> Tuple[Dict[str, Any], int]:
+    """Current state of a job, with its result or error once finished"""
+    if job_queue is None:
+        return {"error": "Job queue is not enabled"}, 404
+    job = job_queue.get(job_id)
+    if job is None:
+        return {"error": "Unknown or expired job"}, 404
+    return job, 200
+
+@job_bp.route('', methods=['POST'])
+def create_job():
+    """Run a long generation in the background and return its job id immediately"""
+    payload, status = submit_job(request.get_json(silent=True))
+    response = jsonify(payload)
+    response.status_code = status
+    if status == 202:
+        response.headers['Location'] = payload['status_url']
+    elif 'retry_after' in payload:
+        response.headers['Retry-After'] = str(payload['retry_after'])
+    return response
+
+@job_bp.route('/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Poll a job for its status and result"""
+    payload, status = job_status(job_id)
+    return jsonify(payload), status
+
+@job_bp.route('/stats', methods=['GET'])
+def job_stats():
+    """Return queue depth, job counters and queue and run latency"""
+    if job_queue is None:
+        return jsonify({"error": "Job queue is not enabled"}), 404
+
+    return jsonify(job_queue.stats())
@@ -1,6 +1,9 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 from ..factories.llm_factory import LLMFactory
 from ..services.llm_service import LLMService
+from ..utils.sse import format_sse, SSE_HEADERS
+from ..utils.resilience import deadline
+from .errors import error_response
 
 # Create a Blueprint for LLM routes
 llm_bp = Blueprint('llm', __name__)
@@ -14,6 +17,7 @@ def init_llm_service(service: LLMService):
     llm_service = service
 
 @llm_bp.route('/generate', methods=['POST'])
+@deadline("generate")
 def generate():
     """Generate text from prompt"""
     if not llm_service:
@@ -26,12 +30,33 @@ def generate():
         
     prompt = data['prompt']
     template = data.get('template')
+    use_cache = data.get('cache', True)
+    if not isinstance(use_cache, bool):
+        return jsonify({"error": "cache must be a boolean"}), 400
+    
+    if data.get('stream'):
+        return Response(
+            stream_with_context(_stream_tokens(prompt, template, use_cache)),
+            mimetype='text/event-stream',
+            headers=SSE_HEADERS
+        )
     
     try:
-        response = llm_service.generate_response(prompt, template)
+        response = llm_service.generate_response(prompt, template, use_cache=use_cache)
         return jsonify({"response": response})
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        return error_response(e)
+
+def _stream_tokens(prompt, template, use_cache):
+    """Yield SSE messages for each generated chunk, then the full response"""
+    chunks = []
+    try:
+        for chunk in llm_service.stream_response(prompt, template, use_cache=use_cache):
+            chunks.append(chunk)
+            yield format_sse("token", {"text": chunk})
+        yield format_sse("done", {"response": "".join(chunks)})
+    except Exception as e:
+        yield format_sse("error", {"error": str(e)})
 
 @llm_bp.route('/update_llm', methods=['POST'])
 def update_llm():
@@ -52,4 +77,12 @@ def update_llm():
         llm_service.update_llm(new_llm)
         return jsonify({"message": f"LLM updated to {llm_type}"})
     except Exception as e:
-        return jsonify({"error": str(e)}), 500 
\ No newline at end of file
+        return jsonify({"error": str(e)}), 500 
+
+@llm_bp.route('/stats', methods=['GET'])
+def stats():
+    """Return LLM service statistics such as cache hit/miss counters"""
+    if not llm_service:
+        return jsonify({"error": "LLM service not initialized"}), 500
+    
+    return jsonify(llm_service.stats())
@@ -1,6 +1,15 @@
+from functools import partial
 from flask import Blueprint, request, jsonify
 from ..services.quiz_service import QuizService
+from ..services.quiz_pool import QuizPool
+from ..services.quiz_store import QuizAnswerStore, UnknownQuizError
+from ..services.quiz_shards import QuizSharder
+from ..services.question_bank import QuestionBank
 from ..factories.llm_factory import LLMFactory
+from ..utils.response_cache import no_cache
+from ..utils.scheduler import priority, PRIORITY_BACKGROUND
+from ..utils.resilience import deadline
+from .errors import error_response
 
 # Create a Blueprint for quiz routes
 quiz_bp = Blueprint('quiz', __name__)
@@ -11,9 +20,25 @@ quiz_service = None
 def init_quiz_service(llm_service):
     """Initialize the global Quiz service"""
     global quiz_service
-    quiz_service = QuizService(llm_service)
+    quiz_service = QuizService(llm_service, answer_store=QuizAnswerStore.from_env(), sharder=QuizSharder.from_env())
+    
+    # Pre-generate quizzes in the background when QUIZ_POOL_LANGUAGES is set;
+    # pooled quizzes bypass the response cache so each one is distinct and
+    # yield to interactive requests in the LLM scheduler
+    generate = priority(PRIORITY_BACKGROUND)(partial(quiz_service.create_quiz, use_cache=False))
+    pool = QuizPool.from_env(generate)
+    if pool is not None:
+        quiz_service.use_pool(pool)
+    
+    # Generated questions are banked; once a language is covered, quizzes are
+    # assembled from the bank and generation only grows it in the background
+    bank = QuestionBank.from_env(generate)
+    if bank is not None:
+        quiz_service.use_bank(bank)
 
 @quiz_bp.route('/generate', methods=['GET'])
+@deadline("quiz.generate")
+@priority(PRIORITY_BACKGROUND)
 def generate_quiz():
     """Generate a quiz for a specific programming language"""
     # Get language from query parameter
@@ -27,22 +52,45 @@ def generate_quiz():
         quiz = quiz_service.generate_language_quiz(language)
         return jsonify(quiz)
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        return error_response(e)
 
 @quiz_bp.route('/evaluate', methods=['POST'])
+@deadline("quiz.evaluate")
+@no_cache
 def evaluate_quiz():
     """Evaluate user's quiz responses"""
     data = request.json
     
-    if not data or 'language' not in data or 'responses' not in data:
-        return jsonify({"error": "Language and responses are required"}), 400
+    if not data or 'responses' not in data or not (data.get('language') or data.get('quiz_id')):
+        return jsonify({"error": "Language or quiz_id, and responses are required"}), 400
     
     try:
-        # Evaluate quiz responses
+        # Evaluate quiz responses, locally when the quiz id is known
         evaluation = quiz_service.evaluate_quiz(
-            data['language'], 
-            data['responses']
+            data.get('language'), 
+            data['responses'],
+            quiz_id=data.get('quiz_id'),
+            enrich_feedback=data.get('enrich_feedback', False)
         )
         return jsonify(evaluation)
+    except UnknownQuizError as e:
+        return error_response(e, 404)
     except Exception as e:
-        return jsonify({"error": str(e)}), 500 
\ No newline at end of file
+        return error_response(e) 
+
+@quiz_bp.route('/pool/stats', methods=['GET'])
+def quiz_pool_stats():
+    """Return pool depth, refill latency and miss rate per language"""
+    if not quiz_service or quiz_service.pool is None:
+        return jsonify({"error": "Quiz pool is not enabled"}), 404
+    
+    return jsonify(quiz_service.pool.stats())
+
+
+@quiz_bp.route('/bank/stats', methods=['GET'])
+def question_bank_stats():
+    """Return banked questions per language and difficulty, and growth counters"""
+    if not quiz_service or quiz_service.bank is None:
+        return jsonify({"error": "Question bank is not enabled"}), 404
+    
+    return jsonify(quiz_service.bank.stats())
@@ -0,0 +1,223 @@
+import copy
+import os
+import re
+import threading
+import time
+from typing import Dict, Any, List, Optional, Tuple
+
+# Fields a stored challenge is looked up by, in index order
+KEY_FIELDS = ("type", "objective", "language", "difficulty")
+
+
+def normalize(value: str) -> str:
+    """Case-fold and collapse whitespace and trailing punctuation so equivalent requests share a key"""
+    return re.sub(r"\s+", " ", str(value)).strip().strip(".!?;:,").strip().casefold()
+
+
+def challenge_key(challenge_type: str, objective: str, language: str, difficulty: str) -> Dict[str, str]:
+    """Normalized lookup key of a challenge request"""
+    return dict(zip(KEY_FIELDS, (challenge_type, normalize(objective), normalize(language), normalize(difficulty))))
+
+
+class MemoryChallengeBackend:
+    """
+    In-process challenge collection with the semantics of the MongoDB one.
+
+    Used when MONGODB_URI is not set, e.g. for local development and tests;
+    challenges are lost on restart and not shared between workers.
+    """
+
+    def __init__(self, max_keys: int = 10000):
+        self.max_keys = max_keys
+        self._documents: Dict[Tuple[str, ...], List[Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def count(self, key: Dict[str, str]) -> int:
+        with self._lock:
+            return len(self._documents.get(self._index(key), []))
+
+    def take_least_served(self, key: Dict[str, str]) -> Optional[Dict[str, Any]]:
+        """Return the variant served least often and count it as served"""
+        with self._lock:
+            documents = self._documents.get(self._index(key))
+            if not documents:
+                return None
+            document = min(documents, key=lambda doc: (doc["served"], doc["created_at"]))
+            document["served"] += 1
+            return copy.deepcopy(document)
+
+    def insert(self, document: Dict[str, Any]) -> None:
+        with self._lock:
+            index = self._index(document)
+            if index not in self._documents and len(self._documents) >= self.max_keys:
+                # Drop the key stored first, like a capped collection
+                self._documents.pop(next(iter(self._documents)))
+            self._documents.setdefault(index, []).append(copy.deepcopy(document))
+
+    def size(self) -> int:
+        with self._lock:
+            return sum(len(documents) for documents in self._documents.values())
+
+    def _index(self, key: Dict[str, Any]) -> Tuple[str, ...]:
+        return tuple(key[field] for field in KEY_FIELDS)
+
+
+class MongoChallengeBackend:
+    """Challenge collection in MongoDB, shared by every worker and service instance"""
+
+    def __init__(self, uri: str, database: Optional[str] = None, collection: str = "generated_challenges",
+                 timeout_ms: int = 2000, client: Any = None):
+        if client is None:
+            try:
+                from pymongo import MongoClient
+            except ImportError:
+                raise ValueError("MONGODB_URI is set but pymongo is not installed")
+            client = MongoClient(uri, serverSelectionTimeoutMS=timeout_ms)
+        # The database named in the URI (mongodb://host/instructo), unless overridden
+        db = client[database] if database else client.get_default_database(default="instructo")
+        self._collection = db[collection]
+        self._indexed = False
+
+    def _ensure_index(self) -> None:
+        # Created on first use, so an unreachable server does not prevent startup
+        if not self._indexed:
+            # Lookups filter on the normalized key and pick the least served variant
+            self._collection.create_index([(field, 1) for field in KEY_FIELDS] + [("served", 1)],
+                                          name="challenge_lookup")
+            self._indexed = True
+
+    def count(self, key: Dict[str, str]) -> int:
+        self._ensure_index()
+        return self._collection.count_documents(key)
+
+    def take_least_served(self, key: Dict[str, str]) -> Optional[Dict[str, Any]]:
+        """Return the variant served least often and count it as served, atomically"""
+        from pymongo import ReturnDocument
+        return self._collection.find_one_and_update(
+            key,
+            {"$inc": {"served": 1}},
+            sort=[("served", 1), ("created_at", 1)],
+            projection={"_id": False},
+            return_document=ReturnDocument.AFTER
+        )
+
+    def insert(self, document: Dict[str, Any]) -> None:
+        self._ensure_index()
+        # insert_one adds _id to the document it is given
+        self._collection.insert_one(dict(document))
+
+    def size(self) -> int:
+        return self._collection.estimated_document_count()
+
+
+class ChallengeStore:
+    """
+    Generated coding challenges, reused for repeated curriculum objectives.
+
+    Challenges are indexed by normalized (type, objective, language,
+    difficulty). Until `variants` challenges are stored for a key, requests
+    generate a new one and add it; after that they are served from the
+    store, rotating to the least served variant. Store errors never fail a
+    request: lookups fall back to generation and failed saves are skipped,
+    and after an error the store is bypassed for retry_after seconds so an
+    unreachable database does not add its timeout to every request.
+    """
+
+    def __init__(self, backend: Any = None, variants: int = 1, retry_after: float = 30):
+        self.backend = backend or MemoryChallengeBackend()
+        self.variants = max(1, variants)
+        self.retry_after = retry_after
+        self._unavailable_until = 0.0
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "saved": 0, "errors": 0}
+        self._last_error: Optional[str] = None
+
+    @classmethod
+    def from_env(cls) -> Optional["ChallengeStore"]:
+        """
+        Build a challenge store from environment variables.
+
+        Returns:
+            A MongoDB-backed store when MONGODB_URI is set, an in-memory one
+            otherwise, or None when CHALLENGE_STORE_ENABLED is false
+        """
+        if os.getenv("CHALLENGE_STORE_ENABLED", "True").lower() != "true":
+            return None
+        uri = os.getenv("MONGODB_URI")
+        if uri:
+            backend = MongoChallengeBackend(
+                uri,
+                database=os.getenv("MONGODB_DATABASE") or None,
+                collection=os.getenv("CHALLENGE_STORE_COLLECTION", "generated_challenges")
+            )
+        else:
+            backend = MemoryChallengeBackend(max_keys=int(os.getenv("CHALLENGE_STORE_MAX_KEYS", 10000)))
+        return cls(
+            backend,
+            variants=int(os.getenv("CHALLENGE_STORE_VARIANTS", 1)),
+            retry_after=float(os.getenv("CHALLENGE_STORE_RETRY_AFTER", 30))
+        )
+
+    def lookup(self, challenge_type: str, objective: str, language: str, difficulty: str) -> Optional[Dict[str, Any]]:
+        """
+        Return a stored challenge for the request.
+
+        Returns:
+            A stored challenge, or None when fewer than `variants` are stored
+            for the key (or the store is unreachable) and one should be generated
+        """
+        if self._unavailable():
+            return None
+        key = challenge_key(challenge_type, objective, language, difficulty)
+        try:
+            document = self.backend.take_least_served(key) if self.backend.count(key) >= self.variants else None
+        except Exception as e:
+            self._failed(e)
+            return None
+        self._count("hits" if document is not None else "misses")
+        return document["challenge"] if document is not None else None
+
+    def save(self, challenge_type: str, objective: str, language: str, difficulty: str, challenge: Dict[str, Any]) -> None:
+        """Store a generated challenge as a variant of its key"""
+        if self._unavailable():
+            return
+        document = {
+            **challenge_key(challenge_type, objective, language, difficulty),
+            "challenge": challenge,
+            "served": 1,
+            "created_at": time.time()
+        }
+        try:
+            self.backend.insert(document)
+        except Exception as e:
+            self._failed(e)
+            return
+        self._count("saved")
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            self._counters[counter] += 1
+
+    def _unavailable(self) -> bool:
+        return time.monotonic() < self._unavailable_until
+
+    def _failed(self, error: Exception) -> None:
+        with self._lock:
+            self._counters["errors"] += 1
+            self._last_error = str(error)
+            self._unavailable_until = time.monotonic() + self.retry_after
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = {
+                **self._counters,
+                "available": not self._unavailable(),
+                "backend": "mongodb" if isinstance(self.backend, MongoChallengeBackend) else "memory",
+                "variants": self.variants,
+                "last_error": self._last_error
+            }
+        try:
+            stats["stored"] = self.backend.size() if stats["available"] else None
+        except Exception:
+            stats["stored"] = None
+        return stats
@@ -1,98 +1,161 @@
+import difflib
 import json
-import re
-from typing import Dict, Any
+import os
+from typing import Dict, Any, Iterator, AsyncIterator, List, Optional, Tuple
 from ..services.llm_service import LLMService
+from ..services.review_history import ReviewHistory
+from ..prompts.code_review_prompts import REVIEW_CODE, REVIEW_CODE_DIFF, CHAT
+from ..utils.json_parser import IncrementalJSONParser, parse_json_response
+from ..utils.response_cache import is_cache_disabled
+from ..utils.semantic_cache import SemanticCache
+from ..utils.llm_errors import LLMUnavailableError
+from ..utils.tracing import traced
 
 class CodeReviewService:
     """Service for code review and programming assistance"""
     
-    def __init__(self, llm_service: LLMService):
+    def __init__(self,
+                 llm_service: LLMService,
+                 history: Optional[ReviewHistory] = None,
+                 semantic_cache: Optional[SemanticCache] = None):
         self.llm_service = llm_service
+        self.history = history or ReviewHistory()
+        self.semantic_cache = semantic_cache
+        # Above this share of changed lines a resubmission gets a full review
+        self.max_diff_ratio = float(os.getenv("REVIEW_DIFF_MAX_RATIO", 0.5))
     
-    def review_code(self, code: str, language: str) -> Dict[str, Any]:
+    @traced()
+    def review_code(self, code: str, language: str, session_id: Optional[str] = None) -> Dict[str, Any]:
         """
         Review submitted code and provide guidance
         
         Args:
             code: Code to be reviewed
             language: Programming language of the code
+            session_id: Optional session or user key; a resubmission in the
+                same session only has its changed lines reviewed
             
         Returns:
             Code review analysis without providing the actual code
         """
-        # Prompt for code review with explicit JSON formatting
-        template = f"""
-        Perform a detailed code review for the following {language} code.
-        
-        Provide the review in the following strict JSON format:
-        {{
-            "overall_assessment": {{
-                "code_quality": "poor/average/good/excellent",
-                "potential_improvements": ["Improvement 1", "Improvement 2"],
-                "complexity_score": 0-10
-            }},
-            "detailed_review": [
-                {{
-                    "category": "Structure/Organization",
-                    "observations": ["Observation 1", "Observation 2"],
-                    "suggestions": ["Suggestion 1", "Suggestion 2"]
-                }},
-                {{
-                    "category": "Performance",
-                    "observations": ["Observation 1", "Observation 2"],
-                    "suggestions": ["Suggestion 1", "Suggestion 2"]
-                }},
-                {{
-                    "category": "Best Practices",
-                    "observations": ["Observation 1", "Observation 2"],
-                    "suggestions": ["Suggestion 1", "Suggestion 2"]
-                }}
-            ],
-            "learning_resources": [
-                {{
-                    "topic": "Related concept",
-                    "url": "https://example.com/resource"
-                }}
-            ]
-        }}
-
-        Code to review:
-        {code}
-
-        Ensure:
-        1. Do NOT provide the corrected code
-        2. Focus on constructive guidance
-        3. Provide actionable insights
-        4. Include learning resources
-        """
-        
         try:
-            # Generate code review using LLM with explicit JSON request
-            review_json_str = self.llm_service.generate_response(
-                prompt=template, 
-                template="{prompt}"
-            )
+            previous, diff = self._previous_submission(session_id, code, language)
+            if previous is not None and not diff:
+                return previous['review']
             
-            # Safely parse the JSON
-            try:
-                review_data = json.loads(review_json_str)
-            except json.JSONDecodeError:
-                # If JSON parsing fails, try to extract JSON from the response
-                json_match = re.search(r'\{.*\}', review_json_str, re.DOTALL)
-                if json_match:
-                    review_data = json.loads(json_match.group(0))
-                else:
-                    raise ValueError("Could not extract valid JSON from response")
+            if diff:
+                # Review only the changed hunks and merge into the previous review
+                delta = self.llm_service.generate_structured(
+                    REVIEW_CODE_DIFF,
+                    {"language": language, "previous_review": _review_summary(previous['review']), "diff": diff}
+                )
+                review = _merge_review(previous['review'], delta)
+            else:
+                # Generate code review using LLM with explicit JSON request
+                review = self.llm_service.generate_structured(
+                    REVIEW_CODE,
+                    {"code": code, "language": language}
+                )
+            
+            if session_id:
+                self.history.save(session_id, language, code, review)
+            return review
+        except LLMUnavailableError:
+            raise
+        except Exception as e:
+            raise ValueError(f"Failed to review code: {str(e)}")
+    
+    @traced()
+    async def areview_code(self, code: str, language: str, session_id: Optional[str] = None) -> Dict[str, Any]:
+        """Asynchronous variant of review_code"""
+        try:
+            previous, diff = self._previous_submission(session_id, code, language)
+            if previous is not None and not diff:
+                return previous['review']
             
-            # Validate the review data structure
-            required_keys = ['overall_assessment', 'detailed_review', 'learning_resources']
-            if not all(key in review_data for key in required_keys):
-                raise ValueError("Invalid review structure")
+            if diff:
+                delta = await self.llm_service.agenerate_structured(
+                    REVIEW_CODE_DIFF,
+                    {"language": language, "previous_review": _review_summary(previous['review']), "diff": diff}
+                )
+                review = _merge_review(previous['review'], delta)
+            else:
+                review = await self.llm_service.agenerate_structured(
+                    REVIEW_CODE,
+                    {"code": code, "language": language}
+                )
             
-            return review_data
+            if session_id:
+                self.history.save(session_id, language, code, review)
+            return review
+        except LLMUnavailableError:
+            raise
         except Exception as e:
             raise ValueError(f"Failed to review code: {str(e)}")
     
+    def _previous_submission(self, session_id: Optional[str], code: str, language: str) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """
+        Compare a submission with the session's previous one
+        
+        Returns:
+            The previous submission (None when a full review is needed) and
+            the diff to review (empty when the code is unchanged)
+        """
+        previous = self.history.get(session_id) if session_id else None
+        if previous is None or previous['language'] != language:
+            return None, None
+        
+        old_lines = previous['code'].splitlines()
+        new_lines = code.splitlines()
+        diff_lines = list(difflib.unified_diff(old_lines, new_lines, lineterm="", n=2))[2:]
+        changed = sum(1 for line in diff_lines if line[:1] in ("+", "-"))
+        if changed > self.max_diff_ratio * max(len(old_lines), len(new_lines), 1):
+            return None, None
+        return previous, "\n".join(diff_lines)
+    
+    @traced()
+    def review_code_batch(self, items: List[Dict[str, str]], max_concurrency: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Review many code submissions in one batch
+        
+        Args:
+            items: Submissions, each with 'code' and 'language'
+            max_concurrency: Maximum number of concurrent LLM calls
+            
+        Returns:
+            One entry per item, in order: {"review": ...} or {"error": ...}
+        """
+        responses = self.llm_service.generate_batch_from_prompt(
+            REVIEW_CODE,
+            [{"code": item['code'], "language": item['language']} for item in items],
+            max_concurrency=max_concurrency
+        )
+        return [self._batch_entry(response) for response in responses]
+    
+    @traced()
+    async def areview_code_batch(self, items: List[Dict[str, str]], max_concurrency: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Asynchronous variant of review_code_batch"""
+        responses = await self.llm_service.agenerate_batch_from_prompt(
+            REVIEW_CODE,
+            [{"code": item['code'], "language": item['language']} for item in items],
+            max_concurrency=max_concurrency
+        )
+        return [self._batch_entry(response) for response in responses]
+    
+    def _batch_entry(self, response: Any) -> Dict[str, Any]:
+        """Turn one batch response into a review or a per-item error"""
+        try:
+            if isinstance(response, Exception):
+                raise response
+            return {"review": self._parse_review(response)}
+        except Exception as e:
+            return {"error": f"Failed to review code: {str(e)}"}
+    
+    def _parse_review(self, review_json_str: str) -> Dict[str, Any]:
+        """Parse and validate a code review response"""
+        return REVIEW_CODE.schema.validate(parse_json_response(review_json_str), "review")
+    
+    @traced()
     def get_chat_response(self, message: str) -> Dict[str, Any]:
         """
         Provide coding-related chat assistance
@@ -103,64 +166,142 @@ class CodeReviewService:
         Returns:
             Helpful response to the user's query
         """
-        # Prompt for chat response with explicit JSON formatting
-        template = f"""
-        Provide a helpful, educational response to the following programming-related query:
+        cached = self._semantic_lookup(message)
+        if cached is not None:
+            return cached
         
-        Query: {message}
+        try:
+            # Generate chat response using LLM with explicit JSON request
+            response = self.llm_service.generate_structured(
+                CHAT,
+                {"message": message}
+            )
+        except LLMUnavailableError:
+            raise
+        except Exception as e:
+            raise ValueError(f"Failed to generate chat response: {str(e)}")
         
-        Provide the response in the following strict JSON format:
-        {{
-            "response_type": "explanation/guidance/resource",
-            "main_points": [
-                "Key point 1",
-                "Key point 2",
-                "Key point 3"
-            ],
-            "detailed_explanation": "Comprehensive explanation of the topic",
-            "learning_resources": [
-                {{
-                    "title": "Resource title",
-                    "url": "https://example.com/resource",
-                    "type": "tutorial/documentation/video"
-                }}
-            ],
-            "recommended_next_steps": [
-                "Step 1 to learn more",
-                "Step 2 to improve understanding"
-            ]
-        }}
-
-        Ensure:
-        1. Explain underlying concepts
-        2. Provide clear, concise guidance
-        3. Avoid direct code solutions
-        4. Include learning resources
-        """
+        self._semantic_store(message, response)
+        return response
+    
+    @traced()
+    async def aget_chat_response(self, message: str) -> Dict[str, Any]:
+        """Asynchronous variant of get_chat_response"""
+        cached = self._semantic_lookup(message)
+        if cached is not None:
+            return cached
         
         try:
-            # Generate chat response using LLM with explicit JSON request
-            response_json_str = self.llm_service.generate_response(
-                prompt=template, 
-                template="{prompt}"
+            response = await self.llm_service.agenerate_structured(
+                CHAT,
+                {"message": message}
             )
+        except LLMUnavailableError:
+            raise
+        except Exception as e:
+            raise ValueError(f"Failed to generate chat response: {str(e)}")
+        
+        self._semantic_store(message, response)
+        return response
+    
+    def stream_chat_response(self, message: str) -> Iterator[Tuple[str, Any]]:
+        """
+        Stream coding-related chat assistance
+        
+        Args:
+            message: User's chat message
             
-            # Safely parse the JSON
-            try:
-                response_data = json.loads(response_json_str)
-            except json.JSONDecodeError:
-                # If JSON parsing fails, try to extract JSON from the response
-                json_match = re.search(r'\{.*\}', response_json_str, re.DOTALL)
-                if json_match:
-                    response_data = json.loads(json_match.group(0))
-                else:
-                    raise ValueError("Could not extract valid JSON from response")
-            
-            # Validate the response data structure
-            required_keys = ['response_type', 'main_points', 'detailed_explanation', 'learning_resources', 'recommended_next_steps']
-            if not all(key in response_data for key in required_keys):
-                raise ValueError("Invalid response structure")
-            
-            return response_data
+        Yields:
+            ("field", {name: value}) for each top-level field as soon as it is
+            parsed, then ("done", full_response) or ("error", message)
+        """
+        cached = self._semantic_lookup(message)
+        if cached is not None:
+            for key, value in cached.items():
+                yield "field", {key: value}
+            yield "done", cached
+            return
+        
+        parser = IncrementalJSONParser()
+        try:
+            for chunk in self.llm_service.stream_from_prompt(
+                CHAT,
+                {"message": message}
+            ):
+                for key, value in parser.feed(chunk):
+                    yield "field", {key: value}
+            response = self._parse_chat_response(parser)
+            self._semantic_store(message, response)
+            yield "done", response
+        except Exception as e:
+            yield "error", f"Failed to generate chat response: {str(e)}"
+    
+    async def astream_chat_response(self, message: str) -> AsyncIterator[Tuple[str, Any]]:
+        """Asynchronous variant of stream_chat_response"""
+        cached = self._semantic_lookup(message)
+        if cached is not None:
+            for key, value in cached.items():
+                yield "field", {key: value}
+            yield "done", cached
+            return
+        
+        parser = IncrementalJSONParser()
+        try:
+            async for chunk in self.llm_service.astream_from_prompt(
+                CHAT,
+                {"message": message}
+            ):
+                for key, value in parser.feed(chunk):
+                    yield "field", {key: value}
+            response = self._parse_chat_response(parser)
+            self._semantic_store(message, response)
+            yield "done", response
         except Exception as e:
-            raise ValueError(f"Failed to generate chat response: {str(e)}") 
\ No newline at end of file
+            yield "error", f"Failed to generate chat response: {str(e)}"
+    
+    def _semantic_lookup(self, message: str) -> Optional[Dict[str, Any]]:
+        """Return the answer to a near-duplicate question, if one is cached"""
+        if self.semantic_cache is None or is_cache_disabled():
+            return None
+        # Answers are only reused for the model that gave them
+        cached = self.semantic_cache.get(message, context=self.llm_service.model_name)
+        return json.loads(cached) if cached is not None else None
+    
+    def _semantic_store(self, message: str, response: Dict[str, Any]) -> None:
+        if self.semantic_cache is not None and not is_cache_disabled():
+            self.semantic_cache.set(message, json.dumps(response), context=self.llm_service.model_name)
+    
+    def _parse_chat_response(self, parser: IncrementalJSONParser) -> Dict[str, Any]:
+        """Validate a streamed chat response, reusing the object span found while streaming"""
+        return CHAT.schema.validate(parser.result(), "response")
+
+
+def _review_summary(review: Dict[str, Any]) -> str:
+    """Compact summary of a review sent along with a diff instead of the full code"""
+    summary = {
+        "overall_assessment": review.get('overall_assessment'),
+        "suggestions": {
+            entry.get('category', ''): entry.get('suggestions', [])
+            for entry in review.get('detailed_review', [])
+        }
+    }
+    return json.dumps(summary, separators=(",", ":"))
+
+
+def _merge_review(previous: Dict[str, Any], delta: Dict[str, Any]) -> Dict[str, Any]:
+    """Merge an incremental review into the previous one, replacing updated categories"""
+    categories = {entry.get('category'): entry for entry in previous.get('detailed_review', [])}
+    for entry in delta['detailed_review']:
+        categories[entry.get('category')] = entry
+    
+    resources = list(previous.get('learning_resources', []))
+    known = {(resource.get('topic'), resource.get('url')) for resource in resources if isinstance(resource, dict)}
+    for resource in delta.get('learning_resources', []):
+        if isinstance(resource, dict) and (resource.get('topic'), resource.get('url')) not in known:
+            resources.append(resource)
+    
+    merged = dict(previous)
+    merged['overall_assessment'] = delta['overall_assessment']
+    merged['detailed_review'] = list(categories.values())
+    merged['learning_resources'] = resources
+    return merged
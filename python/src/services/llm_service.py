@@ -1,33 +1,587 @@
-from typing import Optional
+import asyncio
+import json
+import time
+from contextlib import asynccontextmanager, nullcontext
+from typing import Optional, Dict, Any, Tuple, Iterator, AsyncIterator, List, Union
+from langchain_core.callbacks import UsageMetadataCallbackHandler
 from langchain_core.language_models.base import BaseLanguageModel
 from langchain_core.prompts import PromptTemplate
 from langchain_core.output_parsers import StrOutputParser
+from langchain_core.runnables import Runnable, RunnableLambda
+from ..factories.llm_factory import LLMFactory
+from ..factories.llm_pool import LLMPool
+from ..prompts import PromptSpec
+from ..prompts.repair_prompts import REPAIR_RESPONSE
+from ..utils.response_cache import ResponseCache, is_cache_disabled, is_cache_read_skipped
+from ..utils.single_flight import SingleFlight
+from ..utils.prompt_compaction import PromptCompactor, estimate_tokens
+from ..utils.scheduler import LLMScheduler
+from ..utils.resilience import ResilientCaller
+from ..utils.json_parser import parse_json_response
+from ..utils.schemas import ResponseRepair
+from ..utils.metrics import (
+    llm_operation, current_operation, LLM_CALL_DURATION, LLM_CALLS_IN_FLIGHT, LLM_INPUT_TOKENS, LLM_OUTPUT_TOKENS,
+    RESPONSE_VALIDATION
+)
+from ..utils.tracing import span, traced
+
+# Upper bound on compiled chains kept for ad-hoc templates
+MAX_TEMPLATE_CHAINS = 128
+
+# Smallest JSON-mode request, sent once per worker before it reports ready
+WARMUP_PROMPT = 'Reply with the JSON object {"ok": true}'
+
+
+@asynccontextmanager
+async def _no_slot():
+    yield
+
+
+class _CallMetrics:
+    """
+    Record latency, in-flight count and tokens of one LLM call.
+
+    Tokens come from the provider's usage metadata, collected through a
+    callback passed in config; models that report none are estimated.
+    """
+
+    def __init__(self, model: str, chain_input: Any):
+        self.model = model
+        self.chain_input = chain_input
+        self.operation = current_operation()
+        self.usage = UsageMetadataCallbackHandler()
+        self.config = {"callbacks": [self.usage]}
+        self.output: Optional[str] = None
+
+    def __enter__(self) -> "_CallMetrics":
+        self.started = time.perf_counter()
+        LLM_CALLS_IN_FLIGHT.inc(operation=self.operation)
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> bool:
+        LLM_CALLS_IN_FLIGHT.dec(operation=self.operation)
+        if exc_type is None:
+            outcome = "ok"
+        elif issubclass(exc_type, (GeneratorExit, asyncio.CancelledError)):
+            outcome = "cancelled"
+        else:
+            outcome = "error"
+        LLM_CALL_DURATION.observe(time.perf_counter() - self.started, operation=self.operation, model=self.model, outcome=outcome)
+
+        reported = self.usage.usage_metadata.values()
+        if reported:
+            input_tokens = sum(usage.get("input_tokens", 0) for usage in reported)
+            output_tokens = sum(usage.get("output_tokens", 0) for usage in reported)
+        else:
+            prompt = self.chain_input.get("prompt", "") if isinstance(self.chain_input, dict) else self.chain_input
+            input_tokens = estimate_tokens(str(prompt))
+            output_tokens = estimate_tokens(self.output) if self.output is not None else 0
+        LLM_INPUT_TOKENS.inc(input_tokens, operation=self.operation)
+        LLM_OUTPUT_TOKENS.inc(output_tokens, operation=self.operation)
+        return False
+
 
 class LLMService:
     """Service for interacting with LLMs"""
-    
-    def __init__(self, llm: BaseLanguageModel):
+
+    def __init__(self,
+                 llm: BaseLanguageModel,
+                 cache: Optional[ResponseCache] = None,
+                 native_json: bool = True,
+                 coalescer: Optional[SingleFlight] = None,
+                 compactor: Optional[PromptCompactor] = None,
+                 scheduler: Optional[LLMScheduler] = None,
+                 resilience: Optional[ResilientCaller] = None,
+                 repair: Optional[ResponseRepair] = None):
         self.llm = llm
-        
-    def generate_response(self, prompt: str, template: Optional[str] = None) -> str:
+        self.cache = cache
+        self.coalescer = coalescer
+        self.compactor = compactor
+        self.scheduler = scheduler
+        self.resilience = resilience
+        self.repair = repair
+        self.native_json = native_json
+        self._compile()
+
+    def _compile(self) -> None:
+        """
+        Compile the chains for the current LLM once.
+
+        Registered prompts are rendered with str.format and sent through
+        these chains, so a request only substitutes variables and calls the
+        model. Called again whenever update_llm swaps the model.
+        """
+        json_llm = LLMFactory.with_json_mode(self.llm) if self.native_json else self.llm
+        self._chains = {
+            False: self.llm | StrOutputParser(),
+            True: json_llm | StrOutputParser()
+        }
+        # Chains for ad-hoc templates (e.g. from /generate), built on first use
+        self._template_chains: Dict[Tuple[str, bool], Runnable] = {}
+
+    def generate_response(self, prompt: str, template: Optional[str] = None, use_cache: bool = True, json_mode: bool = False) -> str:
         """
         Generate a response using the LLM.
-        
+
         Args:
             prompt: User's prompt
             template: Optional template for wrapping the user prompt
-            
+            use_cache: Whether the response cache may be used for this call
+            json_mode: Request native JSON output when the model supports it
+
         Returns:
             Generated text response
         """
-        if template:
-            prompt_template = PromptTemplate.from_template(template)
-            chain = prompt_template | self.llm | StrOutputParser()
-            return chain.invoke({"prompt": prompt})
-        else:
-            chain = self.llm | StrOutputParser()
-            return chain.invoke(prompt)
-            
+        cache_key, cached = self._cache_lookup(prompt, template, use_cache, json_mode)
+        if cached is not None:
+            return cached
+
+        chain, chain_input = self._build_chain(prompt, template, json_mode)
+        if cache_key is not None and self.coalescer is not None:
+            # Identical requests in flight share one model call
+            return self.coalescer.do(cache_key, lambda: self._invoke(cache_key, chain, chain_input))
+        return self._invoke(cache_key, chain, chain_input)
+
+    async def agenerate_response(self, prompt: str, template: Optional[str] = None, use_cache: bool = True, json_mode: bool = False) -> str:
+        """
+        Asynchronous variant of generate_response using the chain's ainvoke.
+
+        Args:
+            prompt: User's prompt
+            template: Optional template for wrapping the user prompt
+            use_cache: Whether the response cache may be used for this call
+            json_mode: Request native JSON output when the model supports it
+
+        Returns:
+            Generated text response
+        """
+        cache_key, cached = self._cache_lookup(prompt, template, use_cache, json_mode)
+        if cached is not None:
+            return cached
+
+        chain, chain_input = self._build_chain(prompt, template, json_mode)
+        if cache_key is not None and self.coalescer is not None:
+            return await self.coalescer.ado(cache_key, lambda: self._ainvoke(cache_key, chain, chain_input))
+        return await self._ainvoke(cache_key, chain, chain_input)
+
+    def stream_response(self, prompt: str, template: Optional[str] = None, use_cache: bool = True, json_mode: bool = False) -> Iterator[str]:
+        """
+        Stream a response from the LLM chunk by chunk using the chain's stream.
+
+        A cached response is yielded as a single chunk; a streamed response
+        is cached once it completes.
+
+        Args:
+            prompt: User's prompt
+            template: Optional template for wrapping the user prompt
+            use_cache: Whether the response cache may be used for this call
+            json_mode: Request native JSON output when the model supports it
+
+        Yields:
+            Text chunks as they are generated
+        """
+        cache_key, cached = self._cache_lookup(prompt, template, use_cache, json_mode)
+        if cached is not None:
+            yield cached
+            return
+
+        chain, chain_input = self._build_chain(prompt, template, json_mode)
+        chunks = []
+        with _CallMetrics(self.model_name, chain_input) as metrics, self._slot():
+            for chunk in chain.stream(chain_input, metrics.config):
+                chunks.append(chunk)
+                yield chunk
+            metrics.output = "".join(chunks)
+
+        self._store(cache_key, metrics.output)
+
+    async def astream_response(self, prompt: str, template: Optional[str] = None, use_cache: bool = True, json_mode: bool = False) -> AsyncIterator[str]:
+        """Asynchronous variant of stream_response using the chain's astream"""
+        cache_key, cached = self._cache_lookup(prompt, template, use_cache, json_mode)
+        if cached is not None:
+            yield cached
+            return
+
+        chain, chain_input = self._build_chain(prompt, template, json_mode)
+        chunks = []
+        with _CallMetrics(self.model_name, chain_input) as metrics:
+            async with self._aslot():
+                async for chunk in chain.astream(chain_input, metrics.config):
+                    chunks.append(chunk)
+                    yield chunk
+            metrics.output = "".join(chunks)
+
+        self._store(cache_key, metrics.output)
+
+    def generate_from_prompt(self, spec: PromptSpec, variables: Dict[str, Any], use_cache: bool = True) -> str:
+        """
+        Generate a response for a registered prompt.
+
+        Args:
+            spec: Prompt declared in the prompt registry
+            variables: Values for the prompt's input variables
+            use_cache: Whether the response cache may be used for this call
+
+        Returns:
+            Generated text response
+        """
+        with llm_operation(spec.name):
+            return self.generate_response(self._render(spec, variables), use_cache=use_cache, json_mode=spec.json_mode)
+
+    async def agenerate_from_prompt(self, spec: PromptSpec, variables: Dict[str, Any], use_cache: bool = True) -> str:
+        """Asynchronous variant of generate_from_prompt"""
+        with llm_operation(spec.name):
+            return await self.agenerate_response(self._render(spec, variables), use_cache=use_cache, json_mode=spec.json_mode)
+
+    def generate_structured(self, spec: PromptSpec, variables: Dict[str, Any], use_cache: bool = True) -> Dict[str, Any]:
+        """
+        Generate a registered prompt's JSON response and validate it against the prompt's schema.
+
+        When fields are missing or invalid, a short repair prompt asks for
+        just those fields and merges them in; a response that is not JSON or
+        too broken to repair is regenerated once instead. The fixed response
+        replaces the malformed one in the response cache.
+
+        Args:
+            spec: Registered prompt declaring a schema
+            variables: Values for the prompt's input variables
+            use_cache: Whether the response cache may be used for this call
+
+        Returns:
+            The parsed response
+
+        Raises:
+            ValueError: If the response is still invalid
+        """
+        with llm_operation(spec.name):
+            prompt = self._render(spec, variables)
+            data, invalid = self._parse_structured(spec, self.generate_response(prompt, use_cache=use_cache, json_mode=spec.json_mode))
+            outcome = "valid"
+            if invalid and self.repair is not None:
+                if self.repair.repairable(spec.schema, data, invalid):
+                    outcome = "repaired"
+                    fix = self.generate_from_prompt(REPAIR_RESPONSE, self._repair_variables(spec, prompt, data, invalid), use_cache=False)
+                    invalid = self._merge_fix(spec, data, fix, invalid)
+                elif self.repair.full_retry:
+                    outcome = "retried"
+                    data, invalid = self._parse_structured(spec, self.generate_response(prompt, use_cache=False, json_mode=spec.json_mode))
+            return self._finish_structured(spec, prompt, data, invalid, outcome, use_cache)
+
+    async def agenerate_structured(self, spec: PromptSpec, variables: Dict[str, Any], use_cache: bool = True) -> Dict[str, Any]:
+        """Asynchronous variant of generate_structured"""
+        with llm_operation(spec.name):
+            prompt = self._render(spec, variables)
+            data, invalid = self._parse_structured(spec, await self.agenerate_response(prompt, use_cache=use_cache, json_mode=spec.json_mode))
+            outcome = "valid"
+            if invalid and self.repair is not None:
+                if self.repair.repairable(spec.schema, data, invalid):
+                    outcome = "repaired"
+                    fix = await self.agenerate_from_prompt(REPAIR_RESPONSE, self._repair_variables(spec, prompt, data, invalid), use_cache=False)
+                    invalid = self._merge_fix(spec, data, fix, invalid)
+                elif self.repair.full_retry:
+                    outcome = "retried"
+                    data, invalid = self._parse_structured(spec, await self.agenerate_response(prompt, use_cache=False, json_mode=spec.json_mode))
+            return self._finish_structured(spec, prompt, data, invalid, outcome, use_cache)
+
+    def _parse_structured(self, spec: PromptSpec, response: str) -> Tuple[Any, List[str]]:
+        """Parse a response; returns it with the schema fields it is missing or has invalid"""
+        try:
+            data = parse_json_response(response)
+        except ValueError:
+            return None, list(spec.schema.fields)
+        return data, spec.schema.invalid_fields(data)
+
+    def _repair_variables(self, spec: PromptSpec, prompt: str, data: Dict[str, Any], invalid: List[str]) -> Dict[str, Any]:
+        valid = {key: value for key, value in data.items() if key not in invalid}
+        return {
+            "request": self.repair.truncate(prompt),
+            "response": self.repair.truncate(json.dumps(valid)),
+            "fields": spec.schema.describe(invalid)
+        }
+
+    def _merge_fix(self, spec: PromptSpec, data: Dict[str, Any], fix: str, invalid: List[str]) -> List[str]:
+        """Merge the repaired fields into the response; returns the fields still invalid"""
+        try:
+            fields = parse_json_response(fix)
+        except ValueError:
+            return invalid
+        if isinstance(fields, dict):
+            data.update((name, fields[name]) for name in invalid if name in fields)
+        return spec.schema.invalid_fields(data)
+
+    def _finish_structured(self, spec: PromptSpec, prompt: str, data: Any, invalid: List[str], outcome: str, use_cache: bool) -> Dict[str, Any]:
+        """Count the outcome, cache a fixed response and return it, or raise if it is still invalid"""
+        error = None
+        if invalid:
+            outcome = "failed"
+            error = f"Invalid {spec.name} response: missing or invalid {', '.join(invalid)}"
+        RESPONSE_VALIDATION.inc(operation=spec.name, outcome=outcome)
+        if self.repair is not None:
+            self.repair.count(outcome, error)
+        if error is not None:
+            raise ValueError(error)
+        if outcome != "valid" and use_cache and not is_cache_disabled() and self.cache is not None:
+            self.cache.set(ResponseCache.make_key(self.model_name, prompt, None, spec.json_mode), json.dumps(data))
+        return data
+
+    def stream_from_prompt(self, spec: PromptSpec, variables: Dict[str, Any], use_cache: bool = True) -> Iterator[str]:
+        """Streaming variant of generate_from_prompt"""
+        stream = self.stream_response(self._render(spec, variables), use_cache=use_cache, json_mode=spec.json_mode)
+        # The stream runs after this returns, so the operation is set while it is consumed
+        with llm_operation(spec.name):
+            yield from stream
+
+    async def astream_from_prompt(self, spec: PromptSpec, variables: Dict[str, Any], use_cache: bool = True) -> AsyncIterator[str]:
+        """Asynchronous streaming variant of generate_from_prompt"""
+        stream = self.astream_response(self._render(spec, variables), use_cache=use_cache, json_mode=spec.json_mode)
+        with llm_operation(spec.name):
+            async for chunk in stream:
+                yield chunk
+
+    def generate_batch(self,
+                       prompts: List[str],
+                       use_cache: bool = True,
+                       json_mode: bool = False,
+                       max_concurrency: Optional[int] = None) -> List[Union[str, Exception]]:
+        """
+        Generate responses for many prompts through the chain's batch API.
+
+        Cached prompts are answered from the cache; the rest go to the model
+        in one batch call with at most max_concurrency requests in flight.
+
+        Args:
+            prompts: Rendered prompts
+            use_cache: Whether the response cache may be used for these calls
+            json_mode: Request native JSON output when the model supports it
+            max_concurrency: Maximum number of concurrent model calls
+
+        Returns:
+            A response or the raised exception for each prompt, in order
+        """
+        results, keys, pending = self._batch_lookup(prompts, use_cache, json_mode)
+        if pending:
+            chain = self._scheduled(self._chains[json_mode])
+            responses = chain.batch(
+                [prompts[index] for index in pending],
+                config={"max_concurrency": max_concurrency},
+                return_exceptions=True
+            )
+            self._batch_store(results, keys, pending, responses)
+        return results
+
+    async def agenerate_batch(self,
+                              prompts: List[str],
+                              use_cache: bool = True,
+                              json_mode: bool = False,
+                              max_concurrency: Optional[int] = None) -> List[Union[str, Exception]]:
+        """Asynchronous variant of generate_batch using the chain's abatch"""
+        results, keys, pending = self._batch_lookup(prompts, use_cache, json_mode)
+        if pending:
+            chain = self._scheduled(self._chains[json_mode])
+            responses = await chain.abatch(
+                [prompts[index] for index in pending],
+                config={"max_concurrency": max_concurrency},
+                return_exceptions=True
+            )
+            self._batch_store(results, keys, pending, responses)
+        return results
+
+    def generate_batch_from_prompt(self,
+                                   spec: PromptSpec,
+                                   variables: List[Dict[str, Any]],
+                                   use_cache: bool = True,
+                                   max_concurrency: Optional[int] = None) -> List[Union[str, Exception]]:
+        """Batch variant of generate_from_prompt; one variables mapping per call"""
+        with llm_operation(spec.name):
+            return self.generate_batch(
+                [self._render(spec, item) for item in variables],
+                use_cache=use_cache, json_mode=spec.json_mode, max_concurrency=max_concurrency
+            )
+
+    async def agenerate_batch_from_prompt(self,
+                                          spec: PromptSpec,
+                                          variables: List[Dict[str, Any]],
+                                          use_cache: bool = True,
+                                          max_concurrency: Optional[int] = None) -> List[Union[str, Exception]]:
+        """Asynchronous variant of generate_batch_from_prompt"""
+        with llm_operation(spec.name):
+            return await self.agenerate_batch(
+                [self._render(spec, item) for item in variables],
+                use_cache=use_cache, json_mode=spec.json_mode, max_concurrency=max_concurrency
+            )
+
+    @traced("prompt.render")
+    def _render(self, spec: PromptSpec, variables: Dict[str, Any]) -> str:
+        """Render a registered prompt, compacting submitted code when configured"""
+        if self.compactor is not None:
+            return self.compactor.render(spec, variables)
+        return spec.render(variables)
+
+    def _batch_lookup(self, prompts: List[str], use_cache: bool, json_mode: bool) -> Tuple[List[Any], List[Optional[str]], List[int]]:
+        """Resolve cached prompts of a batch; returns results, keys and indexes still to generate"""
+        results: List[Any] = [None] * len(prompts)
+        keys: List[Optional[str]] = [None] * len(prompts)
+        pending = []
+        for index, prompt in enumerate(prompts):
+            keys[index], cached = self._cache_lookup(prompt, None, use_cache, json_mode)
+            if cached is not None:
+                results[index] = cached
+            else:
+                pending.append(index)
+        return results, keys, pending
+
+    def _batch_store(self, results: List[Any], keys: List[Optional[str]], pending: List[int], responses: List[Any]) -> None:
+        """Place batch responses at their positions and cache the successful ones"""
+        for index, response in zip(pending, responses):
+            results[index] = response
+            if not isinstance(response, Exception):
+                self._store(keys[index], response)
+
+    def _cache_lookup(self, prompt: str, template: Optional[str], use_cache: bool, json_mode: bool) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Look up a cached response.
+
+        Returns:
+            The key identifying this request for caching and coalescing (None
+            when the call opted out of both) and the cached response, if any
+        """
+        if not use_cache or is_cache_disabled():
+            if self.cache is not None:
+                self.cache.record_bypass()
+            return None, None
+        if self.cache is None and self.coalescer is None:
+            return None, None
+
+        cache_key = ResponseCache.make_key(self.model_name, prompt, template, json_mode)
+        if self.cache is None:
+            return cache_key, None
+        if is_cache_read_skipped():
+            self.cache.record_bypass()
+            return cache_key, None
+        return cache_key, self.cache.get(cache_key)
+
+    def _invoke(self, cache_key: Optional[str], chain: Runnable, chain_input: Any) -> str:
+        """Call the model and cache the response"""
+        response = self._call(chain, chain_input)
+        self._store(cache_key, response)
+        return response
+
+    async def _ainvoke(self, cache_key: Optional[str], chain: Runnable, chain_input: Any) -> str:
+        """Asynchronous variant of _invoke"""
+        response = await self._acall(chain, chain_input)
+        self._store(cache_key, response)
+        return response
+
+    def _call(self, chain: Runnable, chain_input: Any) -> str:
+        """Call the chain under the scheduler, with deadline, retries and circuit breaker when configured"""
+        with _CallMetrics(self.model_name, chain_input) as metrics, span("llm.call", model=self.model_name):
+            def attempt():
+                with span("llm.attempt"):
+                    return chain.invoke(chain_input, metrics.config)
+
+            if self.resilience is None:
+                with self._slot():
+                    metrics.output = attempt()
+            else:
+                # The slot is taken outside the attempt so queueing is not timed as provider latency
+                metrics.output = self.resilience.call(attempt, admit=self._slot)
+            return metrics.output
+
+    async def _acall(self, chain: Runnable, chain_input: Any) -> str:
+        """Asynchronous variant of _call"""
+        with _CallMetrics(self.model_name, chain_input) as metrics, span("llm.call", model=self.model_name):
+            async def attempt():
+                with span("llm.attempt"):
+                    return await chain.ainvoke(chain_input, metrics.config)
+
+            if self.resilience is None:
+                async with self._aslot():
+                    metrics.output = await attempt()
+            else:
+                metrics.output = await self.resilience.acall(attempt, admit=self._aslot)
+            return metrics.output
+
+    def _slot(self):
+        """Wait for a scheduler slot for the current model (no-op without a scheduler)"""
+        if self.scheduler is None:
+            return nullcontext()
+        return self.scheduler.slot(self.model_name)
+
+    def _aslot(self):
+        """Asynchronous variant of _slot"""
+        if self.scheduler is None:
+            # nullcontext only supports async with from Python 3.10
+            return _no_slot()
+        return self.scheduler.aslot(self.model_name)
+
+    def _scheduled(self, chain: Runnable) -> Runnable:
+        """Wrap a chain so every item of a batch goes through _call on its own"""
+        return RunnableLambda(
+            lambda chain_input: self._call(chain, chain_input),
+            afunc=lambda chain_input: self._acall(chain, chain_input)
+        )
+
+    def _store(self, cache_key: Optional[str], response: str) -> None:
+        if cache_key is not None and self.cache is not None:
+            self.cache.set(cache_key, response)
+
+    def _build_chain(self, prompt: str, template: Optional[str], json_mode: bool = False) -> Tuple[Runnable, Any]:
+        """Return the compiled chain and its input for a prompt"""
+        chain = self._chains[json_mode]
+        if not template:
+            return chain, prompt
+
+        key = (template, json_mode)
+        template_chain = self._template_chains.get(key)
+        if template_chain is None:
+            template_chain = PromptTemplate.from_template(template) | chain
+            if len(self._template_chains) < MAX_TEMPLATE_CHAINS:
+                self._template_chains[key] = template_chain
+        return template_chain, {"prompt": prompt}
+
+    def warm_up(self) -> Dict[str, Any]:
+        """
+        Prepare this worker for its first request.
+
+        Sends one tiny JSON-mode request through the compiled chain, so the
+        provider client, its connections and LangChain's lazily loaded
+        callback and tracing modules are set up before the worker takes
+        traffic. A failed call is reported rather than raised; the worker
+        still starts and the circuit breaker takes over.
+
+        Returns:
+            Seconds spent and the error of the warm-up call, if any
+        """
+        started = time.perf_counter()
+        error = None
+        try:
+            with llm_operation("warmup"):
+                self._call(self._chains[True], WARMUP_PROMPT)
+        except Exception as e:
+            error = str(e)
+        return {"seconds": round(time.perf_counter() - started, 3), "error": error}
+
+    @property
+    def model_name(self) -> str:
+        """Name of the current model, used to scope cache entries"""
+        return (getattr(self.llm, "model", None)
+                or getattr(self.llm, "model_name", None)
+                or type(self.llm).__name__)
+
     def update_llm(self, new_llm: BaseLanguageModel) -> None:
         """Update the LLM instance"""
-        self.llm = new_llm 
\ No newline at end of file
+        self.llm = new_llm
+        self._compile()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return runtime statistics for the LLM service"""
+        return {
+            "model": self.model_name,
+            "pool": self.llm.stats() if isinstance(self.llm, LLMPool) else None,
+            "cache": self.cache.stats() if self.cache is not None else None,
+            "coalescing": self.coalescer.stats() if self.coalescer is not None else None,
+            "prompt_tokens": self.compactor.stats() if self.compactor is not None else None,
+            "scheduler": self.scheduler.stats() if self.scheduler is not None else None,
+            "resilience": self.resilience.stats() if self.resilience is not None else None,
+            "validation": self.repair.stats() if self.repair is not None else None
+        }
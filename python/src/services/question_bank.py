@@ -0,0 +1,338 @@
+import json
+import os
+import random
+import re
+import sqlite3
+import threading
+import zlib
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Any, List, Optional, Set, Tuple
+import numpy as np
+from .quiz_shards import DIFFICULTY_BANDS, QUIZ_SIZE, band_targets
+
+_MERSENNE_PRIME = (1 << 31) - 1
+_NON_WORD = re.compile(r"[^a-z0-9+#_]+")
+
+
+class MinHasher:
+    """
+    MinHash signatures of character shingles.
+
+    The share of equal signature positions estimates the Jaccard similarity
+    of two texts' shingle sets, so rewordings that keep most of the text are
+    recognized without comparing every pair of questions.
+    """
+
+    def __init__(self, num_perm: int = 128, shingle_size: int = 4, seed: int = 1):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, _MERSENNE_PRIME, size=num_perm).astype(np.uint64)
+        self._b = rng.randint(0, _MERSENNE_PRIME, size=num_perm).astype(np.uint64)
+
+    def shingles(self, text: str) -> Set[str]:
+        normalized = _NON_WORD.sub(" ", text.lower()).strip()
+        if len(normalized) <= self.shingle_size:
+            return {normalized}
+        return {normalized[i:i + self.shingle_size] for i in range(len(normalized) - self.shingle_size + 1)}
+
+    def signature(self, text: str) -> np.ndarray:
+        # crc32 is stable across processes, unlike hash(); reduced below the
+        # prime so a * h + b stays within uint64
+        hashes = np.fromiter((zlib.crc32(shingle.encode("utf-8")) % _MERSENNE_PRIME for shingle in self.shingles(text)),
+                             dtype=np.uint64)
+        return ((np.outer(hashes, self._a) + self._b) % _MERSENNE_PRIME).min(axis=0).astype(np.uint32)
+
+    @staticmethod
+    def similarity(first: np.ndarray, second: np.ndarray) -> float:
+        return float(np.mean(first == second))
+
+
+class _LanguageBank:
+    """Questions of one language with their difficulty, topic and LSH indexes"""
+
+    def __init__(self):
+        self.questions: List[Dict[str, Any]] = []
+        self.signatures: List[np.ndarray] = []
+        self.by_difficulty: Dict[str, List[int]] = defaultdict(list)
+        self.by_topic: Dict[str, List[int]] = defaultdict(list)
+        self.buckets: Dict[Tuple[int, bytes], List[int]] = defaultdict(list)
+
+
+class QuestionBank:
+    """
+    Per-language bank of generated quiz questions.
+
+    Every generated question is added unless a near-duplicate is already
+    banked: candidates come from locality-sensitive hashing of MinHash
+    signatures (bands of rows), and are confirmed by estimated Jaccard
+    similarity. Questions are indexed by difficulty and topic.
+
+    Once every difficulty band of a language holds min_per_band questions,
+    quizzes are assembled from the bank with the same difficulty mix as a
+    generated quiz, spreading each band across as many topics as possible.
+
+    While a band holds fewer than target_per_band questions, serving a quiz
+    from the bank schedules `grow` for the language in the background (one
+    run per language at a time), so the LLM is only used to widen coverage.
+
+    Questions live in memory; with a path they are also written to a
+    SQLite file that every worker process on the host reads new questions
+    from, so the bank survives restarts.
+    """
+
+    def __init__(self,
+                 grow: Optional[Callable[[str], Any]] = None,
+                 path: Optional[str] = None,
+                 quiz_size: int = QUIZ_SIZE,
+                 min_per_band: int = 20,
+                 target_per_band: int = 60,
+                 threshold: float = 0.7,
+                 num_perm: int = 128,
+                 bands: int = 32,
+                 workers: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of the number of LSH bands")
+        self.mix = band_targets(quiz_size, DIFFICULTY_BANDS)
+        self.min_per_band = min_per_band
+        self.target_per_band = max(target_per_band, min_per_band)
+        self.threshold = threshold
+        self.hasher = MinHasher(num_perm)
+        self._bands = bands
+        self._rows = num_perm // bands
+        self._banks: Dict[str, _LanguageBank] = defaultdict(_LanguageBank)
+        self._lock = threading.Lock()
+        self._counters = {"added": 0, "duplicates": 0, "assembled": 0, "growth_runs": 0, "growth_failures": 0}
+        self._last_error: Optional[str] = None
+        self.grow = grow
+        self._growing: Set[str] = set()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="question-bank") if grow else None
+        self.path = path
+        self._synced_id = 0
+        self._own_ids: Set[int] = set()
+        self._local = threading.local()
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            conn = self._connection()
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS question_bank ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, language TEXT NOT NULL, "
+                "difficulty TEXT NOT NULL, topic TEXT NOT NULL, question TEXT NOT NULL)"
+            )
+            self._sync()
+
+    @classmethod
+    def from_env(cls, grow: Optional[Callable[[str], Any]] = None) -> Optional["QuestionBank"]:
+        """
+        Build a question bank from environment variables.
+
+        Args:
+            grow: Generates (and banks) a new quiz for a language
+
+        Returns:
+            A QuestionBank, or None when QUESTION_BANK_ENABLED is false
+        """
+        if os.getenv("QUESTION_BANK_ENABLED", "True").lower() != "true":
+            return None
+        return cls(
+            grow,
+            path=os.getenv("QUESTION_BANK_PATH") or None,
+            min_per_band=int(os.getenv("QUESTION_BANK_MIN_PER_BAND", 20)),
+            target_per_band=int(os.getenv("QUESTION_BANK_TARGET_PER_BAND", 60)),
+            threshold=float(os.getenv("QUESTION_BANK_DUPLICATE_THRESHOLD", 0.7)),
+            workers=int(os.getenv("QUESTION_BANK_GROW_WORKERS", 1))
+        )
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections must not be shared between threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            self._local.conn = conn
+        return conn
+
+    def add(self, language: str, questions: List[Dict[str, Any]]) -> int:
+        """
+        Bank the questions of a generated quiz.
+
+        Args:
+            language: Programming language of the quiz
+            questions: Generated questions
+
+        Returns:
+            Number of questions added; malformed ones and near-duplicates are skipped
+        """
+        if self.path:
+            self._sync()
+        added = 0
+        with self._lock:
+            key = self._key(language)
+            bank = self._banks[key]
+            for question in questions:
+                if not self._is_valid(question):
+                    continue
+                difficulty = str(question.get("difficulty", "")).strip().lower()
+                if difficulty not in self.mix:
+                    difficulty = "moderate"
+                signature = self.hasher.signature(question["text"])
+                if self._has_duplicate(bank, signature):
+                    self._counters["duplicates"] += 1
+                    continue
+                topic = str(question.get("topic") or "general").strip().lower()
+                entry = dict(question, difficulty=difficulty, topic=topic)
+                self._index(bank, entry, signature)
+                added += 1
+                if self.path:
+                    # Written under the lock so _sync never sees our row before it is marked as ours
+                    cursor = self._connection().execute(
+                        "INSERT INTO question_bank (language, difficulty, topic, question) VALUES (?, ?, ?, ?)",
+                        (key, difficulty, topic, json.dumps(entry))
+                    )
+                    self._own_ids.add(cursor.lastrowid)
+            self._counters["added"] += added
+        return added
+
+    def assemble(self, language: str) -> Optional[Dict[str, Any]]:
+        """
+        Assemble a quiz from banked questions.
+
+        Returns:
+            A quiz in the shape of QuizService.create_quiz, or None while a
+            difficulty band holds fewer than min_per_band questions
+        """
+        if self.path:
+            self._sync()
+        with self._lock:
+            bank = self._banks.get(self._key(language))
+            if bank is None or not self._ready(bank):
+                return None
+            questions = []
+            for band, count in self.mix.items():
+                questions.extend(dict(bank.questions[index]) for index in self._pick(bank, band, count))
+            self._counters["assembled"] += 1
+        return {
+            "language": language,
+            "total_questions": len(questions),
+            "questions": questions
+        }
+
+    def needs_growth(self, language: str) -> bool:
+        """Whether a band of the language holds fewer than target_per_band questions"""
+        with self._lock:
+            bank = self._banks.get(self._key(language))
+            return bank is None or any(len(bank.by_difficulty[band]) < self.target_per_band for band in self.mix)
+
+    def _ready(self, bank: _LanguageBank) -> bool:
+        # A band can never supply fewer questions than its share of the quiz
+        return all(len(bank.by_difficulty[band]) >= max(self.min_per_band, count) for band, count in self.mix.items())
+
+    def request_growth(self, language: str) -> None:
+        """Schedule a background run of grow for the language unless it is covered or already growing"""
+        if self.grow is None or not self.needs_growth(language):
+            return
+        key = self._key(language)
+        with self._lock:
+            if key in self._growing:
+                return
+            self._growing.add(key)
+        self._executor.submit(self._run_growth, language, key)
+
+    def _run_growth(self, language: str, key: str) -> None:
+        try:
+            self.grow(language)
+            failed = None
+        except Exception as e:
+            failed = str(e)
+        with self._lock:
+            self._growing.discard(key)
+            self._counters["growth_runs"] += 1
+            if failed is not None:
+                self._counters["growth_failures"] += 1
+                self._last_error = failed
+
+    def _pick(self, bank: _LanguageBank, band: str, count: int) -> List[int]:
+        """Random questions of a band, taking one per topic before repeating a topic"""
+        by_topic: Dict[str, List[int]] = defaultdict(list)
+        for index in bank.by_difficulty[band]:
+            by_topic[bank.questions[index]["topic"]].append(index)
+        for indexes in by_topic.values():
+            random.shuffle(indexes)
+        topics = list(by_topic.values())
+        random.shuffle(topics)
+        picked = []
+        while len(picked) < count:
+            for indexes in topics:
+                if indexes and len(picked) < count:
+                    picked.append(indexes.pop())
+        return picked
+
+    def _has_duplicate(self, bank: _LanguageBank, signature: np.ndarray) -> bool:
+        candidates = set()
+        for band_key in self._band_keys(signature):
+            candidates.update(bank.buckets.get(band_key, ()))
+        return any(self.hasher.similarity(signature, bank.signatures[index]) >= self.threshold for index in candidates)
+
+    def _index(self, bank: _LanguageBank, entry: Dict[str, Any], signature: np.ndarray) -> None:
+        index = len(bank.questions)
+        bank.questions.append(entry)
+        bank.signatures.append(signature)
+        bank.by_difficulty[entry["difficulty"]].append(index)
+        bank.by_topic[entry["topic"]].append(index)
+        for band_key in self._band_keys(signature):
+            bank.buckets[band_key].append(index)
+
+    def _band_keys(self, signature: np.ndarray) -> List[Tuple[int, bytes]]:
+        return [(band, signature[band * self._rows:(band + 1) * self._rows].tobytes()) for band in range(self._bands)]
+
+    def _sync(self) -> None:
+        """Index questions other workers added to the SQLite file since the last sync"""
+        rows = self._connection().execute(
+            "SELECT id, language, question FROM question_bank WHERE id > ? ORDER BY id", (self._synced_id,)
+        ).fetchall()
+        if not rows:
+            return
+        with self._lock:
+            for row_id, language, payload in rows:
+                if row_id <= self._synced_id:
+                    continue
+                self._synced_id = row_id
+                if row_id in self._own_ids:
+                    # Added by this process; already indexed
+                    self._own_ids.discard(row_id)
+                    continue
+                entry = json.loads(payload)
+                self._index(self._banks[language], entry, self.hasher.signature(entry["text"]))
+
+    def stats(self) -> Dict[str, Any]:
+        """Return banked questions per language and difficulty, topic counts and counters"""
+        with self._lock:
+            languages = {
+                language: {
+                    "questions": len(bank.questions),
+                    "by_difficulty": {band: len(bank.by_difficulty[band]) for band in self.mix},
+                    "topics": len(bank.by_topic),
+                    "ready": self._ready(bank)
+                }
+                for language, bank in self._banks.items()
+            }
+            return {
+                **self._counters,
+                "min_per_band": self.min_per_band,
+                "target_per_band": self.target_per_band,
+                "growing": sorted(self._growing),
+                "last_error": self._last_error,
+                "languages": languages
+            }
+
+    @staticmethod
+    def _key(language: str) -> str:
+        return language.strip().lower()
+
+    @staticmethod
+    def _is_valid(question: Any) -> bool:
+        return (isinstance(question, dict)
+                and isinstance(question.get("text"), str) and question["text"].strip() != ""
+                and isinstance(question.get("options"), list) and len(question["options"]) >= 2
+                and "correct_answer" in question)
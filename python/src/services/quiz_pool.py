@@ -0,0 +1,173 @@
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Any, Iterable, Optional
+
+
+class _LanguagePool:
+    """Ready-made quizzes and counters for a single language"""
+
+    def __init__(self, language: str):
+        self.language = language
+        self.quizzes: deque = deque()
+        self.refilling = False
+        self.hits = 0
+        self.misses = 0
+        self.generated = 0
+        self.failures = 0
+        self.total_refill_seconds = 0.0
+        self.last_refill_seconds: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+
+class QuizPool:
+    """
+    Per-language pool of pre-generated quizzes.
+
+    Requests pop a ready quiz in O(1). Whenever a pool drops below the low
+    watermark, a background worker refills it up to the high watermark.
+    """
+
+    def __init__(self,
+                 generate: Callable[[str], Dict[str, Any]],
+                 languages: Iterable[str],
+                 low_watermark: int = 2,
+                 high_watermark: int = 5,
+                 workers: int = 2):
+        if high_watermark < 1 or low_watermark < 0 or low_watermark > high_watermark:
+            raise ValueError("Quiz pool watermarks must satisfy 0 <= low <= high and high >= 1")
+
+        self.generate = generate
+        self.low_watermark = low_watermark
+        self.high_watermark = high_watermark
+        self._pools = {self._key(language): _LanguagePool(language) for language in languages}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="quiz-pool")
+        self._stopped = False
+
+    @classmethod
+    def from_env(cls, generate: Callable[[str], Dict[str, Any]]) -> Optional["QuizPool"]:
+        """
+        Build a pool from environment variables.
+
+        Returns:
+            A QuizPool, or None when QUIZ_POOL_LANGUAGES is not set
+        """
+        languages = [lang.strip() for lang in os.getenv("QUIZ_POOL_LANGUAGES", "").split(",") if lang.strip()]
+        if not languages:
+            return None
+
+        return cls(
+            generate,
+            languages,
+            low_watermark=int(os.getenv("QUIZ_POOL_LOW_WATERMARK", 2)),
+            high_watermark=int(os.getenv("QUIZ_POOL_HIGH_WATERMARK", 5)),
+            workers=int(os.getenv("QUIZ_POOL_WORKERS", 2))
+        )
+
+    @staticmethod
+    def _key(language: str) -> str:
+        return language.strip().lower()
+
+    def start(self) -> None:
+        """Schedule the initial fill for every pooled language"""
+        for pool in self._pools.values():
+            self._schedule_refill(pool)
+
+    def stop(self) -> None:
+        """Stop scheduling refills and shut down the workers"""
+        self._stopped = True
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def pop(self, language: str) -> Optional[Dict[str, Any]]:
+        """
+        Take a ready quiz for a language.
+
+        Args:
+            language: Programming language of the quiz
+
+        Returns:
+            A pre-generated quiz, or None if the pool is empty or the language is not pooled
+        """
+        pool = self._pools.get(self._key(language))
+        if pool is None:
+            return None
+
+        # Popping and deciding on a refill under one lock means a pop cannot
+        # slip between a refill's last depth check and it clearing the flag
+        with self._lock:
+            quiz = pool.quizzes.popleft() if pool.quizzes else None
+            if quiz is None:
+                pool.misses += 1
+            else:
+                pool.hits += 1
+            refill = len(pool.quizzes) < self.low_watermark and self._claim_refill(pool)
+
+        if refill:
+            self._executor.submit(self._refill, pool)
+        return quiz
+
+    def _claim_refill(self, pool: _LanguagePool) -> bool:
+        """Mark a pool as refilling unless it already is; call with the lock held"""
+        if pool.refilling or self._stopped:
+            return False
+        pool.refilling = True
+        return True
+
+    def _schedule_refill(self, pool: _LanguagePool) -> None:
+        with self._lock:
+            if not self._claim_refill(pool):
+                return
+        self._executor.submit(self._refill, pool)
+
+    def _refill(self, pool: _LanguagePool) -> None:
+        """Generate quizzes until the pool reaches the high watermark"""
+        while True:
+            with self._lock:
+                if self._stopped or len(pool.quizzes) >= self.high_watermark:
+                    pool.refilling = False
+                    return
+
+            start = time.perf_counter()
+            try:
+                quiz = self.generate(pool.language)
+            except Exception as e:
+                with self._lock:
+                    pool.failures += 1
+                    pool.last_error = str(e)
+                    # Leave the pool as is; the next pop below the low watermark retries
+                    pool.refilling = False
+                return
+
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                pool.quizzes.append(quiz)
+                pool.generated += 1
+                pool.total_refill_seconds += elapsed
+                pool.last_refill_seconds = elapsed
+
+    def stats(self) -> Dict[str, Any]:
+        """Return pool depth, refill latency and miss rate per language"""
+        languages = {}
+        with self._lock:
+            for pool in self._pools.values():
+                requests = pool.hits + pool.misses
+                languages[pool.language] = {
+                    "depth": len(pool.quizzes),
+                    "refilling": pool.refilling,
+                    "hits": pool.hits,
+                    "misses": pool.misses,
+                    "miss_rate": round(pool.misses / requests, 4) if requests else 0.0,
+                    "generated": pool.generated,
+                    "failures": pool.failures,
+                    "last_error": pool.last_error,
+                    "avg_refill_seconds": round(pool.total_refill_seconds / pool.generated, 3) if pool.generated else None,
+                    "last_refill_seconds": round(pool.last_refill_seconds, 3) if pool.last_refill_seconds is not None else None
+                }
+        return {
+            "low_watermark": self.low_watermark,
+            "high_watermark": self.high_watermark,
+            "languages": languages
+        }
@@ -1,146 +1,405 @@
 import json
-from typing import Dict, List, Any
+from functools import partial
+from typing import Dict, List, Any, Optional
 from ..services.llm_service import LLMService
+from ..utils.fanout import fan_out, afan_out, FanOutResult
+from ..utils.json_parser import parse_json_response
+from ..utils.llm_errors import LLMUnavailableError
+from ..utils.tracing import traced
+from ..services.quiz_pool import QuizPool
+from ..services.quiz_store import QuizAnswerStore, UnknownQuizError
+from ..services.quiz_shards import QuizSharder, ShardedQuiz
+from ..services.question_bank import QuestionBank
+from ..prompts.quiz_prompts import GENERATE_QUIZ, GENERATE_QUIZ_SHARD, ENRICH_FEEDBACK, EVALUATE_QUIZ
+
+# Minimum score percentage for each skill level, checked in order
+SKILL_LEVEL_THRESHOLDS = [(80.0, "advanced"), (50.0, "moderate"), (0.0, "beginner")]
 
 class QuizService:
     """Service for generating and evaluating programming language quizzes"""
     
-    def __init__(self, llm_service: LLMService):
+    def __init__(self,
+                 llm_service: LLMService,
+                 answer_store: Optional[QuizAnswerStore] = None,
+                 sharder: Optional[QuizSharder] = None):
         self.llm_service = llm_service
+        self.answer_store = answer_store or QuizAnswerStore()
+        self.sharder = sharder
+        self.pool: Optional[QuizPool] = None
+        self.bank: Optional[QuestionBank] = None
+    
+    def use_pool(self, pool: QuizPool) -> None:
+        """Serve quizzes from a pre-generated pool and start filling it"""
+        self.pool = pool
+        pool.start()
+    
+    def use_bank(self, bank: QuestionBank) -> None:
+        """Bank every generated question and assemble quizzes from the bank once it covers a language"""
+        self.bank = bank
     
+    @traced()
     def generate_language_quiz(self, language: str) -> Dict[str, Any]:
         """
-        Generate a quiz for a specific programming language
+        Get a quiz for a specific programming language, preferring the pool,
+        then the question bank, then a newly generated quiz
         
         Args:
             language: Programming language for the quiz
             
         Returns:
-            A dictionary containing quiz questions and details
+            A dictionary containing the quiz id, quiz questions and details
         """
-        # Prompt for generating quiz questions with explicit JSON formatting
-        template = f"""
-        Generate a comprehensive {language} programming quiz with 20 questions 
-        that test knowledge from beginner to advanced levels. 
+        quiz = self.pool.pop(language) if self.pool is not None else None
+        if quiz is None:
+            quiz = self._assemble_from_bank(language)
+        if quiz is None:
+            # Pool empty and bank short of questions, or neither configured: generate synchronously
+            quiz = self.create_quiz(language)
+        return self._register_quiz(language, quiz)
+    
+    @traced()
+    async def agenerate_language_quiz(self, language: str) -> Dict[str, Any]:
+        """Asynchronous variant of generate_language_quiz"""
+        quiz = self.pool.pop(language) if self.pool is not None else None
+        if quiz is None:
+            quiz = self._assemble_from_bank(language)
+        if quiz is None:
+            quiz = await self.acreate_quiz(language)
+        return self._register_quiz(language, quiz)
+    
+    def _assemble_from_bank(self, language: str) -> Optional[Dict[str, Any]]:
+        """Assemble a quiz from banked questions, growing the bank in the background while it is small"""
+        if self.bank is None:
+            return None
+        quiz = self.bank.assemble(language)
+        if quiz is not None:
+            self.bank.request_growth(language)
+        return quiz
+    
+    def _bank_quiz(self, quiz: Dict[str, Any]) -> Dict[str, Any]:
+        """Add a generated quiz's questions to the bank"""
+        if self.bank is not None:
+            self.bank.add(quiz['language'], quiz['questions'])
+        return quiz
+    
+    def _register_quiz(self, language: str, quiz: Dict[str, Any]) -> Dict[str, Any]:
+        """Keep the answer key server-side so evaluation can be scored locally"""
+        quiz_id = self.answer_store.save(language, quiz['questions'])
+        return dict(quiz, language=language, quiz_id=quiz_id)
+    
+    @traced()
+    def create_quiz(self, language: str, use_cache: bool = True) -> Dict[str, Any]:
+        """
+        Generate a new quiz for a specific programming language using the LLM
         
-        Provide the response in the following strict JSON format:
-        {{
-            "questions": [
-                {{
-                    "text": "Question text here",
-                    "options": ["Option A", "Option B", "Option C", "Option D"],
-                    "correct_answer": "Correct option",
-                    "difficulty": "beginner/moderate/advanced",
-                    "explanation": "Brief explanation of the correct answer"
-                }},
-                ... (19 more questions)
-            ]
-        }}
-
-        Ensure:
-        1. Exactly 20 questions
-        2. Four multiple-choice options for each question
-        3. Clear, concise language
-        4. Varied difficulty levels
-        5. Relevant to {language} programming
+        Args:
+            language: Programming language for the quiz
+            use_cache: Whether a cached LLM response may be reused
+            
+        Returns:
+            A dictionary containing quiz questions and details
         """
+        if self.sharder is not None:
+            return self._bank_quiz(self._create_sharded_quiz(language, use_cache))
         
         try:
             # Generate quiz using LLM with explicit JSON request
-            quiz_json_str = self.llm_service.generate_response(
-                prompt=template, 
-                template="{prompt}"
+            quiz_data = self.llm_service.generate_structured(
+                GENERATE_QUIZ,
+                {"language": language},
+                use_cache=use_cache
             )
-            
-            # Safely parse the JSON
-            try:
-                quiz_data = json.loads(quiz_json_str)
-            except json.JSONDecodeError:
-                # If JSON parsing fails, try to extract JSON from the response
-                # This handles cases where the LLM might include additional text
-                import re
-                json_match = re.search(r'\{.*\}', quiz_json_str, re.DOTALL)
-                if json_match:
-                    quiz_data = json.loads(json_match.group(0))
-                else:
-                    raise ValueError("Could not extract valid JSON from response")
-            
-            # Validate the quiz data
-            if not isinstance(quiz_data, dict) or 'questions' not in quiz_data:
-                raise ValueError("Invalid quiz structure")
-            
-            return {
-                "language": language,
-                "total_questions": len(quiz_data['questions']),
-                "questions": quiz_data['questions']
-            }
+            return self._bank_quiz(self._quiz_result(language, quiz_data))
+        except LLMUnavailableError:
+            raise
+        except Exception as e:
+            raise ValueError(f"Failed to generate quiz: {str(e)}")
+    
+    @traced()
+    async def acreate_quiz(self, language: str, use_cache: bool = True) -> Dict[str, Any]:
+        """Asynchronous variant of create_quiz"""
+        if self.sharder is not None:
+            return self._bank_quiz(await self._acreate_sharded_quiz(language, use_cache))
+        
+        try:
+            quiz_data = await self.llm_service.agenerate_structured(
+                GENERATE_QUIZ,
+                {"language": language},
+                use_cache=use_cache
+            )
+            return self._bank_quiz(self._quiz_result(language, quiz_data))
+        except LLMUnavailableError:
+            raise
         except Exception as e:
             raise ValueError(f"Failed to generate quiz: {str(e)}")
     
-    def evaluate_quiz(self, language: str, responses: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def _create_sharded_quiz(self, language: str, use_cache: bool) -> Dict[str, Any]:
+        """Generate the quiz as concurrent per-difficulty shards, then top up bands left short"""
+        quiz = self.sharder.start(language)
+        errors: Dict[str, BaseException] = {}
+        for _ in range(1 + self.sharder.top_up_rounds):
+            requests = quiz.pending()
+            if not requests:
+                break
+            outcome = fan_out({
+                band: partial(self.llm_service.generate_from_prompt, GENERATE_QUIZ_SHARD, variables, use_cache=use_cache)
+                for band, variables in requests.items()
+            })
+            self._merge_shards(quiz, outcome, errors)
+        return self._sharded_result(quiz, errors)
+    
+    async def _acreate_sharded_quiz(self, language: str, use_cache: bool) -> Dict[str, Any]:
+        """Asynchronous variant of _create_sharded_quiz"""
+        quiz = self.sharder.start(language)
+        errors: Dict[str, BaseException] = {}
+        for _ in range(1 + self.sharder.top_up_rounds):
+            requests = quiz.pending()
+            if not requests:
+                break
+            outcome = await afan_out({
+                band: partial(self.llm_service.agenerate_from_prompt, GENERATE_QUIZ_SHARD, variables, use_cache=use_cache)
+                for band, variables in requests.items()
+            })
+            self._merge_shards(quiz, outcome, errors)
+        return self._sharded_result(quiz, errors)
+    
+    def _merge_shards(self, quiz: ShardedQuiz, outcome: FanOutResult, errors: Dict[str, BaseException]) -> None:
+        """Add each finished shard's questions; failed or unparsable shards are topped up in the next round"""
+        errors.update(outcome.exceptions)
+        # In band order rather than completion order, so a question repeated
+        # across shards is always kept in the easier band
+        for band in quiz.targets:
+            if band not in outcome.results:
+                continue
+            shard_json_str = outcome.results[band]
+            try:
+                shard = parse_json_response(shard_json_str)
+            except ValueError as e:
+                errors[band] = e
+                continue
+            quiz.add(band, shard.get('questions') if isinstance(shard, dict) else None)
+    
+    def _sharded_result(self, quiz: ShardedQuiz, errors: Dict[str, BaseException]) -> Dict[str, Any]:
+        """Return the merged quiz; fails only when no shard produced a question"""
+        questions = quiz.questions
+        if not questions:
+            rejected = [e for e in errors.values() if isinstance(e, LLMUnavailableError)]
+            if rejected:
+                raise rejected[0]
+            raise ValueError(f"Failed to generate quiz: {'; '.join(str(e) for e in errors.values()) or 'no valid questions'}")
+        return {
+            "language": quiz.language,
+            "total_questions": len(questions),
+            "questions": questions
+        }
+    
+    def _quiz_result(self, language: str, quiz_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Shape a validated quiz generation response"""
+        return {
+            "language": language,
+            "total_questions": len(quiz_data['questions']),
+            "questions": quiz_data['questions']
+        }
+    
+    @traced()
+    def evaluate_quiz(self,
+                      language: str,
+                      responses: List[Dict[str, Any]],
+                      quiz_id: Optional[str] = None,
+                      enrich_feedback: bool = False) -> Dict[str, Any]:
         """
         Evaluate user's quiz responses
         
+        Quizzes with a known quiz id are scored locally against the stored
+        answer key; anything else falls back to LLM evaluation.
+        
         Args:
             language: Programming language of the quiz
             responses: List of user's quiz responses
+            quiz_id: Id returned by generate_language_quiz
+            enrich_feedback: Ask the LLM for richer explanations of wrong answers
             
         Returns:
             Evaluation results with score and level
+            
+        Raises:
+            UnknownQuizError: If the quiz id is unknown or expired and no language was given
         """
-        # Prompt for evaluating quiz responses with explicit JSON formatting
-        template = f"""
-        Evaluate the following {language} programming quiz responses:
-        Responses: {json.dumps(responses)}
+        answer_key = self._answer_key(language, quiz_id)
+        if answer_key is None:
+            return self._evaluate_with_llm(language, responses)
         
-        Provide the evaluation in the following strict JSON format:
-        {{
-            "total_questions": 20,
-            "correct_answers": 0,
-            "score_percentage": 0.0,
-            "skill_level": "beginner/moderate/advanced",
-            "detailed_feedback": [
-                {{
-                    "question": "Question text",
-                    "user_answer": "User's answer",
-                    "correct_answer": "Correct answer",
-                    "is_correct": true/false,
-                    "explanation": "Detailed explanation"
-                }},
-                ... (more detailed feedback)
-            ]
-        }}
+        evaluation = self.score_quiz(answer_key, responses)
+        if enrich_feedback:
+            items = self._enrichment_items(evaluation['detailed_feedback'])
+            if items:
+                try:
+                    feedback_json_str = self.llm_service.generate_from_prompt(
+                        ENRICH_FEEDBACK,
+                        {"language": answer_key['language'], "items": json.dumps(items)}
+                    )
+                    self._apply_enrichment(evaluation['detailed_feedback'], feedback_json_str)
+                except Exception:
+                    # Enrichment is best effort; the locally computed score stands
+                    pass
+        return evaluation
+    
+    @traced()
+    async def aevaluate_quiz(self,
+                             language: str,
+                             responses: List[Dict[str, Any]],
+                             quiz_id: Optional[str] = None,
+                             enrich_feedback: bool = False) -> Dict[str, Any]:
+        """Asynchronous variant of evaluate_quiz"""
+        answer_key = self._answer_key(language, quiz_id)
+        if answer_key is None:
+            return await self._aevaluate_with_llm(language, responses)
         
-        Ensure:
-        1. Accurate scoring
-        2. Detailed feedback for each question
-        3. Clear skill level assessment
+        evaluation = self.score_quiz(answer_key, responses)
+        if enrich_feedback:
+            items = self._enrichment_items(evaluation['detailed_feedback'])
+            if items:
+                try:
+                    feedback_json_str = await self.llm_service.agenerate_from_prompt(
+                        ENRICH_FEEDBACK,
+                        {"language": answer_key['language'], "items": json.dumps(items)}
+                    )
+                    self._apply_enrichment(evaluation['detailed_feedback'], feedback_json_str)
+                except Exception:
+                    pass
+        return evaluation
+    
+    def _answer_key(self, language: Optional[str], quiz_id: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Stored answer key for a quiz, or None to evaluate with the LLM"""
+        answer_key = self.answer_store.get(quiz_id) if quiz_id else None
+        if answer_key is None and not language:
+            # An expired id, or one stored by another worker; the LLM cannot evaluate without a language
+            raise UnknownQuizError(f"Unknown or expired quiz_id: {quiz_id}")
+        return answer_key
+    
+    @traced()
+    def score_quiz(self, answer_key: Dict[str, Any], responses: List[Dict[str, Any]]) -> Dict[str, Any]:
         """
+        Score responses against a stored answer key without calling the LLM
         
+        Args:
+            answer_key: Stored answer key from QuizAnswerStore
+            responses: List of user's quiz responses
+            
+        Returns:
+            Evaluation results with score and level
+        """
+        questions = answer_key['questions']
+        answers = _match_responses(questions, responses)
+        
+        detailed_feedback = []
+        correct_answers = 0
+        for question, user_answer in zip(questions, answers):
+            is_correct = user_answer is not None and _is_correct(question, user_answer)
+            correct_answers += is_correct
+            detailed_feedback.append({
+                "question": question['text'],
+                "user_answer": user_answer,
+                "correct_answer": question['correct_answer'],
+                "is_correct": is_correct,
+                "explanation": question['explanation']
+            })
+        
+        total_questions = len(questions)
+        score_percentage = round(correct_answers / total_questions * 100, 2) if total_questions else 0.0
+        skill_level = next(level for threshold, level in SKILL_LEVEL_THRESHOLDS if score_percentage >= threshold)
+        
+        return {
+            "total_questions": total_questions,
+            "correct_answers": correct_answers,
+            "score_percentage": score_percentage,
+            "skill_level": skill_level,
+            "detailed_feedback": detailed_feedback
+        }
+    
+    def _enrichment_items(self, detailed_feedback: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Collect the wrong answers that need richer feedback"""
+        return [
+            {"index": index, "question": item['question'], "user_answer": item['user_answer'], "correct_answer": item['correct_answer']}
+            for index, item in enumerate(detailed_feedback) if not item['is_correct']
+        ]
+    
+    def _apply_enrichment(self, detailed_feedback: List[Dict[str, Any]], feedback_json_str: str) -> None:
+        """Replace explanations of wrong answers with LLM feedback, keeping stored ones otherwise"""
+        try:
+            feedback_data = parse_json_response(feedback_json_str)
+        except ValueError:
+            return
+        
+        for entry in feedback_data.get('feedback', []):
+            index = entry.get('index')
+            if (isinstance(index, int) and 0 <= index < len(detailed_feedback)
+                    and not detailed_feedback[index]['is_correct'] and entry.get('explanation')):
+                detailed_feedback[index]['explanation'] = entry['explanation']
+    
+    def _evaluate_with_llm(self, language: str, responses: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Evaluate responses by asking the LLM, used when no answer key is stored"""
         try:
             # Generate evaluation using LLM with explicit JSON request
-            evaluation_json_str = self.llm_service.generate_response(
-                prompt=template, 
-                template="{prompt}"
+            return self.llm_service.generate_structured(
+                EVALUATE_QUIZ,
+                {"language": language, "responses": json.dumps(responses)}
             )
-            
-            # Safely parse the JSON
-            try:
-                evaluation_data = json.loads(evaluation_json_str)
-            except json.JSONDecodeError:
-                # If JSON parsing fails, try to extract JSON from the response
-                import re
-                json_match = re.search(r'\{.*\}', evaluation_json_str, re.DOTALL)
-                if json_match:
-                    evaluation_data = json.loads(json_match.group(0))
-                else:
-                    raise ValueError("Could not extract valid JSON from response")
-            
-            # Validate the evaluation data
-            required_keys = ['total_questions', 'correct_answers', 'score_percentage', 'skill_level', 'detailed_feedback']
-            if not all(key in evaluation_data for key in required_keys):
-                raise ValueError("Invalid evaluation structure")
-            
-            return evaluation_data
+        except LLMUnavailableError:
+            raise
         except Exception as e:
-            raise ValueError(f"Failed to evaluate quiz: {str(e)}") 
\ No newline at end of file
+            raise ValueError(f"Failed to evaluate quiz: {str(e)}")
+    
+    async def _aevaluate_with_llm(self, language: str, responses: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Asynchronous variant of _evaluate_with_llm"""
+        try:
+            return await self.llm_service.agenerate_structured(
+                EVALUATE_QUIZ,
+                {"language": language, "responses": json.dumps(responses)}
+            )
+        except LLMUnavailableError:
+            raise
+        except Exception as e:
+            raise ValueError(f"Failed to evaluate quiz: {str(e)}")
+
+
+def _normalize(text: Any) -> str:
+    return " ".join(str(text).split()).casefold()
+
+
+def _match_responses(questions: List[Dict[str, Any]], responses: List[Dict[str, Any]]) -> List[Optional[str]]:
+    """
+    Line up user answers with the answer key.
+    
+    Responses are matched by question text, then by an explicit
+    question_index, then by position.
+    """
+    answers: List[Optional[str]] = [None] * len(questions)
+    by_text = {_normalize(question['text']): index for index, question in enumerate(questions)}
+    
+    for position, response in enumerate(responses):
+        if not isinstance(response, dict):
+            continue
+        index = by_text.get(_normalize(response.get('question', '')))
+        if index is None:
+            index = response.get('question_index', position)
+        if isinstance(index, int) and 0 <= index < len(questions) and answers[index] is None:
+            # 'user_answer' is the key LLM evaluation has always accepted
+            answers[index] = response.get('answer', response.get('user_answer'))
+    return answers
+
+
+def _is_correct(question: Dict[str, Any], user_answer: Any) -> bool:
+    """Compare an answer to the key, accepting option text or option letter"""
+    correct = _normalize(question['correct_answer'])
+    answer = _normalize(user_answer)
+    if answer == correct:
+        return True
+    
+    # Accept "B" for the second option
+    options = question.get('options', [])
+    if len(answer) == 1 and answer.isalpha():
+        index = ord(answer) - ord('a')
+        if 0 <= index < len(options):
+            return _normalize(options[index]) == correct
+    return False
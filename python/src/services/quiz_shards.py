@@ -0,0 +1,125 @@
+import os
+from typing import Dict, Any, List, Optional, Sequence
+import numpy as np
+from ..utils.semantic_cache import HashingVectorizer
+
+QUIZ_SIZE = 20
+DIFFICULTY_BANDS = ("beginner", "moderate", "advanced")
+
+# Accepted question texts quoted back to the model when topping up a band
+MAX_AVOID_QUESTIONS = 30
+
+
+def band_targets(total: int = QUIZ_SIZE, bands: Sequence[str] = DIFFICULTY_BANDS) -> Dict[str, int]:
+    """Split a quiz evenly across difficulty bands; earlier (easier) bands take the remainder"""
+    share, remainder = divmod(total, len(bands))
+    return {band: share + (1 if index < remainder else 0) for index, band in enumerate(bands)}
+
+
+class ShardedQuiz:
+    """Questions accepted so far for one sharded quiz, per difficulty band"""
+
+    def __init__(self, language: str, targets: Dict[str, int], vectorizer: HashingVectorizer, duplicate_threshold: float):
+        self.language = language
+        self.targets = targets
+        self.duplicate_threshold = duplicate_threshold
+        self._vectorizer = vectorizer
+        self._questions: Dict[str, List[Dict[str, Any]]] = {band: [] for band in targets}
+        # One row per accepted question; no band accepts beyond its target
+        self._vectors = np.zeros((sum(targets.values()), vectorizer.dim), dtype=np.float32)
+        self._size = 0
+        self.duplicates = 0
+
+    def pending(self) -> Dict[str, Dict[str, Any]]:
+        """Prompt variables for every band that is still short of its target"""
+        requests = {}
+        for band, target in self.targets.items():
+            missing = target - len(self._questions[band])
+            if missing <= 0:
+                continue
+            requests[band] = {
+                "language": self.language,
+                "difficulty": band,
+                "count": missing,
+                "avoid": self._avoid_text()
+            }
+        return requests
+
+    def add(self, band: str, questions: Any) -> None:
+        """Accept a shard's questions, skipping malformed ones, near-duplicates and any beyond the band's target"""
+        if not isinstance(questions, list):
+            return
+        for question in questions:
+            if len(self._questions[band]) >= self.targets[band]:
+                break
+            if not self._is_valid(question):
+                continue
+            vector = self._vectorizer.transform(question["text"])
+            if self._size and float(np.max(self._vectors[:self._size] @ vector)) >= self.duplicate_threshold:
+                self.duplicates += 1
+                continue
+            self._vectors[self._size] = vector
+            self._size += 1
+            self._questions[band].append(dict(question, difficulty=band))
+
+    @property
+    def questions(self) -> List[Dict[str, Any]]:
+        """Accepted questions from beginner to advanced"""
+        return [question for band in self.targets for question in self._questions[band]]
+
+    def _avoid_text(self) -> str:
+        accepted = self.questions
+        if not accepted:
+            return ""
+        listed = "; ".join(question["text"][:120] for question in accepted[-MAX_AVOID_QUESTIONS:])
+        return f"Do not repeat or rephrase any of these existing questions: {listed}"
+
+    @staticmethod
+    def _is_valid(question: Any) -> bool:
+        return (isinstance(question, dict)
+                and isinstance(question.get("text"), str) and question["text"].strip() != ""
+                and isinstance(question.get("options"), list) and len(question["options"]) >= 2
+                and "correct_answer" in question)
+
+
+class QuizSharder:
+    """
+    Plan for generating a quiz as concurrent per-difficulty shards.
+
+    Each band's questions come from a separate, smaller completion, so the
+    quiz takes about as long as its largest shard instead of one completion
+    of every question. Near-duplicate questions across shards are dropped
+    by cosine similarity of hashed text vectors, and bands left short are
+    topped up for up to top_up_rounds extra rounds.
+    """
+
+    def __init__(self,
+                 total: int = QUIZ_SIZE,
+                 bands: Sequence[str] = DIFFICULTY_BANDS,
+                 duplicate_threshold: float = 0.9,
+                 top_up_rounds: int = 1):
+        if total < len(bands):
+            raise ValueError("A sharded quiz needs at least one question per band")
+        self.total = total
+        self.duplicate_threshold = duplicate_threshold
+        self.top_up_rounds = top_up_rounds
+        self.targets = band_targets(total, bands)
+        self._vectorizer = HashingVectorizer()
+
+    @classmethod
+    def from_env(cls) -> Optional["QuizSharder"]:
+        """
+        Build a sharder from environment variables.
+
+        Returns:
+            A QuizSharder, or None when QUIZ_SHARDING is false
+        """
+        if os.getenv("QUIZ_SHARDING", "False").lower() != "true":
+            return None
+        return cls(
+            duplicate_threshold=float(os.getenv("QUIZ_SHARD_DUPLICATE_THRESHOLD", 0.9)),
+            top_up_rounds=int(os.getenv("QUIZ_SHARD_TOP_UP_ROUNDS", 1))
+        )
+
+    def start(self, language: str) -> ShardedQuiz:
+        return ShardedQuiz(language, dict(self.targets), self._vectorizer, self.duplicate_threshold)
@@ -0,0 +1,63 @@
+import hashlib
+import json
+import os
+from typing import Dict, List, Any, Optional, Union
+from ..utils.response_cache import MemoryCache, SQLiteCache
+
+
+class UnknownQuizError(LookupError):
+    """Raised when a quiz id has no stored answer key and no language to fall back on"""
+
+
+class QuizAnswerStore:
+    """
+    Server-side store of answer keys for generated quizzes.
+
+    Keys live in memory by default; setting QUIZ_STORE_PATH keeps them in a
+    SQLite file so every worker process on the host can score any quiz.
+    """
+
+    def __init__(self, backend: Optional[Union[MemoryCache, SQLiteCache]] = None):
+        self.backend = backend or MemoryCache(max_entries=10000, ttl=86400)
+
+    @classmethod
+    def from_env(cls) -> "QuizAnswerStore":
+        ttl = float(os.getenv("QUIZ_STORE_TTL", 86400))
+        path = os.getenv("QUIZ_STORE_PATH")
+        if path:
+            return cls(SQLiteCache(path, ttl=ttl))
+        return cls(MemoryCache(max_entries=int(os.getenv("QUIZ_STORE_MAX_ENTRIES", 10000)), ttl=ttl))
+
+    def save(self, language: str, questions: List[Dict[str, Any]]) -> str:
+        """
+        Store the answer key for a quiz.
+
+        Args:
+            language: Programming language of the quiz
+            questions: Generated questions including correct answers
+
+        Returns:
+            The quiz id, derived from the quiz content
+        """
+        answer_key = {
+            "language": language,
+            "questions": [
+                {
+                    "text": question.get("text", ""),
+                    "options": question.get("options", []),
+                    "correct_answer": question.get("correct_answer", ""),
+                    "explanation": question.get("explanation", "")
+                }
+                for question in questions
+            ]
+        }
+        payload = json.dumps(answer_key, sort_keys=True)
+        # Identical quizzes (e.g. served from the response cache) share one entry
+        quiz_id = hashlib.sha256(payload.encode("utf-8")).hexdigest()[:24]
+        self.backend.set(quiz_id, payload)
+        return quiz_id
+
+    def get(self, quiz_id: str) -> Optional[Dict[str, Any]]:
+        """Return the stored answer key, or None if unknown or expired"""
+        payload = self.backend.get(quiz_id)
+        return json.loads(payload) if payload is not None else None
@@ -0,0 +1,41 @@
+import json
+import os
+from typing import Dict, Any, Optional, Union
+from ..utils.response_cache import MemoryCache, SQLiteCache
+
+
+class ReviewHistory:
+    """
+    Last reviewed submission per session, used for incremental re-reviews.
+
+    Entries live in memory by default; setting REVIEW_HISTORY_PATH keeps
+    them in a SQLite file so every worker process on the host sees them.
+    """
+
+    def __init__(self, backend: Optional[Union[MemoryCache, SQLiteCache]] = None):
+        self.backend = backend or MemoryCache(max_entries=10000, ttl=3600)
+
+    @classmethod
+    def from_env(cls) -> "ReviewHistory":
+        ttl = float(os.getenv("REVIEW_HISTORY_TTL", 3600))
+        path = os.getenv("REVIEW_HISTORY_PATH")
+        if path:
+            return cls(SQLiteCache(path, ttl=ttl))
+        return cls(MemoryCache(max_entries=int(os.getenv("REVIEW_HISTORY_MAX_ENTRIES", 10000)), ttl=ttl))
+
+    def save(self, session_id: str, language: str, code: str, review: Dict[str, Any]) -> None:
+        """
+        Remember the latest reviewed submission of a session.
+
+        Args:
+            session_id: Caller-provided session or user key
+            language: Programming language of the code
+            code: Reviewed code
+            review: Review returned for the code
+        """
+        self.backend.set(session_id, json.dumps({"language": language, "code": code, "review": review}))
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Return the previous submission and review, or None if unknown or expired"""
+        payload = self.backend.get(session_id)
+        return json.loads(payload) if payload is not None else None
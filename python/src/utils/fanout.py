@@ -0,0 +1,104 @@
+import asyncio
+import contextvars
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Awaitable, Callable, Dict, Any, List, Optional
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Return the shared, bounded thread pool used for concurrent LLM calls"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=int(os.getenv("FANOUT_MAX_WORKERS", 16)),
+                    thread_name_prefix="llm-fanout"
+                )
+    return _executor
+
+
+class FanOutResult:
+    """Outcome of a fan-out: results of finished branches plus errors and timeouts"""
+
+    def __init__(self):
+        self.results: Dict[str, Any] = {}
+        self.errors: Dict[str, str] = {}
+        self.exceptions: Dict[str, BaseException] = {}
+        self.timed_out: List[str] = []
+
+    @property
+    def complete(self) -> bool:
+        return not self.errors and not self.timed_out
+
+
+def fan_out(tasks: Dict[str, Callable[[], Any]], deadline: Optional[float] = None) -> FanOutResult:
+    """
+    Run independent calls concurrently on the shared pool.
+
+    Args:
+        tasks: Mapping of branch name to a zero-argument callable
+        deadline: Seconds to wait for all branches; None waits indefinitely
+
+    Returns:
+        FanOutResult with whatever finished before the deadline
+    """
+    executor = get_executor()
+    # Each branch runs in a copy of the caller's context so request-scoped
+    # settings (such as cache opt-out) carry over to the worker threads
+    futures = {
+        executor.submit(contextvars.copy_context().run, task): name
+        for name, task in tasks.items()
+    }
+    done, pending = wait(futures, timeout=deadline)
+
+    outcome = FanOutResult()
+    for future in done:
+        name = futures[future]
+        try:
+            outcome.results[name] = future.result()
+        except Exception as e:
+            outcome.errors[name] = str(e)
+            outcome.exceptions[name] = e
+
+    for future in pending:
+        name = futures[future]
+        future.cancel()
+        outcome.timed_out.append(name)
+        outcome.errors[name] = f"Timed out after {deadline} seconds"
+    return outcome
+
+
+async def afan_out(tasks: Dict[str, Callable[[], Awaitable[Any]]], deadline: Optional[float] = None) -> FanOutResult:
+    """
+    Asynchronous variant of fan_out using asyncio tasks instead of threads.
+
+    Args:
+        tasks: Mapping of branch name to a zero-argument coroutine function
+        deadline: Seconds to wait for all branches; None waits indefinitely
+
+    Returns:
+        FanOutResult with whatever finished before the deadline
+    """
+    futures = {asyncio.ensure_future(task()): name for name, task in tasks.items()}
+    done, pending = await asyncio.wait(futures, timeout=deadline)
+
+    outcome = FanOutResult()
+    for future in done:
+        name = futures[future]
+        try:
+            outcome.results[name] = future.result()
+        except Exception as e:
+            outcome.errors[name] = str(e)
+            outcome.exceptions[name] = e
+
+    for future in pending:
+        name = futures[future]
+        future.cancel()
+        outcome.timed_out.append(name)
+        outcome.errors[name] = f"Timed out after {deadline} seconds"
+    return outcome
@@ -0,0 +1,220 @@
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import Context
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Optional
+from .llm_errors import LLMUnavailableError, QueueFullError
+from .metrics import JOBS_QUEUED, JOBS_RUNNING, JOB_DURATION, JOB_QUEUE_WAIT
+from .response_cache import SQLiteCache
+
+
+class _Job:
+    def __init__(self, kind: str):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.status = "queued"
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.error_status: Optional[int] = None
+        self.created_at = time.time()
+        self.enqueued = time.monotonic()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.expires: Optional[float] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        job = {
+            "job_id": self.id,
+            "type": self.kind,
+            "status": self.status,
+            "created_at": datetime.fromtimestamp(self.created_at, timezone.utc).isoformat(timespec="seconds")
+        }
+        if self.started is not None:
+            job["queue_seconds"] = round(self.started - self.enqueued, 3)
+        if self.finished is not None:
+            job["run_seconds"] = round(self.finished - self.started, 3)
+        if self.status == "succeeded":
+            job["result"] = self.result
+        elif self.status == "failed":
+            job["error"] = self.error
+            job["error_status"] = self.error_status
+        return job
+
+
+class JobQueue:
+    """
+    Run long service calls in the background and keep their results.
+
+    Jobs run on a fixed pool of worker threads in an empty context, so they
+    do not inherit the submitting request's trace, priority or deadline;
+    job functions set their own. At most max_queue jobs may wait for a worker; further
+    submissions are rejected with QueueFullError. Finished jobs are kept
+    for ttl seconds, then polling them reports them as unknown.
+
+    Jobs run in the process that accepted them. With a store (a SQLite
+    file, JOB_STORE_PATH) every state change is also written there, so
+    any worker process on the host can answer a poll.
+    """
+
+    def __init__(self,
+                 workers: int = 4,
+                 max_queue: int = 100,
+                 ttl: float = 600,
+                 max_jobs: int = 10000,
+                 store: Optional[SQLiteCache] = None):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.ttl = ttl
+        self.max_jobs = max_jobs
+        self.store = store
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job")
+        self._jobs: Dict[str, _Job] = {}
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._counters = {"submitted": 0, "succeeded": 0, "failed": 0, "rejected": 0, "expired": 0}
+        self._run_seconds: deque = deque(maxlen=512)
+        self._queue_seconds: deque = deque(maxlen=512)
+
+    @classmethod
+    def from_env(cls) -> Optional["JobQueue"]:
+        """
+        Build a job queue from environment variables.
+
+        Returns:
+            A configured JobQueue, or None when JOBS_ENABLED is false
+        """
+        if os.getenv("JOBS_ENABLED", "True").lower() != "true":
+            return None
+        ttl = float(os.getenv("JOB_RESULT_TTL", 600))
+        path = os.getenv("JOB_STORE_PATH")
+        return cls(
+            workers=int(os.getenv("JOB_WORKERS", 4)),
+            max_queue=int(os.getenv("JOB_MAX_QUEUE", 100)),
+            ttl=ttl,
+            max_jobs=int(os.getenv("JOB_MAX_ENTRIES", 10000)),
+            store=SQLiteCache(path, ttl=ttl) if path else None
+        )
+
+    def submit(self, kind: str, func: Callable[[], Any]) -> Dict[str, Any]:
+        """
+        Queue a call for a worker thread.
+
+        Args:
+            kind: Job type, reported with the job and in metrics
+            func: Callable producing the JSON-serializable result
+
+        Returns:
+            The queued job
+
+        Raises:
+            QueueFullError: If max_queue jobs are already waiting
+        """
+        job = _Job(kind)
+        with self._lock:
+            self._expire()
+            if self._queued >= self.max_queue:
+                self._counters["rejected"] += 1
+                raise QueueFullError(f"Job queue is full ({self.max_queue} jobs waiting)", retry_after=5)
+            self._queued += 1
+            self._counters["submitted"] += 1
+            self._jobs[job.id] = job
+            queued = job.to_dict()
+        self._publish(queued)
+        JOBS_QUEUED.inc(kind=kind)
+        self._executor.submit(Context().run, self._run, job, func)
+        return queued
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Return the job, or None if it is unknown or its result expired"""
+        with self._lock:
+            self._expire()
+            job = self._jobs.get(job_id)
+            if job is not None:
+                return job.to_dict()
+        # Submitted to another worker process
+        stored = self.store.get(job_id) if self.store is not None else None
+        return json.loads(stored) if stored is not None else None
+
+    def _publish(self, job: Dict[str, Any]) -> None:
+        """Write a job's current state to the shared store"""
+        if self.store is None:
+            return
+        try:
+            self.store.set(job["job_id"], json.dumps(job))
+        except (sqlite3.Error, TypeError, ValueError):
+            # Polls to this worker still see the job; others report it unknown
+            pass
+
+    def _run(self, job: _Job, func: Callable[[], Any]) -> None:
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+            job.status = "running"
+            job.started = time.monotonic()
+            self._queue_seconds.append(job.started - job.enqueued)
+            running = job.to_dict()
+        self._publish(running)
+        JOBS_QUEUED.dec(kind=job.kind)
+        JOB_QUEUE_WAIT.observe(job.started - job.enqueued, kind=job.kind)
+
+        try:
+            with JOBS_RUNNING.track(kind=job.kind):
+                result, error = func(), None
+        except Exception as e:
+            result, error = None, e
+
+        finished = time.monotonic()
+        with self._lock:
+            self._running -= 1
+            job.finished = finished
+            job.expires = finished + self.ttl
+            if error is None:
+                job.status, job.result = "succeeded", result
+            else:
+                job.status, job.error = "failed", str(error)
+                job.error_status = error.status_code if isinstance(error, LLMUnavailableError) else 500
+            self._counters[job.status] += 1
+            self._run_seconds.append(finished - job.started)
+            done = job.to_dict()
+        self._publish(done)
+        JOB_DURATION.observe(finished - job.started, kind=job.kind, outcome=job.status)
+
+    def _expire(self) -> None:
+        """Drop expired results, and the oldest finished ones beyond max_jobs; call with the lock held"""
+        now = time.monotonic()
+        expired = [job_id for job_id, job in self._jobs.items() if job.expires is not None and job.expires <= now]
+        excess = len(self._jobs) - len(expired) - self.max_jobs
+        if excess > 0:
+            finished = sorted((job for job in self._jobs.values() if job.expires is not None and job.expires > now),
+                              key=lambda job: job.finished)
+            expired.extend(job.id for job in finished[:excess])
+        for job_id in expired:
+            del self._jobs[job_id]
+        self._counters["expired"] += len(expired)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return queue depth, job counters and recent queue and run latency"""
+        with self._lock:
+            self._expire()
+            stats = {
+                "workers": self.workers,
+                "queued": self._queued,
+                "running": self._running,
+                "max_queue": self.max_queue,
+                "stored": len(self._jobs),
+                **self._counters
+            }
+            latencies = {"queue": sorted(self._queue_seconds), "run": sorted(self._run_seconds)}
+        for name, ordered in latencies.items():
+            if ordered:
+                stats[f"{name}_p50_ms"] = round(ordered[len(ordered) // 2] * 1000, 2)
+                stats[f"{name}_p95_ms"] = round(ordered[math.ceil(len(ordered) * 0.95) - 1] * 1000, 2)
+        return stats
@@ -0,0 +1,195 @@
+import json
+import re
+from typing import Any, List, Tuple
+from .metrics import JSON_PARSE
+from .tracing import traced
+
+_decoder = json.JSONDecoder()
+_STRUCTURAL = re.compile(r'[{}\[\]",:]')
+_STRING_SPECIAL = re.compile(r'["\\]')
+
+
+def strip_code_fences(text: str) -> str:
+    """Remove a surrounding Markdown code fence (```json ... ```), if any"""
+    text = text.strip()
+    if text.startswith("```"):
+        newline = text.find("\n")
+        if newline < 0:
+            return ""
+        text = text[newline + 1:]
+        closing = text.rfind("```")
+        if closing >= 0:
+            text = text[:closing]
+    return text.strip()
+
+
+@traced("json.parse")
+def parse_json_response(text: str) -> Any:
+    """
+    Parse the JSON object out of a model response.
+
+    Handles bare JSON, fenced JSON and JSON surrounded by prose. Candidates
+    are decoded in a single pass with the C scanner's raw_decode, which is
+    string-aware and stops at the end of the object instead of needing a
+    greedy match up to the last brace in the text.
+
+    Args:
+        text: Raw model response
+
+    Returns:
+        The decoded JSON object
+
+    Raises:
+        ValueError: If no valid JSON object can be extracted
+    """
+    stripped = strip_code_fences(text)
+    pos = stripped.find("{")
+    while pos >= 0:
+        try:
+            value, _ = _decoder.raw_decode(stripped, pos)
+            if pos == 0:
+                JSON_PARSE.inc(outcome="fenced" if text.lstrip().startswith("```") else "bare")
+            else:
+                JSON_PARSE.inc(outcome="extracted")
+            return value
+        except json.JSONDecodeError as e:
+            # Prose such as "use {x}" may contain braces before the payload;
+            # resume after the point where this candidate broke
+            pos = stripped.find("{", max(pos + 1, e.pos))
+    JSON_PARSE.inc(outcome="failed")
+    raise ValueError("Could not extract valid JSON from response")
+
+
+class IncrementalJSONParser:
+    """
+    Parse a JSON object out of a model response as it streams in.
+
+    Text before the first '{' (prose, code fences) is skipped. Every
+    top-level field is returned as soon as its value is complete, so
+    callers can forward fields before the whole object has arrived.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self._pos = 0
+        self._started = False
+        self._done = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start = -1
+        self._last_string = None
+        self._key = None
+        self._value_start = -1
+        self._object_start = -1
+        self._object_end = -1
+
+    @property
+    def done(self) -> bool:
+        """True once the closing brace of the top-level object was seen"""
+        return self._done
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        """
+        Add a chunk of streamed text.
+
+        Args:
+            chunk: Next piece of the model response
+
+        Returns:
+            (key, value) pairs for top-level fields completed by this chunk
+        """
+        self.buffer += chunk
+        fields = []
+        buffer = self.buffer
+        end = len(buffer)
+        pos = self._pos
+
+        if not self._started:
+            pos = buffer.find("{", pos)
+            if pos < 0:
+                self._pos = end
+                return fields
+            self._started = True
+            self._depth = 1
+            self._object_start = pos
+            pos += 1
+
+        # Jump between characters that matter instead of stepping one by one
+        while pos < end and not self._done:
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                    pos += 1
+                    continue
+                match = _STRING_SPECIAL.search(buffer, pos)
+                if match is None:
+                    pos = end
+                    break
+                pos = match.start()
+                if buffer[pos] == "\\":
+                    self._escape = True
+                else:
+                    self._in_string = False
+                    if self._depth == 1 and self._value_start < 0:
+                        self._last_string = buffer[self._string_start:pos + 1]
+                pos += 1
+                continue
+
+            match = _STRUCTURAL.search(buffer, pos)
+            if match is None:
+                pos = end
+                break
+            pos = match.start()
+            char = buffer[pos]
+            if char == '"':
+                self._in_string = True
+                self._string_start = pos
+            elif char == "{" or char == "[":
+                self._depth += 1
+            elif char == "}" or char == "]":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._emit(buffer[:pos], fields)
+                    self._done = True
+                    self._object_end = pos + 1
+            elif self._depth == 1:
+                if char == ":" and self._last_string is not None:
+                    self._key = json.loads(self._last_string)
+                    self._last_string = None
+                    self._value_start = pos + 1
+                elif char == ",":
+                    self._emit(buffer[:pos], fields)
+            pos += 1
+
+        self._pos = pos
+        return fields
+
+    def _emit(self, text: str, fields: List[Tuple[str, Any]]) -> None:
+        """Decode the value of the current top-level field, if any"""
+        if self._key is None or self._value_start < 0:
+            return
+        raw = text[self._value_start:].strip()
+        try:
+            fields.append((self._key, json.loads(raw)))
+        except json.JSONDecodeError:
+            # Leave malformed values to the final full parse
+            pass
+        self._key = None
+        self._value_start = -1
+
+    def result(self) -> Any:
+        """
+        Decode the complete object.
+
+        Uses the span found while streaming when the object closed, and
+        falls back to parse_json_response on the whole buffer otherwise.
+        """
+        if self._done:
+            try:
+                value = json.loads(self.buffer[self._object_start:self._object_end])
+                JSON_PARSE.inc(outcome="streamed")
+                return value
+            except json.JSONDecodeError:
+                pass
+        return parse_json_response(self.buffer)
@@ -0,0 +1,31 @@
+class LLMUnavailableError(Exception):
+    """
+    An LLM call was not made or not completed for capacity or health reasons.
+
+    Services let these through unchanged so routes can answer with
+    status_code and a Retry-After header instead of a generic 500.
+    """
+
+    status_code = 503
+
+    def __init__(self, message: str, retry_after: int = 1):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class QueueFullError(LLMUnavailableError):
+    """Raised when the scheduler cannot admit an LLM call"""
+
+    status_code = 429
+
+
+class CircuitOpenError(LLMUnavailableError):
+    """Raised while the circuit breaker considers the provider unhealthy"""
+
+    status_code = 503
+
+
+class DeadlineExceededError(LLMUnavailableError):
+    """Raised when an LLM call did not finish within its deadline"""
+
+    status_code = 504
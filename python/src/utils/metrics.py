@@ -0,0 +1,196 @@
+import bisect
+import math
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Any, Iterable, List, Optional, Sequence, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+HTTP_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+LLM_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 4, 8, 15, 30, 60, 120)
+
+# Service method (registered prompt name) the current LLM calls belong to
+_operation: ContextVar[str] = ContextVar("llm_operation", default="generate")
+
+
+@contextmanager
+def llm_operation(name: str):
+    """Attribute the enclosed block's LLM calls to the given service method"""
+    token = _operation.set(name)
+    try:
+        yield
+    finally:
+        _operation.reset(token)
+
+
+def current_operation() -> str:
+    return _operation.get()
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    """A metric family with a fixed set of label names"""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def _labels(self, key: Tuple[str, ...], extra: str = "") -> str:
+        pairs = [f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, key)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def samples(self) -> Iterable[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield f"{self.name}{self._labels(key)} {_format_value(value)}"
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: Any) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: Any) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    @contextmanager
+    def track(self, **labels: Any):
+        """Count the enclosed block as in progress"""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = HTTP_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                # Per-bucket (not yet cumulative) counts, sum, count
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def samples(self) -> Iterable[str]:
+        with self._lock:
+            items = [(key, (list(counts), total, count)) for key, (counts, total, count) in sorted(self._values.items())]
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+                cumulative += bucket_count
+                le = 'le="' + _format_value(bound) + '"'
+                yield f"{self.name}_bucket{self._labels(key, le)} {cumulative}"
+            yield f"{self.name}_sum{self._labels(key)} {_format_value(total)}"
+            yield f"{self.name}_count{self._labels(key)} {count}"
+
+
+class MetricsRegistry:
+    """Process-wide metrics rendered in the Prometheus text exposition format"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric '{metric.name}' is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# Registry shared by the whole process
+registry = MetricsRegistry()
+
+HTTP_REQUESTS = registry.register(Counter(
+    "http_requests_total", "HTTP requests by route and status", ("method", "route", "status")))
+HTTP_REQUEST_DURATION = registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", ("method", "route"), HTTP_BUCKETS))
+HTTP_REQUESTS_IN_FLIGHT = registry.register(Gauge(
+    "http_requests_in_flight", "HTTP requests being handled by route", ("route",)))
+LLM_CALL_DURATION = registry.register(Histogram(
+    "llm_call_duration_seconds", "LLM call latency including queueing and retries, by service method",
+    ("operation", "model", "outcome"), LLM_BUCKETS))
+LLM_CALLS_IN_FLIGHT = registry.register(Gauge(
+    "llm_calls_in_flight", "LLM calls in progress by service method", ("operation",)))
+LLM_QUEUE_WAIT = registry.register(Histogram(
+    "llm_queue_wait_seconds", "Time LLM calls waited for a scheduler slot", ("model",), LLM_BUCKETS))
+LLM_INPUT_TOKENS = registry.register(Counter(
+    "llm_input_tokens_total", "LLM input tokens by service method (provider-reported, else estimated)", ("operation",)))
+LLM_OUTPUT_TOKENS = registry.register(Counter(
+    "llm_output_tokens_total", "LLM output tokens by service method (provider-reported, else estimated)", ("operation",)))
+JSON_PARSE = registry.register(Counter(
+    "json_parse_total", "Model responses parsed as JSON by outcome: bare, fenced, streamed, extracted from prose, or failed",
+    ("outcome",)))
+RESPONSE_VALIDATION = registry.register(Counter(
+    "llm_response_validation_total",
+    "Schema checks of model responses by service method and outcome: valid, repaired, retried or failed",
+    ("operation", "outcome")))
+JOBS_QUEUED = registry.register(Gauge(
+    "jobs_queued", "Background jobs waiting for a worker by type", ("kind",)))
+JOBS_RUNNING = registry.register(Gauge(
+    "jobs_running", "Background jobs being executed by type", ("kind",)))
+JOB_QUEUE_WAIT = registry.register(Histogram(
+    "job_queue_wait_seconds", "Time background jobs waited for a worker", ("kind",), LLM_BUCKETS))
+JOB_DURATION = registry.register(Histogram(
+    "job_duration_seconds", "Background job run time by type and outcome", ("kind", "outcome"), LLM_BUCKETS))
@@ -0,0 +1,165 @@
+import cProfile
+import io
+import os
+import pstats
+import random
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional
+
+PROFILE_MODES = ("cpu", "memory", "both")
+
+
+class RequestProfiler:
+    """
+    Profile the next N requests on demand.
+
+    Once armed, requests are sampled at sample_rate until N captures were
+    taken. A capture holds the top functions by cumulative time (cProfile,
+    for the thread handling the request) and/or the top allocation sites
+    that grew during the request (tracemalloc, process-wide). Only one
+    request is captured at a time; requests arriving meanwhile are not
+    profiled.
+    """
+
+    def __init__(self, capacity: int = 20, top: int = 30, dump_dir: Optional[str] = None):
+        self.top = top
+        self.dump_dir = dump_dir
+        self._captures: deque = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self._busy = threading.Lock()
+        self._remaining = 0
+        self._mode = "cpu"
+        self._sample_rate = 1.0
+        self._started_tracemalloc = False
+
+    @classmethod
+    def from_env(cls) -> "RequestProfiler":
+        return cls(
+            capacity=int(os.getenv("PROFILE_CAPTURES", 20)),
+            top=int(os.getenv("PROFILE_TOP", 30)),
+            dump_dir=os.getenv("PROFILE_DIR") or None
+        )
+
+    def arm(self, requests: int, mode: str = "cpu", sample_rate: float = 1.0) -> Dict[str, Any]:
+        """
+        Profile the next requests.
+
+        Args:
+            requests: Number of requests to capture; 0 disarms
+            mode: "cpu" (cProfile), "memory" (tracemalloc) or "both"
+            sample_rate: Share of requests considered for capture
+
+        Returns:
+            The profiler status
+        """
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"mode must be one of {', '.join(PROFILE_MODES)}")
+        if not 0 < sample_rate <= 1:
+            raise ValueError("sample_rate must be in (0, 1]")
+        with self._lock:
+            self._remaining = max(0, requests)
+            self._mode = mode
+            self._sample_rate = sample_rate
+            if mode != "cpu" and self._remaining and not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracemalloc = True
+        if not self._remaining:
+            self._stop_tracemalloc()
+        return self.status()
+
+    def _claim(self) -> Optional[str]:
+        """Return the capture mode if this request should be profiled"""
+        with self._lock:
+            if not self._remaining or random.random() >= self._sample_rate:
+                return None
+            if not self._busy.acquire(blocking=False):
+                return None
+            self._remaining -= 1
+            return self._mode
+
+    @contextmanager
+    def capture(self, method: str, route: str):
+        """Profile the enclosed request if the profiler is armed"""
+        mode = self._claim()
+        if mode is None:
+            yield
+            return
+
+        profile = cProfile.Profile() if mode != "memory" else None
+        before = tracemalloc.take_snapshot() if mode != "cpu" and tracemalloc.is_tracing() else None
+        started = time.perf_counter()
+        try:
+            if profile is not None:
+                profile.enable()
+            yield
+        finally:
+            if profile is not None:
+                profile.disable()
+            duration = time.perf_counter() - started
+            after = tracemalloc.take_snapshot() if before is not None else None
+            self._busy.release()
+            self._store(method, route, duration, profile, before, after)
+
+    def _store(self, method, route, duration, profile, before, after) -> None:
+        capture: Dict[str, Any] = {
+            "method": method,
+            "route": route,
+            "captured_at": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+            "duration_ms": round(duration * 1000, 3)
+        }
+        if profile is not None:
+            stats = pstats.Stats(profile, stream=io.StringIO())
+            capture["cpu"] = self._top_functions(stats)
+            if self.dump_dir:
+                path = os.path.join(self.dump_dir, f"{route.strip('/').replace('/', '_') or 'root'}-{int(time.time() * 1000)}.prof")
+                stats.dump_stats(path)
+                capture["profile_path"] = path
+        if before is not None and after is not None:
+            capture["memory"] = [
+                {"location": str(diff.traceback), "size_kb": round(diff.size_diff / 1024, 2), "count": diff.count_diff}
+                for diff in after.compare_to(before, "lineno")[:self.top]
+                if diff.size_diff > 0
+            ]
+        with self._lock:
+            self._captures.append(capture)
+            done = not self._remaining
+        if done:
+            self._stop_tracemalloc()
+
+    def _top_functions(self, stats: pstats.Stats) -> List[Dict[str, Any]]:
+        entries = []
+        for (filename, line, function), (_, calls, own, cumulative, _) in stats.stats.items():
+            entries.append({
+                "function": f"{filename}:{line}({function})",
+                "calls": calls,
+                "own_ms": round(own * 1000, 3),
+                "cumulative_ms": round(cumulative * 1000, 3)
+            })
+        entries.sort(key=lambda entry: entry["cumulative_ms"], reverse=True)
+        return entries[:self.top]
+
+    def _stop_tracemalloc(self) -> None:
+        with self._lock:
+            if self._started_tracemalloc and not self._remaining and not self._busy.locked():
+                tracemalloc.stop()
+                self._started_tracemalloc = False
+
+    def captures(self) -> List[Dict[str, Any]]:
+        """Captured profiles, most recent first"""
+        with self._lock:
+            return list(reversed(self._captures))
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "remaining": self._remaining,
+                "mode": self._mode,
+                "sample_rate": self._sample_rate,
+                "captures": len(self._captures),
+                "tracemalloc": tracemalloc.is_tracing()
+            }
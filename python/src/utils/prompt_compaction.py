@@ -0,0 +1,140 @@
+import os
+import re
+import textwrap
+import threading
+from typing import Dict, Any
+
+# Rough tokenizer-like count: words, punctuation marks, newlines and runs
+# of indentation each cost about one token
+_TOKEN = re.compile(r"\w+|[^\w\s]|\n|[ \t]{2,}")
+_BLANK_RUNS = re.compile(r"\n{3,}")
+
+# Languages where leading whitespace carries meaning
+_INDENT_SENSITIVE = {"python", "yaml", "haskell", "f#", "nim", "coffeescript", "makefile"}
+
+# Prefix of a full-line comment per language
+_LINE_COMMENTS = {
+    "python": "#", "ruby": "#", "bash": "#", "shell": "#", "r": "#", "perl": "#", "yaml": "#",
+    "java": "//", "javascript": "//", "typescript": "//", "c": "//", "c++": "//", "cpp": "//",
+    "c#": "//", "csharp": "//", "go": "//", "rust": "//", "kotlin": "//", "swift": "//",
+    "scala": "//", "php": "//", "dart": "//",
+    "sql": "--", "lua": "--", "haskell": "--"
+}
+
+CODE_MODES = ("none", "whitespace", "minify")
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the number of input tokens in text without calling the model"""
+    return len(_TOKEN.findall(text))
+
+
+def compact_template(template: str) -> str:
+    """
+    Collapse the whitespace of a prompt template.
+
+    Strips the source indentation of every line and drops blank lines; the
+    JSON skeletons in the prompts are brace-delimited, so nesting survives.
+    """
+    lines = (line.strip() for line in textwrap.dedent(template).splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+def compact_code(code: str, language: str, mode: str = "whitespace") -> str:
+    """
+    Normalize submitted code before it is embedded in a prompt.
+
+    Args:
+        code: Submitted source code
+        language: Programming language of the code
+        mode: "none" leaves the code as is, "whitespace" strips trailing
+            whitespace and repeated blank lines, "minify" also drops
+            full-line comments and, for languages where indentation has
+            no meaning, leading indentation
+
+    Returns:
+        The compacted code
+    """
+    if mode == "none":
+        return code
+
+    language = (language or "").strip().lower()
+    # Tabs are kept: they are significant in Makefiles and idiomatic in Go
+    lines = [line.rstrip() for line in code.splitlines()]
+
+    if mode == "minify":
+        comment = _LINE_COMMENTS.get(language)
+        if comment:
+            lines = [line for line in lines if not line.lstrip().startswith(comment)]
+        if language not in _INDENT_SENSITIVE:
+            lines = [line.lstrip() for line in lines]
+        lines = [line for line in lines if line]
+
+    return _BLANK_RUNS.sub("\n\n", "\n".join(lines)).strip("\n")
+
+
+class PromptCompactor:
+    """Render registered prompts with compacted code and track token savings per prompt"""
+
+    def __init__(self, code_mode: str = "whitespace"):
+        if code_mode not in CODE_MODES:
+            raise ValueError(f"Unknown code compaction mode: {code_mode}")
+        self.code_mode = code_mode
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._template_savings: Dict[str, int] = {}
+
+    @classmethod
+    def from_env(cls) -> "PromptCompactor":
+        """Build a compactor configured by PROMPT_CODE_COMPACTION"""
+        return cls(code_mode=os.getenv("PROMPT_CODE_COMPACTION", "whitespace").lower())
+
+    def render(self, spec, variables: Dict[str, Any]) -> str:
+        """
+        Render a PromptSpec with compacted code variables.
+
+        Args:
+            spec: Registered prompt
+            variables: Values for the prompt's input variables
+
+        Returns:
+            The compacted prompt text
+        """
+        saved_chars = 0
+        compacted = variables
+        if "code" in variables and self.code_mode != "none":
+            compacted = dict(variables)
+            compacted["code"] = compact_code(variables["code"], variables.get("language", ""), self.code_mode)
+            saved_chars = len(variables["code"]) - len(compacted["code"])
+
+        prompt = spec.render(compacted)
+        # The prompt is rendered and tokenized once; tokens saved on the code
+        # are estimated from the characters removed at the prompt's density
+        after = estimate_tokens(prompt)
+        saved_code = round(saved_chars * after / len(prompt)) if prompt else 0
+        self._record(spec.name, after + self._template_saving(spec) + saved_code, after)
+        return prompt
+
+    def _template_saving(self, spec) -> int:
+        """Tokens saved by compacting a prompt's template, measured once per prompt"""
+        saving = self._template_savings.get(spec.name)
+        if saving is None:
+            saving = estimate_tokens(spec.raw_template) - estimate_tokens(spec.template)
+            self._template_savings[spec.name] = saving
+        return saving
+
+    def _record(self, name: str, before: int, after: int) -> None:
+        with self._lock:
+            entry = self._stats.setdefault(name, {"calls": 0, "tokens_before": 0, "tokens_after": 0})
+            entry["calls"] += 1
+            entry["tokens_before"] += before
+            entry["tokens_after"] += after
+
+    def stats(self) -> Dict[str, Any]:
+        """Estimated input tokens before and after compaction, per prompt"""
+        with self._lock:
+            stats = {name: dict(entry) for name, entry in self._stats.items()}
+        for entry in stats.values():
+            before = entry["tokens_before"]
+            entry["saved_ratio"] = round(1 - entry["tokens_after"] / before, 4) if before else 0.0
+        return {"code_mode": self.code_mode, "prompts": stats}
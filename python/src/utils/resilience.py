@@ -0,0 +1,453 @@
+import asyncio
+import contextvars
+import inspect
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, FIRST_COMPLETED, wait
+from contextlib import AsyncExitStack, ExitStack, contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import AsyncContextManager, Awaitable, Callable, ContextManager, Dict, Any, List, Optional, Tuple
+from .llm_errors import LLMUnavailableError, CircuitOpenError, DeadlineExceededError
+
+# Default end-to-end deadline per route, in seconds; LLM_ROUTE_DEADLINES
+# overrides them, e.g. "code.chat=15,quiz.generate=60"
+DEFAULT_ROUTE_DEADLINES = {
+    "generate": 60,
+    "code.review": 60,
+    "code.review_batch": 300,
+    "code.chat": 30,
+    "quiz.generate": 90,
+    "quiz.evaluate": 60,
+    "challenge": 90
+}
+
+# Exception class names and HTTP statuses worth retrying
+RETRYABLE_ERROR_NAMES = {
+    "ServiceUnavailable", "TooManyRequests", "ResourceExhausted", "DeadlineExceeded",
+    "InternalServerError", "BadGateway", "GatewayTimeout", "Aborted",
+    "TimeoutError", "ConnectionError", "ConnectTimeout", "ReadTimeout", "RemoteProtocolError"
+}
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+RETRYABLE_MARKERS = ("429", "500", "502", "503", "504", "RESOURCE_EXHAUSTED", "UNAVAILABLE", "DEADLINE_EXCEEDED")
+
+# Share of a call's deadline one attempt may use unless LLM_ATTEMPT_TIMEOUT
+# is set, so a hung first attempt still leaves time for a retry
+ATTEMPT_SHARE = 2 / 3
+
+# Absolute monotonic time by which the current request must be answered
+_deadline: ContextVar[Optional[float]] = ContextVar("llm_deadline", default=None)
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _route_deadlines() -> Dict[str, float]:
+    deadlines = dict(DEFAULT_ROUTE_DEADLINES)
+    for entry in os.getenv("LLM_ROUTE_DEADLINES", "").split(","):
+        if "=" in entry:
+            name, seconds = entry.split("=", 1)
+            deadlines[name.strip()] = float(seconds)
+    return deadlines
+
+
+@contextmanager
+def request_deadline(seconds: float):
+    """Bound the LLM calls of the enclosed block to finish within seconds"""
+    deadline_at = time.monotonic() + seconds
+    current = _deadline.get()
+    token = _deadline.set(min(current, deadline_at) if current is not None else deadline_at)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def deadline(route: str):
+    """Route decorator applying the configured deadline of a route"""
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with request_deadline(_route_deadlines().get(route, DEFAULT_ROUTE_DEADLINES["generate"])):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with request_deadline(_route_deadlines().get(route, DEFAULT_ROUTE_DEADLINES["generate"])):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Return True for transient provider errors (rate limits, 5xx, timeouts)"""
+    if isinstance(error, LLMUnavailableError):
+        return False
+    for cls in type(error).__mro__:
+        if cls.__name__ in RETRYABLE_ERROR_NAMES:
+            return True
+    status = getattr(error, "status_code", None) or getattr(error, "code", None)
+    if isinstance(status, int) and status in RETRYABLE_STATUS_CODES:
+        return True
+    message = str(error)
+    return any(marker in message for marker in RETRYABLE_MARKERS)
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Threads running individual attempts, so a caller can stop waiting at its deadline"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=int(os.getenv("LLM_ATTEMPT_WORKERS", 32)),
+                    thread_name_prefix="llm-attempt"
+                )
+    return _executor
+
+
+def _release_when_done(stack: ExitStack, futures: List[Future]) -> None:
+    """Keep the contexts of stack entered until every attempt thread in futures has returned"""
+    running = [future for future in futures if not future.done()]
+    if not running:
+        return
+    # Move the contexts off stack so leaving its with block does not exit them
+    detached = stack.pop_all()
+    remaining = [len(running)]
+    lock = threading.Lock()
+
+    def on_done(_future: Future) -> None:
+        with lock:
+            remaining[0] -= 1
+            last = remaining[0] == 0
+        if last:
+            detached.close()
+
+    for future in running:
+        future.add_done_callback(on_done)
+
+
+class CircuitBreaker:
+    """
+    Fail fast while the provider keeps failing.
+
+    After failure_threshold consecutive retryable failures the circuit
+    opens and calls raise CircuitOpenError for reset_timeout seconds; then
+    one trial call is let through (half-open) and its outcome closes or
+    reopens the circuit.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_running = False
+        self._lock = threading.Lock()
+        self._counters = {"opened": 0, "rejected": 0}
+
+    def before_call(self) -> None:
+        """Raise CircuitOpenError unless a call may go to the provider now"""
+        with self._lock:
+            if self.state == "closed":
+                return
+            elapsed = time.monotonic() - self._opened_at
+            if elapsed >= self.reset_timeout and not self._trial_running:
+                self.state = "half_open"
+                self._trial_running = True
+                return
+            self._counters["rejected"] += 1
+            retry_after = max(1, int(self.reset_timeout - elapsed) + 1)
+        raise CircuitOpenError("LLM provider is unavailable; failing fast", retry_after=retry_after)
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._trial_running = False
+            self.state = "closed"
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self.state == "half_open" or self._failures >= self.failure_threshold:
+                if self.state != "open":
+                    self._counters["opened"] += 1
+                self.state = "open"
+                self._opened_at = time.monotonic()
+                self._trial_running = False
+
+    def release_trial(self) -> None:
+        """End a half-open trial that finished without a health signal"""
+        with self._lock:
+            self._trial_running = False
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"state": self.state, "consecutive_failures": self._failures, **self._counters}
+
+
+class ResilientCaller:
+    """
+    Run LLM attempts with a deadline, jittered retries, optional hedging and
+    a circuit breaker.
+
+    The whole call, retries included, is bounded by the route deadline, or
+    by timeout outside a route. attempt_timeout bounds a single attempt so
+    a hung request can still be retried; by default an attempt may use
+    ATTEMPT_SHARE of the call's deadline, so slow routes such as a
+    20-question quiz get proportionally longer attempts.
+
+    admit, when given, is entered around each attempt but outside its
+    timer: waiting for a scheduler slot neither counts against the
+    attempt timeout nor, when it fails, as a provider failure. A hedged
+    attempt runs under the slot of the attempt it backs up. A thread
+    cannot be stopped, so the slot of an attempt that timed out is held
+    until its thread actually returns.
+
+    Hedging sends a duplicate attempt when the first has not answered
+    within the recent p95 latency and returns whichever finishes first.
+    """
+
+    def __init__(self,
+                 timeout: float = 60,
+                 attempt_timeout: Optional[float] = None,
+                 max_retries: int = 2,
+                 base_delay: float = 0.5,
+                 max_delay: float = 4,
+                 hedging: bool = False,
+                 hedge_min_delay: float = 1.0,
+                 breaker: Optional[CircuitBreaker] = None):
+        self.timeout = timeout
+        self.attempt_timeout = attempt_timeout
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.hedging = hedging
+        self.hedge_min_delay = hedge_min_delay
+        self.breaker = breaker or CircuitBreaker()
+        self._latencies = deque(maxlen=200)
+        self._lock = threading.Lock()
+        self._counters = {"calls": 0, "retries": 0, "hedges": 0, "hedge_wins": 0, "deadline_exceeded": 0, "failures": 0}
+
+    @classmethod
+    def from_env(cls) -> Optional["ResilientCaller"]:
+        """
+        Build a resilient caller from environment variables.
+
+        Returns:
+            A configured ResilientCaller, or None when LLM_RESILIENCE_ENABLED is false
+        """
+        if os.getenv("LLM_RESILIENCE_ENABLED", "True").lower() != "true":
+            return None
+        return cls(
+            timeout=float(os.getenv("LLM_TIMEOUT", 60)),
+            attempt_timeout=float(os.environ["LLM_ATTEMPT_TIMEOUT"]) if os.getenv("LLM_ATTEMPT_TIMEOUT") else None,
+            max_retries=int(os.getenv("LLM_MAX_RETRIES", 2)),
+            base_delay=float(os.getenv("LLM_RETRY_BASE_DELAY", 0.5)),
+            max_delay=float(os.getenv("LLM_RETRY_MAX_DELAY", 4)),
+            hedging=os.getenv("LLM_HEDGING_ENABLED", "False").lower() == "true",
+            hedge_min_delay=float(os.getenv("LLM_HEDGE_MIN_DELAY", 1.0)),
+            breaker=CircuitBreaker(
+                failure_threshold=int(os.getenv("LLM_CIRCUIT_FAILURES", 5)),
+                reset_timeout=float(os.getenv("LLM_CIRCUIT_RESET", 30))
+            )
+        )
+
+    def call(self, attempt: Callable[[], Any], admit: Optional[Callable[[], ContextManager]] = None) -> Any:
+        """
+        Run attempt until it succeeds, retries are exhausted or the deadline passes.
+
+        Args:
+            attempt: Zero-argument callable making one model call
+            admit: Context manager factory held around each attempt, e.g. a scheduler slot
+
+        Returns:
+            The result of the first successful attempt
+        """
+        deadline_at, attempt_timeout = self._limits()
+        self._count("calls")
+        for retry in range(self.max_retries + 1):
+            with ExitStack() as stack:
+                if admit is not None:
+                    # QueueFullError propagates: not retried, not a breaker failure
+                    stack.enter_context(admit())
+                remaining = deadline_at - time.monotonic()
+                if remaining <= 0:
+                    raise self._deadline_error()
+                self.breaker.before_call()
+                futures = []
+                try:
+                    result = self._run_once(attempt, min(remaining, attempt_timeout), futures)
+                except Exception as e:
+                    error = e
+                else:
+                    self.breaker.record_success()
+                    return result
+                finally:
+                    _release_when_done(stack, futures)
+            # The slot is released while backing off
+            if not self._should_retry(error, retry, deadline_at):
+                raise self._final_error(error)
+            time.sleep(self._backoff(retry, deadline_at))
+
+    async def acall(self, attempt: Callable[[], Awaitable[Any]], admit: Optional[Callable[[], AsyncContextManager]] = None) -> Any:
+        """Asynchronous variant of call for coroutine functions"""
+        deadline_at, attempt_timeout = self._limits()
+        self._count("calls")
+        for retry in range(self.max_retries + 1):
+            async with AsyncExitStack() as stack:
+                if admit is not None:
+                    await stack.enter_async_context(admit())
+                remaining = deadline_at - time.monotonic()
+                if remaining <= 0:
+                    raise self._deadline_error()
+                self.breaker.before_call()
+                try:
+                    result = await self._arun_once(attempt, min(remaining, attempt_timeout))
+                except Exception as e:
+                    error = e
+                else:
+                    self.breaker.record_success()
+                    return result
+            if not self._should_retry(error, retry, deadline_at):
+                raise self._final_error(error)
+            await asyncio.sleep(self._backoff(retry, deadline_at))
+
+    def _run_once(self, attempt: Callable[[], Any], timeout: float, futures: List[Future]) -> Any:
+        """Run one attempt, hedged if enabled; every submitted future is appended to futures"""
+        executor = _get_executor()
+        started = time.monotonic()
+        # Attempts run in a copy of the caller's context so request-scoped
+        # settings (priority, cache opt-out) still apply
+        primary = executor.submit(contextvars.copy_context().run, attempt)
+        futures.append(primary)
+        pending = {primary}
+        hedge_delay = self._hedge_delay()
+        if hedge_delay is not None and hedge_delay < timeout:
+            done, _ = wait(pending, timeout=hedge_delay)
+            if not done:
+                self._count("hedges")
+                hedge = executor.submit(contextvars.copy_context().run, attempt)
+                futures.append(hedge)
+                pending.add(hedge)
+
+        error = None
+        while pending:
+            done, pending = wait(pending, timeout=max(0.0, started + timeout - time.monotonic()), return_when=FIRST_COMPLETED)
+            if not done:
+                raise TimeoutError(f"LLM call timed out after {timeout:.1f} seconds")
+            for future in done:
+                if future.exception() is None:
+                    self._record_latency(time.monotonic() - started)
+                    if future is not primary:
+                        self._count("hedge_wins")
+                    return future.result()
+                error = error or future.exception()
+        raise error
+
+    async def _arun_once(self, attempt: Callable[[], Awaitable[Any]], timeout: float) -> Any:
+        started = time.monotonic()
+        primary = asyncio.ensure_future(attempt())
+        pending = {primary}
+        try:
+            hedge_delay = self._hedge_delay()
+            if hedge_delay is not None and hedge_delay < timeout:
+                done, _ = await asyncio.wait(pending, timeout=hedge_delay)
+                if not done:
+                    self._count("hedges")
+                    pending.add(asyncio.ensure_future(attempt()))
+
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, timeout=max(0.0, started + timeout - time.monotonic()), return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    raise TimeoutError(f"LLM call timed out after {timeout:.1f} seconds")
+                for task in done:
+                    if task.exception() is None:
+                        self._record_latency(time.monotonic() - started)
+                        if task is not primary:
+                            self._count("hedge_wins")
+                        return task.result()
+                    error = error or task.exception()
+            raise error
+        finally:
+            # Unlike threads, the losing or timed-out coroutines can be stopped
+            for task in pending:
+                task.cancel()
+
+    def _should_retry(self, error: Exception, retry: int, deadline_at: float) -> bool:
+        if isinstance(error, LLMUnavailableError):
+            self.breaker.release_trial()
+            return False
+        if not is_retryable(error):
+            # A bad request says nothing about provider health
+            self.breaker.release_trial()
+            return False
+        self.breaker.record_failure()
+        self._count("failures")
+        if retry >= self.max_retries or time.monotonic() >= deadline_at:
+            return False
+        self._count("retries")
+        return True
+
+    def _final_error(self, error: Exception) -> Exception:
+        if isinstance(error, TimeoutError):
+            return self._deadline_error()
+        return error
+
+    def _deadline_error(self) -> DeadlineExceededError:
+        self._count("deadline_exceeded")
+        return DeadlineExceededError("LLM call did not finish before the request deadline")
+
+    def _limits(self) -> Tuple[float, float]:
+        """Deadline of the call and the timeout of each attempt"""
+        now = time.monotonic()
+        # The route deadline governs calls made for a request; timeout covers
+        # calls made outside one, such as quiz pool refills
+        deadline_at = _deadline.get()
+        if deadline_at is None:
+            deadline_at = now + self.timeout
+        if self.attempt_timeout is not None:
+            return deadline_at, self.attempt_timeout
+        return deadline_at, max(0.0, deadline_at - now) * ATTEMPT_SHARE
+
+    def _backoff(self, retry: int, deadline_at: float) -> float:
+        """Full-jitter exponential backoff, never sleeping past the deadline"""
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** retry))
+        return max(0.0, min(delay, deadline_at - time.monotonic()))
+
+    def _hedge_delay(self) -> Optional[float]:
+        """The recent p95 latency once enough calls were seen, if hedging is on"""
+        if not self.hedging:
+            return None
+        with self._lock:
+            if len(self._latencies) < 20:
+                return None
+            ordered = sorted(self._latencies)
+        return max(self.hedge_min_delay, ordered[int(len(ordered) * 0.95) - 1])
+
+    def _record_latency(self, seconds: float) -> None:
+        with self._lock:
+            self._latencies.append(seconds)
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self._counters)
+            ordered = sorted(self._latencies)
+        if ordered:
+            counters["latency_p50_ms"] = round(ordered[len(ordered) // 2] * 1000, 2)
+            counters["latency_p95_ms"] = round(ordered[max(0, int(len(ordered) * 0.95) - 1)] * 1000, 2)
+        counters["circuit"] = self.breaker.stats()
+        return counters
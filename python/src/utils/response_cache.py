@@ -0,0 +1,297 @@
+import hashlib
+import inspect
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Dict, Any, Optional, Tuple
+
+# Set while a route (or caller) has opted out of the response cache
+_cache_disabled: ContextVar[bool] = ContextVar("llm_cache_disabled", default=False)
+# Set while a caller wants newly generated responses but still caches them
+_cache_reads_skipped: ContextVar[bool] = ContextVar("llm_cache_reads_skipped", default=False)
+
+
+@contextmanager
+def cache_disabled():
+    """Disable the LLM response cache for the enclosed block"""
+    token = _cache_disabled.set(True)
+    try:
+        yield
+    finally:
+        _cache_disabled.reset(token)
+
+
+@contextmanager
+def fresh_responses():
+    """
+    Skip response cache reads for the enclosed block.
+
+    Unlike cache_disabled, new responses are still cached and identical
+    concurrent calls are still coalesced; only a cached answer is not reused.
+    """
+    token = _cache_reads_skipped.set(True)
+    try:
+        yield
+    finally:
+        _cache_reads_skipped.reset(token)
+
+
+def no_cache(view):
+    """Route decorator that opts the whole request out of the response cache"""
+    if inspect.iscoroutinefunction(view):
+        @wraps(view)
+        async def async_wrapper(*args, **kwargs):
+            with cache_disabled():
+                return await view(*args, **kwargs)
+        return async_wrapper
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        with cache_disabled():
+            return view(*args, **kwargs)
+    return wrapper
+
+
+def is_cache_disabled() -> bool:
+    """Return True when the current context opted out of caching"""
+    return _cache_disabled.get()
+
+
+def is_cache_read_skipped() -> bool:
+    """Return True when the current context wants fresh responses"""
+    return _cache_reads_skipped.get()
+
+
+class MemoryCache:
+    """Bounded in-process LRU cache with TTL and size-based eviction"""
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 64 * 1024 * 1024, ttl: float = 3600):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        size = len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._bytes += size
+            # Evict least recently used entries until both limits hold
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _remove(self, key: str) -> None:
+        _, value = self._entries.pop(key)
+        self._bytes -= len(value.encode("utf-8"))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "evictions": self.evictions
+            }
+
+
+class SQLiteCache:
+    """
+    File-backed cache tier that survives restarts.
+
+    SQLite in WAL mode lets several worker processes on the same host
+    share one cache file.
+    """
+
+    def __init__(self, path: str, ttl: float = 86400, max_entries: int = 100000):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._writes = 0
+        self._writes_lock = threading.Lock()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        conn = self._connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+            "expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS llm_cache_accessed ON llm_cache (accessed_at)")
+        conn.commit()
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections must not be shared between threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        conn = self._connection()
+        row = conn.execute(
+            "SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        value, expires_at = row
+        if expires_at < now:
+            conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+            return None
+        conn.execute("UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (now, key))
+        return value
+
+    def set(self, key: str, value: str) -> None:
+        now = time.time()
+        conn = self._connection()
+        conn.execute(
+            "INSERT OR REPLACE INTO llm_cache (key, value, expires_at, accessed_at) "
+            "VALUES (?, ?, ?, ?)",
+            (key, value, now + self.ttl, now)
+        )
+        with self._writes_lock:
+            self._writes += 1
+            # Prune periodically rather than on every write
+            prune = self._writes % 100 == 0
+        if prune:
+            self._prune(conn, now)
+
+    def _prune(self, conn: sqlite3.Connection, now: float) -> None:
+        conn.execute("DELETE FROM llm_cache WHERE expires_at < ?", (now,))
+        conn.execute(
+            "DELETE FROM llm_cache WHERE key IN ("
+            "SELECT key FROM llm_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,)
+        )
+
+    def clear(self) -> None:
+        self._connection().execute("DELETE FROM llm_cache")
+
+    def stats(self) -> Dict[str, Any]:
+        (entries,) = self._connection().execute("SELECT COUNT(*) FROM llm_cache").fetchone()
+        return {"entries": entries, "path": self.path}
+
+
+class ResponseCache:
+    """Two-tier LLM response cache: in-memory LRU in front of an optional disk tier"""
+
+    def __init__(self, memory: Optional[MemoryCache] = None, disk: Optional[SQLiteCache] = None):
+        self.memory = memory or MemoryCache()
+        self.disk = disk
+        self._lock = threading.Lock()
+        self._counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "sets": 0, "bypassed": 0}
+
+    @classmethod
+    def from_env(cls) -> Optional["ResponseCache"]:
+        """
+        Build a cache from environment variables.
+
+        Returns:
+            A configured ResponseCache, or None when LLM_CACHE_ENABLED is false
+        """
+        if os.getenv("LLM_CACHE_ENABLED", "True").lower() != "true":
+            return None
+
+        memory = MemoryCache(
+            max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", 1024)),
+            max_bytes=int(os.getenv("LLM_CACHE_MAX_BYTES", 64 * 1024 * 1024)),
+            ttl=float(os.getenv("LLM_CACHE_TTL", 3600))
+        )
+        disk = None
+        disk_path = os.getenv("LLM_CACHE_PATH")
+        if disk_path:
+            disk = SQLiteCache(
+                disk_path,
+                ttl=float(os.getenv("LLM_CACHE_DISK_TTL", 86400)),
+                max_entries=int(os.getenv("LLM_CACHE_DISK_MAX_ENTRIES", 100000))
+            )
+        return cls(memory, disk)
+
+    @staticmethod
+    def make_key(model_name: str, prompt: str, template: Optional[str], json_mode: bool = False) -> str:
+        """Build the cache key from the model name, rendered prompt, template and output mode"""
+        digest = hashlib.sha256()
+        for part in (model_name, "json" if json_mode else "text", template or "", prompt):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\x00")
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        value = self.memory.get(key)
+        if value is not None:
+            self._count("memory_hits")
+            return value
+
+        if self.disk is not None:
+            value = self.disk.get(key)
+            if value is not None:
+                # Promote to the memory tier for the next lookup
+                self.memory.set(key, value)
+                self._count("disk_hits")
+                return value
+
+        self._count("misses")
+        return None
+
+    def set(self, key: str, value: str) -> None:
+        self.memory.set(key, value)
+        if self.disk is not None:
+            self.disk.set(key, value)
+        self._count("sets")
+
+    def record_bypass(self) -> None:
+        self._count("bypassed")
+
+    def clear(self) -> None:
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self._counters)
+        hits = counters["memory_hits"] + counters["disk_hits"]
+        lookups = hits + counters["misses"]
+        counters["hits"] = hits
+        counters["hit_rate"] = round(hits / lookups, 4) if lookups else 0.0
+        counters["memory"] = self.memory.stats()
+        if self.disk is not None:
+            counters["disk"] = self.disk.stats()
+        return counters
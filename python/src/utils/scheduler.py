@@ -0,0 +1,273 @@
+import asyncio
+import heapq
+import inspect
+import itertools
+import math
+import os
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Dict, Any, AsyncIterator, Iterator, List, Optional
+from .llm_errors import QueueFullError
+from .metrics import LLM_QUEUE_WAIT
+from .tracing import span
+
+# Lower values are admitted first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_NORMAL = 1
+PRIORITY_BACKGROUND = 2
+
+PRIORITY_NAMES = {PRIORITY_INTERACTIVE: "interactive", PRIORITY_NORMAL: "normal", PRIORITY_BACKGROUND: "background"}
+
+# Priority of the LLM calls made while handling the current request
+_priority: ContextVar[int] = ContextVar("llm_priority", default=PRIORITY_NORMAL)
+
+
+@contextmanager
+def request_priority(level: int):
+    """Run the enclosed block's LLM calls at the given priority"""
+    token = _priority.set(level)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def priority(level: int):
+    """Decorator running a route (or any callable) at the given LLM priority"""
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with request_priority(level):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with request_priority(level):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def prioritized(level: int, iterator: Iterator[Any]) -> Iterator[Any]:
+    """
+    Iterate a lazily streamed response at the given priority.
+
+    Streaming views return before their generator runs, so the priority
+    set by the route decorator no longer applies while it is consumed.
+    """
+    with request_priority(level):
+        yield from iterator
+
+
+async def aprioritized(level: int, iterator: AsyncIterator[Any]) -> AsyncIterator[Any]:
+    """Asynchronous variant of prioritized"""
+    with request_priority(level):
+        async for item in iterator:
+            yield item
+
+
+def current_priority() -> int:
+    return _priority.get()
+
+
+class _ModelSlots:
+    """Concurrency slots and waiting queue for one model"""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.active = 0
+        self.waiting = 0
+        self.queue: List[Any] = []
+        # Moving average of how long a call holds a slot, for Retry-After
+        self.avg_hold = 1.0
+
+
+class LLMScheduler:
+    """
+    Admission control in front of the LLM.
+
+    Each model gets a bounded number of concurrent calls. Calls beyond that
+    wait in a priority queue (interactive before normal before background);
+    when the queue is full, or a call waits longer than the queue timeout,
+    QueueFullError is raised instead of letting the request pile up.
+    Waiters are concurrent.futures.Future objects, so threaded and async
+    callers share the same queue.
+    """
+
+    def __init__(self,
+                 max_concurrency: int = 8,
+                 max_queue: int = 64,
+                 queue_timeout: float = 30,
+                 model_limits: Optional[Dict[str, int]] = None):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.model_limits = model_limits or {}
+        self._models: Dict[str, _ModelSlots] = {}
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+        self._counters = {"admitted": 0, "queued": 0, "rejected": 0, "timed_out": 0, "cancelled": 0}
+        self._admitted_by_priority = {name: 0 for name in PRIORITY_NAMES.values()}
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    @classmethod
+    def from_env(cls) -> Optional["LLMScheduler"]:
+        """
+        Build a scheduler from environment variables.
+
+        LLM_MODEL_CONCURRENCY overrides the limit per model, e.g.
+        "gemini-1.5-flash=8,gemini-1.5-pro=2".
+
+        Returns:
+            A configured LLMScheduler, or None when LLM_SCHEDULER_ENABLED is false
+        """
+        if os.getenv("LLM_SCHEDULER_ENABLED", "True").lower() != "true":
+            return None
+
+        model_limits = {}
+        for entry in os.getenv("LLM_MODEL_CONCURRENCY", "").split(","):
+            if "=" in entry:
+                model, limit = entry.split("=", 1)
+                model_limits[model.strip()] = int(limit)
+        return cls(
+            max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", 8)),
+            max_queue=int(os.getenv("LLM_MAX_QUEUE", 64)),
+            queue_timeout=float(os.getenv("LLM_QUEUE_TIMEOUT", 30)),
+            model_limits=model_limits
+        )
+
+    @contextmanager
+    def slot(self, model: str):
+        """Hold one of the model's concurrency slots for the enclosed call"""
+        future = self._enqueue(model)
+        if future is not None:
+            with span("llm.queue", model=model):
+                try:
+                    future.result(timeout=self.queue_timeout)
+                except FutureTimeoutError:
+                    if self._withdraw(model, future):
+                        raise self._timeout_error(model)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._release(model, time.monotonic() - started)
+
+    @asynccontextmanager
+    async def aslot(self, model: str):
+        """Asynchronous variant of slot; waiting does not block the event loop"""
+        future = self._enqueue(model)
+        if future is not None:
+            with span("llm.queue", model=model):
+                try:
+                    await asyncio.wait_for(asyncio.wrap_future(future), self.queue_timeout)
+                except asyncio.TimeoutError:
+                    if self._withdraw(model, future):
+                        raise self._timeout_error(model)
+                except asyncio.CancelledError:
+                    # The request went away while queued
+                    if not self._withdraw(model, future, "cancelled"):
+                        self._release(model, 0.0)
+                    raise
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._release(model, time.monotonic() - started)
+
+    def _slots(self, model: str) -> _ModelSlots:
+        slots = self._models.get(model)
+        if slots is None:
+            slots = _ModelSlots(self.model_limits.get(model, self.max_concurrency))
+            self._models[model] = slots
+        return slots
+
+    def _enqueue(self, model: str) -> Optional[Future]:
+        """Take a free slot (returns None) or queue the caller (returns its future)"""
+        level = current_priority()
+        with self._lock:
+            slots = self._slots(model)
+            if slots.active < slots.limit and not slots.waiting:
+                slots.active += 1
+                self._admit(model, level, 0.0)
+                return None
+
+            if slots.waiting >= self.max_queue:
+                self._counters["rejected"] += 1
+                raise QueueFullError(
+                    f"LLM queue for {model} is full ({slots.waiting} waiting)",
+                    retry_after=self._retry_after(slots)
+                )
+
+            future = Future()
+            future.level = level
+            future.enqueued_at = time.monotonic()
+            heapq.heappush(slots.queue, (level, next(self._sequence), future))
+            slots.waiting += 1
+            self._counters["queued"] += 1
+            return future
+
+    def _withdraw(self, model: str, future: Future, reason: str = "timed_out") -> bool:
+        """Leave the queue; returns False when the slot was granted meanwhile"""
+        if not future.cancel():
+            return False
+        with self._lock:
+            slots = self._slots(model)
+            # Drop the entry now rather than when a release reaches it, so
+            # abandoned waiters do not pile up in the heap
+            slots.queue = [entry for entry in slots.queue if entry[2] is not future]
+            heapq.heapify(slots.queue)
+            slots.waiting -= 1
+            self._counters[reason] += 1
+        return True
+
+    def _timeout_error(self, model: str) -> QueueFullError:
+        with self._lock:
+            retry_after = self._retry_after(self._slots(model))
+        return QueueFullError(f"Timed out after {self.queue_timeout} seconds waiting for {model}", retry_after=retry_after)
+
+    def _release(self, model: str, held: float) -> None:
+        """Free a slot, handing it straight to the highest-priority waiter if any"""
+        with self._lock:
+            slots = self._slots(model)
+            slots.avg_hold = 0.8 * slots.avg_hold + 0.2 * held
+            while slots.queue:
+                _, _, future = heapq.heappop(slots.queue)
+                if future.set_running_or_notify_cancel():
+                    slots.waiting -= 1
+                    self._admit(model, future.level, time.monotonic() - future.enqueued_at)
+                    future.set_result(True)
+                    return
+            slots.active -= 1
+
+    def _admit(self, model: str, level: int, waited: float) -> None:
+        LLM_QUEUE_WAIT.observe(waited, model=model)
+        self._counters["admitted"] += 1
+        self._admitted_by_priority[PRIORITY_NAMES.get(level, "normal")] += 1
+        self._wait_total += waited
+        self._wait_max = max(self._wait_max, waited)
+
+    def _retry_after(self, slots: _ModelSlots) -> int:
+        """Seconds until the queue is likely to have drained"""
+        return max(1, math.ceil(slots.avg_hold * (slots.waiting + 1) / slots.limit))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            admitted = self._counters["admitted"]
+            return {
+                **self._counters,
+                "admitted_by_priority": dict(self._admitted_by_priority),
+                "queue_wait_avg_ms": round(self._wait_total / admitted * 1000, 2) if admitted else 0.0,
+                "queue_wait_max_ms": round(self._wait_max * 1000, 2),
+                "models": {
+                    model: {"limit": slots.limit, "active": slots.active, "waiting": slots.waiting}
+                    for model, slots in self._models.items()
+                }
+            }
@@ -0,0 +1,144 @@
+import json
+import os
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+_TYPE_NAMES = {str: "string", int: "integer", float: "number", bool: "boolean", list: "array", dict: "object"}
+
+
+def _compile(spec: Any) -> Callable[[Any], bool]:
+    """
+    Turn a field spec into a predicate.
+
+    A spec is a type (str, int, float, bool, list, dict), a one-element list
+    [item_spec] for an array of such items, or a dict {key: spec} for an
+    object with at least those keys.
+    """
+    if isinstance(spec, list):
+        check_item = _compile(spec[0])
+        return lambda value: isinstance(value, list) and all(check_item(item) for item in value)
+    if isinstance(spec, dict):
+        checks = [(key, _compile(value_spec)) for key, value_spec in spec.items()]
+        return lambda value: isinstance(value, dict) and all(key in value and check(value[key]) for key, check in checks)
+    if spec is float:
+        # JSON numbers; bool is an int subclass but not a number here
+        return lambda value: isinstance(value, (int, float)) and not isinstance(value, bool)
+    if spec is int:
+        return lambda value: isinstance(value, int) and not isinstance(value, bool)
+    if spec in _TYPE_NAMES:
+        return lambda value: isinstance(value, spec)
+    raise ValueError(f"Unsupported schema spec: {spec!r}")
+
+
+def _describe(spec: Any) -> Any:
+    if isinstance(spec, list):
+        return [_describe(spec[0])]
+    if isinstance(spec, dict):
+        return {key: _describe(value_spec) for key, value_spec in spec.items()}
+    return _TYPE_NAMES[spec]
+
+
+class ResponseSchema:
+    """
+    Expected top-level fields of a JSON response.
+
+    Declared next to the prompt asking for the response; the validators are
+    compiled when the schema is created, so checking a response only runs
+    the predicates. Validation reports which top-level fields are missing
+    or invalid, so only those need to be asked for again.
+    """
+
+    def __init__(self, fields: Dict[str, Any]):
+        self.fields = fields
+        self._validators = {name: _compile(spec) for name, spec in fields.items()}
+
+    def invalid_fields(self, data: Any) -> List[str]:
+        """Names of the fields that are missing or invalid; every field when data is not an object"""
+        if not isinstance(data, dict):
+            return list(self.fields)
+        return [name for name, check in self._validators.items() if name not in data or not check(data[name])]
+
+    def validate(self, data: Any, what: str) -> Dict[str, Any]:
+        """
+        Check a parsed response.
+
+        Args:
+            data: Parsed JSON response
+            what: Name of the response used in the error, e.g. "review"
+
+        Returns:
+            The response, unchanged
+
+        Raises:
+            ValueError: If a field is missing or invalid
+        """
+        invalid = self.invalid_fields(data)
+        if invalid:
+            raise ValueError(f"Invalid {what} structure: missing or invalid {', '.join(invalid)}")
+        return data
+
+    def describe(self, names: List[str]) -> str:
+        """JSON outline of the named fields with their expected types, for a repair prompt"""
+        return json.dumps({name: _describe(self.fields[name]) for name in names})
+
+
+class ResponseRepair:
+    """
+    Policy for responses that fail their schema.
+
+    When at most max_invalid_ratio of a schema's fields are missing or
+    invalid, a short repair prompt asks only for those fields and they are
+    merged into the response. Responses that are not JSON at all, or too
+    broken to repair, are regenerated once instead (when full_retry is on).
+    Outcomes are counted as valid, repaired, retried or failed.
+    """
+
+    def __init__(self, max_invalid_ratio: float = 0.5, full_retry: bool = True, context_chars: int = 4000):
+        self.max_invalid_ratio = max_invalid_ratio
+        self.full_retry = full_retry
+        self.context_chars = context_chars
+        self._lock = threading.Lock()
+        self._counters = {"valid": 0, "repaired": 0, "retried": 0, "failed": 0}
+        self._last_error: Optional[str] = None
+
+    @classmethod
+    def from_env(cls) -> Optional["ResponseRepair"]:
+        """
+        Build the repair policy from environment variables.
+
+        Returns:
+            A ResponseRepair, or None when RESPONSE_REPAIR is false and
+            invalid responses should fail right away
+        """
+        if os.getenv("RESPONSE_REPAIR", "True").lower() != "true":
+            return None
+        return cls(
+            max_invalid_ratio=float(os.getenv("RESPONSE_REPAIR_MAX_INVALID_RATIO", 0.5)),
+            full_retry=os.getenv("RESPONSE_FULL_RETRY", "True").lower() == "true",
+            context_chars=int(os.getenv("RESPONSE_REPAIR_CONTEXT_CHARS", 4000))
+        )
+
+    def repairable(self, schema: ResponseSchema, data: Any, invalid: List[str]) -> bool:
+        """Whether asking for the invalid fields is likely cheaper than regenerating"""
+        return isinstance(data, dict) and len(invalid) <= len(schema.fields) * self.max_invalid_ratio
+
+    def truncate(self, text: str) -> str:
+        if len(text) <= self.context_chars:
+            return text
+        return text[:self.context_chars] + " ..."
+
+    def count(self, outcome: str, error: Optional[str] = None) -> None:
+        with self._lock:
+            self._counters[outcome] += 1
+            if error is not None:
+                self._last_error = error
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            checked = sum(self._counters.values())
+            return {
+                **self._counters,
+                "repair_rate": round(self._counters["repaired"] / checked, 4) if checked else 0.0,
+                "retry_rate": round(self._counters["retried"] / checked, 4) if checked else 0.0,
+                "last_error": self._last_error
+            }
@@ -0,0 +1,205 @@
+import os
+import re
+import threading
+import zlib
+from typing import Dict, Any, List, Optional, Tuple
+import numpy as np
+
+_WORD = re.compile(r"[a-z0-9_+#]+")
+
+# Words that carry no meaning for matching programming questions
+_STOP_WORDS = frozenset("""
+a an and are about can could describe difference do does explain for give how i in is it me
+of on please show tell that the this to use used using what when whats where which why with
+work works you your
+""".split())
+
+# Words that change the answer even when the rest of a question matches:
+# language keywords and names, and common type names
+_KEYWORDS = frozenset("""
+for while if else elif switch case break continue return yield def function fn func lambda
+class struct interface enum trait let var const val static final public private protected
+async await try catch except finally throw raise new delete import export from null none nil
+undefined true false int float double string str bool char long list dict map set array tuple
+vector pointer reference python java javascript js typescript ts c c++ cpp c# csharp go golang
+rust ruby php kotlin swift scala sql bash shell r perl lua haskell dart html css react node
+""".split())
+
+_RAW_WORD = re.compile(r"[A-Za-z0-9_+#.]+")
+_QUOTED = re.compile(r"[`'\"]([^`'\"\s]+)[`'\"]")
+
+
+def distinguishing_tokens(text: str) -> frozenset:
+    """
+    Tokens two questions must share for one's answer to serve the other.
+
+    Quoted or backticked text, identifiers (digits, underscores, dots,
+    inner capitals as in NoneType or TypeError), language keywords and
+    language names. Similar wording around different ones, e.g. a for
+    loop and a while loop, asks a different question.
+    """
+    tokens = {quoted.lower() for quoted in _QUOTED.findall(text)}
+    for word in _RAW_WORD.findall(text):
+        word = word.strip(".")
+        if not word:
+            continue
+        lower = word.lower()
+        if (lower in _KEYWORDS
+                or any(char.isdigit() or char in "_.+#" for char in word)
+                or any(char.isupper() for char in word[1:])):
+            tokens.add(lower)
+    return frozenset(tokens)
+
+
+class HashingVectorizer:
+    """
+    Offline text vectorizer using the hashing trick.
+
+    Words and their character trigrams are hashed into a fixed number of
+    buckets, so no vocabulary has to be trained or downloaded and
+    paraphrases ("closure" / "closures") land close together.
+    """
+
+    def __init__(self, dim: int = 1024):
+        self.dim = dim
+
+    def tokens(self, text: str) -> List[str]:
+        words = [word for word in _WORD.findall(text.lower()) if word not in _STOP_WORDS]
+        features = []
+        for word in words:
+            # Crude stemming so plurals match their singular
+            if len(word) > 4 and word.endswith("s"):
+                word = word[:-1]
+            features.append(word)
+            padded = f"<{word}>"
+            features.extend(padded[i:i + 3] for i in range(len(padded) - 2))
+        return features
+
+    def transform(self, text: str) -> np.ndarray:
+        """Return the L2-normalized float32 vector for text"""
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for feature in self.tokens(text):
+            # crc32 is stable across processes, unlike hash()
+            digest = zlib.crc32(feature.encode("utf-8"))
+            vector[digest % self.dim] += 1.0 if digest & 0x80000000 else -1.0
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+
+class SemanticCache:
+    """
+    Cache that answers near-duplicate queries.
+
+    Query vectors live in one preallocated float32 matrix; a lookup is a
+    single matrix-vector product followed by a top-k selection. A candidate
+    above the threshold is only a hit when its context (e.g. the model) is
+    the same and it has the same distinguishing tokens as the query. When
+    the cache is full the least recently used entry is replaced.
+    """
+
+    def __init__(self, capacity: int = 2048, threshold: float = 0.95, dim: int = 1024, top_k: int = 3):
+        self.capacity = capacity
+        self.threshold = threshold
+        self.top_k = top_k
+        self.vectorizer = HashingVectorizer(dim)
+        self._vectors = np.zeros((capacity, dim), dtype=np.float32)
+        self._values: List[Optional[str]] = [None] * capacity
+        self._keys: List[Optional[Tuple[str, frozenset]]] = [None] * capacity
+        self._last_used = np.zeros(capacity, dtype=np.int64)
+        self._size = 0
+        self._clock = 0
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "rejected": 0, "sets": 0, "evictions": 0}
+
+    @classmethod
+    def from_env(cls) -> Optional["SemanticCache"]:
+        """
+        Build a semantic cache from environment variables.
+
+        Returns:
+            A configured SemanticCache, or None unless SEMANTIC_CACHE_ENABLED is true
+        """
+        if os.getenv("SEMANTIC_CACHE_ENABLED", "False").lower() != "true":
+            return None
+        return cls(
+            capacity=int(os.getenv("SEMANTIC_CACHE_CAPACITY", 2048)),
+            threshold=float(os.getenv("SEMANTIC_CACHE_THRESHOLD", 0.95)),
+            dim=int(os.getenv("SEMANTIC_CACHE_DIM", 1024))
+        )
+
+    def search(self, text: str) -> List[Tuple[float, str]]:
+        """
+        Find the cached entries most similar to text.
+
+        Returns:
+            Up to top_k (cosine similarity, value) pairs, best first
+        """
+        vector = self.vectorizer.transform(text)
+        with self._lock:
+            return [(score, self._values[index]) for score, index in self._top_k(vector)]
+
+    def get(self, text: str, context: str = "") -> Optional[str]:
+        """Return the cached value of the closest matching query above the threshold, if any"""
+        vector = self.vectorizer.transform(text)
+        key = (context, distinguishing_tokens(text))
+        with self._lock:
+            close = [index for score, index in self._top_k(vector) if score >= self.threshold]
+            for index in close:
+                if self._keys[index] == key:
+                    self._touch(index)
+                    self._counters["hits"] += 1
+                    return self._values[index]
+            self._counters["rejected" if close else "misses"] += 1
+            return None
+
+    def set(self, text: str, value: str, context: str = "") -> None:
+        vector = self.vectorizer.transform(text)
+        key = (context, distinguishing_tokens(text))
+        with self._lock:
+            same = [index for score, index in self._top_k(vector) if score >= 0.999 and self._keys[index] == key]
+            if same:
+                # Same query again: refresh the stored answer in place
+                index = same[0]
+            elif self._size < self.capacity:
+                index = self._size
+                self._size += 1
+            else:
+                index = int(np.argmin(self._last_used))
+                self._counters["evictions"] += 1
+            self._vectors[index] = vector
+            self._values[index] = value
+            self._keys[index] = key
+            self._touch(index)
+            self._counters["sets"] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._vectors[:] = 0
+            self._values = [None] * self.capacity
+            self._keys = [None] * self.capacity
+            self._last_used[:] = 0
+            self._size = 0
+
+    def _top_k(self, vector: np.ndarray) -> List[Tuple[float, int]]:
+        """Top-k (similarity, index) pairs among the stored vectors; caller holds the lock"""
+        if self._size == 0 or not vector.any():
+            return []
+        scores = self._vectors[:self._size] @ vector
+        k = min(self.top_k, self._size)
+        candidates = np.argpartition(-scores, k - 1)[:k]
+        ordered = candidates[np.argsort(-scores[candidates])]
+        return [(float(scores[index]), int(index)) for index in ordered]
+
+    def _touch(self, index: int) -> None:
+        self._clock += 1
+        self._last_used[index] = self._clock
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self._counters)
+            counters["entries"] = self._size
+        lookups = counters["hits"] + counters["misses"] + counters["rejected"]
+        counters["capacity"] = self.capacity
+        counters["threshold"] = self.threshold
+        counters["hit_rate"] = round(counters["hits"] / lookups, 4) if lookups else 0.0
+        return counters
@@ -0,0 +1,141 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Awaitable, Callable, Dict, Any, Optional, Tuple
+from .llm_errors import DeadlineExceededError
+
+
+class _LeaderAbandoned(Exception):
+    """Handed to followers when the leader gave up for reasons of its own"""
+
+
+def _shareable(exception: BaseException) -> bool:
+    """
+    Whether followers should get the leader's exception.
+
+    Provider errors are shared. A cancelled leader (its client went away)
+    or one that ran out of its own deadline says nothing about the call,
+    so followers run it again instead.
+    """
+    return isinstance(exception, Exception) and not isinstance(exception, DeadlineExceededError)
+
+
+class SingleFlight:
+    """
+    Coalesce identical concurrent calls into one.
+
+    The first caller for a key (the leader) runs the call; callers that
+    arrive while it is in flight wait for the leader's result instead of
+    making their own. Calls are tracked with concurrent.futures.Future, so
+    threaded and async callers can share one in-flight call.
+    """
+
+    def __init__(self, timeout: Optional[float] = 120):
+        self.timeout = timeout
+        self._calls: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._counters = {"leaders": 0, "collapsed": 0, "timeouts": 0, "abandoned": 0}
+
+    @classmethod
+    def from_env(cls) -> Optional["SingleFlight"]:
+        """
+        Build a coalescer from environment variables.
+
+        Returns:
+            A configured SingleFlight, or None when LLM_COALESCE_ENABLED is false
+        """
+        if os.getenv("LLM_COALESCE_ENABLED", "True").lower() != "true":
+            return None
+        return cls(timeout=float(os.getenv("LLM_COALESCE_TIMEOUT", 120)))
+
+    def do(self, key: str, call: Callable[[], Any]) -> Any:
+        """
+        Run call, or wait for an identical call already in flight.
+
+        Args:
+            key: Identity of the call, e.g. the response cache key
+            call: Zero-argument callable making the actual request
+
+        Returns:
+            The result of the leader's call. A follower that waits longer
+            than the timeout makes its own call instead, and followers of
+            a cancelled leader start the call again.
+        """
+        while True:
+            future, leader = self._join(key)
+            if leader:
+                return self._lead(key, future, call)
+
+            try:
+                return future.result(timeout=self.timeout)
+            except _LeaderAbandoned:
+                self._count("abandoned")
+            except FutureTimeoutError:
+                self._count("timeouts")
+                return call()
+
+    async def ado(self, key: str, call: Callable[[], Awaitable[Any]]) -> Any:
+        """Asynchronous variant of do for coroutine functions"""
+        while True:
+            future, leader = self._join(key)
+            if leader:
+                try:
+                    result = await call()
+                except BaseException as e:
+                    self._finish(key, future, exception=e)
+                    raise
+                self._finish(key, future, result=result)
+                return result
+
+            try:
+                return await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+            except _LeaderAbandoned:
+                self._count("abandoned")
+            except asyncio.TimeoutError:
+                self._count("timeouts")
+                return await call()
+
+    def _join(self, key: str) -> Tuple[Future, bool]:
+        """Return the in-flight future for key and whether the caller leads it"""
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                self._counters["collapsed"] += 1
+                return future, False
+            future = Future()
+            # A running future cannot be cancelled by a follower giving up
+            future.set_running_or_notify_cancel()
+            self._calls[key] = future
+            self._counters["leaders"] += 1
+            return future, True
+
+    def _lead(self, key: str, future: Future, call: Callable[[], Any]) -> Any:
+        try:
+            result = call()
+        except BaseException as e:
+            self._finish(key, future, exception=e)
+            raise
+        self._finish(key, future, result=result)
+        return result
+
+    def _finish(self, key: str, future: Future, result: Any = None, exception: Optional[BaseException] = None) -> None:
+        """Hand the outcome to the followers and retire the key"""
+        with self._lock:
+            self._calls.pop(key, None)
+        if exception is not None:
+            future.set_exception(exception if _shareable(exception) else _LeaderAbandoned())
+        else:
+            future.set_result(result)
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self._counters)
+            counters["in_flight"] = len(self._calls)
+        calls = counters["leaders"] + counters["collapsed"]
+        counters["collapse_rate"] = round(counters["collapsed"] / calls, 4) if calls else 0.0
+        return counters
@@ -0,0 +1,13 @@
+import json
+from typing import Any, Dict
+
+# Headers that keep proxies (e.g. nginx) from buffering the event stream
+SSE_HEADERS: Dict[str, str] = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no"
+}
+
+
+def format_sse(event: str, data: Any) -> str:
+    """Format one Server-Sent Events message with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
@@ -0,0 +1,227 @@
+import inspect
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from functools import wraps
+from logging.handlers import RotatingFileHandler
+from typing import Dict, Any, List, Optional
+
+# Spans kept per trace; a large batch request should not grow a trace without bound
+MAX_SPANS = 500
+
+# Trace of the request being handled, and the span new spans nest under
+_trace: ContextVar[Optional["Trace"]] = ContextVar("request_trace", default=None)
+_parent: ContextVar[Optional[int]] = ContextVar("trace_parent_span", default=None)
+
+
+class Trace:
+    """
+    Timing spans of one request.
+
+    Spans may be recorded from several threads (fan-out branches, retried
+    LLM attempts) because worker threads run in a copy of the request's
+    context, which refers to the same Trace.
+    """
+
+    def __init__(self, method: str, route: str, path: str):
+        self.id = uuid.uuid4().hex[:16]
+        self.method = method
+        self.route = route
+        self.path = path
+        self.status: Optional[int] = None
+        self.started_at = datetime.now(timezone.utc)
+        self.duration: Optional[float] = None
+        self._started = time.perf_counter()
+        self._spans: List[Dict[str, Any]] = []
+        self._dropped = 0
+        self._lock = threading.Lock()
+
+    def start_span(self, name: str, attrs: Dict[str, Any]) -> Optional[int]:
+        with self._lock:
+            if len(self._spans) >= MAX_SPANS:
+                self._dropped += 1
+                return None
+            self._spans.append({
+                "name": name,
+                "parent": _parent.get(),
+                "start_ms": round((time.perf_counter() - self._started) * 1000, 3),
+                "duration_ms": None,
+                "thread": threading.current_thread().name,
+                **({"attrs": attrs} if attrs else {})
+            })
+            return len(self._spans) - 1
+
+    def end_span(self, index: int, error: Optional[BaseException]) -> None:
+        with self._lock:
+            span = self._spans[index]
+            span["duration_ms"] = round((time.perf_counter() - self._started) * 1000 - span["start_ms"], 3)
+            if error is not None:
+                span["error"] = type(error).__name__
+
+    def finish(self, status: Optional[int]) -> None:
+        self.status = status
+        self.duration = time.perf_counter() - self._started
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            spans = [dict(span) for span in self._spans]
+        return {
+            "id": self.id,
+            "method": self.method,
+            "route": self.route,
+            "path": self.path,
+            "status": self.status,
+            "started_at": self.started_at.isoformat(timespec="milliseconds"),
+            "duration_ms": round(self.duration * 1000, 3) if self.duration is not None else None,
+            "spans": spans,
+            "dropped_spans": self._dropped
+        }
+
+
+@contextmanager
+def request_trace(trace: Trace):
+    """Collect the enclosed block's spans into trace"""
+    token = _trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _trace.reset(token)
+
+
+def begin_trace(trace: Trace) -> None:
+    """Make trace current for hooks that cannot wrap the request in request_trace"""
+    _trace.set(trace)
+    _parent.set(None)
+
+
+def end_trace() -> Optional[Trace]:
+    """Detach and return the trace set by begin_trace"""
+    trace = _trace.get()
+    _trace.set(None)
+    return trace
+
+
+def current_trace() -> Optional[Trace]:
+    return _trace.get()
+
+
+@contextmanager
+def span(name: str, **attrs: Any):
+    """Time the enclosed block as a span of the current request; a no-op outside a traced request"""
+    trace = _trace.get()
+    index = trace.start_span(name, attrs) if trace is not None else None
+    if index is None:
+        yield
+        return
+
+    token = _parent.set(index)
+    error = None
+    try:
+        yield
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        _parent.reset(token)
+        trace.end_span(index, error)
+
+
+def traced(name: Optional[str] = None):
+    """Decorator recording each call of a (sync or async) function as a span"""
+    def decorator(func):
+        span_name = name or func.__qualname__
+        if inspect.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(span_name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(span_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class FlightRecorder:
+    """
+    Keep the traces of slow requests.
+
+    Requests slower than threshold_ms go into a bounded in-memory ring
+    buffer and, when a path is configured, are appended as JSON lines to
+    a size-rotated log file.
+    """
+
+    def __init__(self,
+                 threshold_ms: float = 5000,
+                 capacity: int = 100,
+                 path: Optional[str] = None,
+                 max_bytes: int = 10 * 1024 * 1024,
+                 backups: int = 3):
+        self.threshold_ms = threshold_ms
+        self._recent: deque = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self._counters = {"traced": 0, "recorded": 0}
+        self._log: Optional[logging.Logger] = None
+        if path:
+            # A dedicated logger, so the handler does the rotation and locking
+            self._log = logging.getLogger(f"{__name__}.flight_recorder.{id(self)}")
+            self._log.propagate = False
+            self._log.setLevel(logging.INFO)
+            handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups, encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            self._log.addHandler(handler)
+
+    @classmethod
+    def from_env(cls) -> Optional["FlightRecorder"]:
+        """
+        Build a flight recorder from environment variables.
+
+        Returns:
+            A configured FlightRecorder, or None when SLOW_REQUEST_TRACING is false
+        """
+        if os.getenv("SLOW_REQUEST_TRACING", "True").lower() != "true":
+            return None
+        return cls(
+            threshold_ms=float(os.getenv("SLOW_REQUEST_THRESHOLD_MS", 5000)),
+            capacity=int(os.getenv("SLOW_REQUEST_BUFFER", 100)),
+            path=os.getenv("SLOW_REQUEST_LOG") or None,
+            max_bytes=int(os.getenv("SLOW_REQUEST_LOG_MAX_BYTES", 10 * 1024 * 1024)),
+            backups=int(os.getenv("SLOW_REQUEST_LOG_BACKUPS", 3))
+        )
+
+    def record(self, trace: Trace) -> bool:
+        """Keep trace if the request was slow; returns whether it was kept"""
+        slow = trace.duration is not None and trace.duration * 1000 >= self.threshold_ms
+        with self._lock:
+            self._counters["traced"] += 1
+            if slow:
+                self._counters["recorded"] += 1
+        if not slow:
+            return False
+
+        entry = trace.to_dict()
+        with self._lock:
+            self._recent.append(entry)
+        if self._log is not None:
+            self._log.info(json.dumps(entry))
+        return True
+
+    def recent(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Slow request traces, most recent first"""
+        with self._lock:
+            entries = list(reversed(self._recent))
+        return entries[:limit] if limit else entries
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._counters, "threshold_ms": self.threshold_ms, "buffered": len(self._recent)}
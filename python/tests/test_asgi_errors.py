@@ -0,0 +1,23 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from starlette.applications import Starlette
+from starlette.testclient import TestClient
+from src.routes import asgi_routes, llm_routes
+
+
+class FailingLLMService:
+    async def agenerate_response(self, prompt, template=None, use_cache=True):
+        raise ValueError("Failed to generate response: boom")
+
+
+def test_plain_exception_returns_500_json(monkeypatch):
+    monkeypatch.setattr(llm_routes, "llm_service", FailingLLMService())
+    client = TestClient(Starlette(routes=asgi_routes.asgi_routes))
+
+    response = client.post("/generate", json={"prompt": "hello", "cache": False})
+
+    assert response.status_code == 500
+    assert response.json() == {"error": "Failed to generate response: boom"}
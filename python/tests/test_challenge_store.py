@@ -0,0 +1,129 @@
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.factories.fake_llm import FakeChatModel
+from src.services.challenge_store import ChallengeStore, MemoryChallengeBackend
+from src.services.coding_challenge_service import CodingChallengeService
+from src.services.llm_service import LLMService
+from src.utils.response_cache import MemoryCache, ResponseCache
+from src.utils.single_flight import SingleFlight
+
+REQUEST = ("incomplete-code", "Use closures", "Python", "moderate")
+
+
+class FailingBackend(MemoryChallengeBackend):
+    """Memory backend that raises while `failing` is set"""
+
+    def __init__(self):
+        super().__init__()
+        self.failing = True
+        self.calls = 0
+
+    def count(self, key):
+        self.calls += 1
+        if self.failing:
+            raise ConnectionError("database unreachable")
+        return super().count(key)
+
+
+def test_lookup_misses_until_saved_then_hits():
+    store = ChallengeStore()
+
+    assert store.lookup(*REQUEST) is None
+    store.save(*REQUEST, {"code": "def outer(): ..."})
+    assert store.lookup(*REQUEST) == {"code": "def outer(): ..."}
+    # Keys are normalized, so a differently written request is the same one
+    assert store.lookup("incomplete-code", "  use   CLOSURES. ", "python", "Moderate") == {"code": "def outer(): ..."}
+    assert store.lookup("output-based", "Use closures", "Python", "moderate") is None
+
+    stats = store.stats()
+    assert (stats["hits"], stats["misses"], stats["saved"], stats["stored"]) == (2, 2, 1, 1)
+
+
+def test_variants_are_generated_up_to_the_limit_then_rotated():
+    store = ChallengeStore(variants=2)
+
+    assert store.lookup(*REQUEST) is None
+    store.save(*REQUEST, {"variant": "a"})
+    # One variant is not enough yet; the next request generates another
+    assert store.lookup(*REQUEST) is None
+    store.save(*REQUEST, {"variant": "b"})
+
+    served = [store.lookup(*REQUEST)["variant"] for _ in range(4)]
+    assert served == ["a", "b", "a", "b"]
+
+
+def test_memory_backend_drops_the_oldest_key_beyond_max_keys():
+    store = ChallengeStore(MemoryChallengeBackend(max_keys=2))
+    for objective in ("first", "second", "third"):
+        store.save("incomplete-code", objective, "Python", "moderate", {"objective": objective})
+
+    assert store.lookup("incomplete-code", "first", "Python", "moderate") is None
+    assert store.lookup("incomplete-code", "third", "Python", "moderate") == {"objective": "third"}
+    assert store.stats()["stored"] == 2
+
+
+def test_store_is_bypassed_for_retry_after_seconds_after_an_error():
+    backend = FailingBackend()
+    store = ChallengeStore(backend, retry_after=0.1)
+
+    assert store.lookup(*REQUEST) is None
+    assert backend.calls == 1
+    assert store.stats()["available"] is False
+    assert store.stats()["last_error"] == "database unreachable"
+
+    # Within the window neither lookups nor saves touch the backend
+    backend.failing = False
+    assert store.lookup(*REQUEST) is None
+    store.save(*REQUEST, {"code": "skipped"})
+    assert backend.calls == 1
+    assert backend.size() == 0
+
+    time.sleep(0.15)
+    store.save(*REQUEST, {"code": "stored"})
+    assert store.lookup(*REQUEST) == {"code": "stored"}
+    assert backend.calls == 2
+    assert store.stats()["errors"] == 1
+
+
+def _service(variants=1, latency_ms=0):
+    cache = ResponseCache(MemoryCache())
+    llm_service = LLMService(FakeChatModel(latency_ms=latency_ms), cache=cache, coalescer=SingleFlight())
+    return CodingChallengeService(llm_service, ChallengeStore(variants=variants)), cache
+
+
+def test_store_miss_generates_a_fresh_variant_without_reading_the_response_cache():
+    service, cache = _service(variants=2)
+
+    service.generate_incomplete_code("Use closures", "Write a counter", "Python", "moderate")
+    service.generate_incomplete_code("Use closures", "Write a counter", "Python", "moderate")
+
+    stats = cache.stats()
+    assert stats["hits"] == 0
+    assert stats["bypassed"] == 2
+    # Fresh responses are still cached
+    assert stats["sets"] == 2
+    assert service.store.stats()["saved"] == 2
+
+
+def test_concurrent_store_misses_share_one_generation():
+    service, _ = _service(latency_ms=200)
+    results = []
+
+    def request():
+        results.append(service.generate_incomplete_code("Use closures", "Write a counter", "Python", "moderate"))
+
+    threads = [threading.Thread(target=request) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(results) == 4
+    assert all(result == results[0] for result in results)
+    assert service.store.stats()["saved"] == 1
+    assert service.store_flight.stats()["collapsed"] == 3
@@ -0,0 +1,43 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.factories.fake_llm import FakeChatModel
+from src.factories.llm_pool import LLMBackend, LLMPool
+
+
+def _pool(latency_ms, max_concurrency=2):
+    backend = LLMBackend("fake", FakeChatModel(latency_ms=latency_ms), max_concurrency=max_concurrency)
+    return LLMPool([backend], max_wait=0.2), backend
+
+
+def test_cancelled_ainvoke_frees_its_backend_slot():
+    pool, backend = _pool(latency_ms=300)
+
+    async def scenario():
+        for _ in range(2):
+            with pytest.raises(asyncio.TimeoutError):
+                await asyncio.wait_for(pool.ainvoke("What is a closure?"), 0.05)
+        assert backend.active == 0
+        # Both slots are free again, so two calls fit at once
+        return await asyncio.gather(pool.ainvoke("What is a closure?"), pool.ainvoke("What is a generator?"))
+
+    results = asyncio.run(scenario())
+
+    assert len(results) == 2
+    assert backend.active == 0
+    # A cancellation is neither a failure nor a latency sample
+    assert backend.failures == 0
+    assert backend.latency is not None and backend.latency >= 0.25
+
+
+def test_invoke_releases_the_slot_and_records_latency():
+    pool, backend = _pool(latency_ms=0, max_concurrency=1)
+
+    assert pool.invoke("What is a closure?").content
+    assert backend.active == 0
+    assert backend.latency is not None
@@ -0,0 +1,116 @@
+import os
+import random
+import string
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.services.question_bank import MinHasher, QuestionBank
+
+BANDS = ("beginner", "moderate", "advanced")
+
+
+def question(text, difficulty="moderate", topic="general"):
+    return {"text": text, "options": ["A", "B", "C", "D"], "correct_answer": "A",
+            "difficulty": difficulty, "topic": topic}
+
+
+def unique_text(seed):
+    """Random words, so no two generated texts share many shingles"""
+    rng = random.Random(seed)
+    return " ".join("".join(rng.choice(string.ascii_lowercase) for _ in range(6)) for _ in range(8)) + "?"
+
+
+def fill(bank, per_band, topics, language="Python", offset=0):
+    questions = [question(unique_text(f"{offset}-{band}-{index}"), band, topics[index % len(topics)])
+                 for band in BANDS for index in range(per_band)]
+    return bank.add(language, questions)
+
+
+def test_minhash_similarity_tracks_shared_text():
+    hasher = MinHasher()
+    text = "What does the yield keyword do inside a Python function?"
+
+    assert hasher.similarity(hasher.signature(text), hasher.signature(text.upper())) == 1.0
+    assert hasher.similarity(hasher.signature(text), hasher.signature(text.replace("Python", "Python 3"))) > 0.7
+    assert hasher.similarity(hasher.signature(text), hasher.signature(unique_text(0))) < 0.2
+
+
+def test_near_duplicates_are_rejected_per_language():
+    bank = QuestionBank()
+    text = "What does the yield keyword do inside a Python function?"
+
+    assert bank.add("Python", [question(text)]) == 1
+    assert bank.add("python", [question(text.lower()), question("  " + text.replace("?", "!"))]) == 0
+    assert bank.add("Python", [question("How is a list comprehension different from a generator expression?")]) == 1
+    # Another language has its own bank
+    assert bank.add("Rust", [question(text)]) == 1
+
+    stats = bank.stats()
+    assert stats["duplicates"] == 2
+    assert stats["languages"]["python"]["questions"] == 2
+
+
+def test_malformed_questions_are_skipped_and_unknown_difficulty_is_moderate():
+    bank = QuestionBank()
+
+    added = bank.add("Python", [{"text": "No options", "correct_answer": "A"},
+                                question(unique_text(1), difficulty="expert")])
+
+    assert added == 1
+    assert bank.stats()["languages"]["python"]["by_difficulty"] == {"beginner": 0, "moderate": 1, "advanced": 0}
+
+
+def test_assemble_waits_until_every_band_holds_min_per_band():
+    bank = QuestionBank(quiz_size=6, min_per_band=3)
+    fill(bank, per_band=2, topics=["a"])
+
+    assert bank.assemble("Python") is None
+    fill(bank, per_band=1, topics=["a"], offset=1)
+    assert bank.assemble("Python") is not None
+
+
+def test_a_band_never_supplies_fewer_questions_than_its_share():
+    # min_per_band below the band's share of the quiz: two questions are still required
+    bank = QuestionBank(quiz_size=6, min_per_band=1)
+    bank.add("Python", [question(unique_text(band), band) for band in BANDS])
+
+    assert bank.stats()["languages"]["python"]["ready"] is False
+    assert bank.assemble("Python") is None
+
+
+def test_assembled_quiz_keeps_the_difficulty_mix_and_spreads_topics():
+    bank = QuestionBank(quiz_size=6, min_per_band=4)
+    fill(bank, per_band=4, topics=["closures", "generators"])
+
+    for _ in range(10):
+        quiz = bank.assemble("Python")
+        assert quiz["total_questions"] == 6
+        assert [q["difficulty"] for q in quiz["questions"]] == ["beginner"] * 2 + ["moderate"] * 2 + ["advanced"] * 2
+        for band in BANDS:
+            topics = {q["topic"] for q in quiz["questions"] if q["difficulty"] == band}
+            assert topics == {"closures", "generators"}
+
+
+def test_workers_sharing_a_file_see_each_others_questions_once(tmp_path):
+    path = str(tmp_path / "bank.sqlite3")
+    first = QuestionBank(path=path, quiz_size=6, min_per_band=2)
+    second = QuestionBank(path=path, quiz_size=6, min_per_band=2)
+
+    assert fill(first, per_band=2, topics=["a"]) == 6
+    # The second worker indexes the rows on its next read and can serve the quiz
+    assert second.assemble("Python") is not None
+    # ...and rejects a question the first worker already banked
+    banked = first.assemble("Python")["questions"][0]
+    assert second.add("Python", [question(banked["text"])]) == 0
+
+    assert fill(second, per_band=1, topics=["b"], offset=1) == 3
+    first.assemble("Python")
+    second.assemble("Python")
+    # Each worker indexed its own rows once, when added, and the other's once, when synced
+    for bank in (first, second):
+        assert bank.stats()["languages"]["python"]["questions"] == 9
+        assert bank._own_ids == set()
+
+    # A restarted worker loads the whole file
+    assert QuestionBank(path=path, quiz_size=6).stats()["languages"]["python"]["questions"] == 9
@@ -0,0 +1,99 @@
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.factories.fake_llm import ServiceUnavailable
+from src.services.quiz_service import QuizService
+from src.services.quiz_shards import QuizSharder, band_targets
+
+TOPICS = ["closures", "generators", "decorators", "metaclasses", "coroutines", "iterators",
+          "descriptors", "comprehensions", "exceptions", "inheritance", "recursion", "slicing"]
+
+
+def question(topic, suffix="?"):
+    return {"text": f"What do {topic} do in Python{suffix}", "options": ["A", "B", "C", "D"], "correct_answer": "A"}
+
+
+class ScriptedLLMService:
+    """Answers each shard request with the next scripted response for its band"""
+
+    def __init__(self, script):
+        self.script = script
+        self.requests = []
+
+    def generate_from_prompt(self, spec, variables, use_cache=True):
+        self.requests.append(dict(variables))
+        response = self.script[variables["difficulty"]].pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return json.dumps({"questions": response})
+
+
+def test_band_targets_split_the_quiz_with_the_remainder_on_easier_bands():
+    assert band_targets(20) == {"beginner": 7, "moderate": 7, "advanced": 6}
+    assert band_targets(3, ("easy", "hard")) == {"easy": 2, "hard": 1}
+
+
+def test_add_stops_at_the_band_target_and_skips_malformed_questions():
+    quiz = QuizSharder(total=6).start("Python")
+
+    quiz.add("beginner", [{"text": "", "options": ["A", "B"], "correct_answer": "A"},
+                          {"text": "No options", "correct_answer": "A"},
+                          question("closures"), question("generators"), question("decorators")])
+    quiz.add("moderate", "not a list")
+
+    assert [q["text"] for q in quiz.questions] == ["What do closures do in Python?", "What do generators do in Python?"]
+    assert all(q["difficulty"] == "beginner" for q in quiz.questions)
+    assert set(quiz.pending()) == {"moderate", "advanced"}
+    assert quiz.pending()["moderate"]["count"] == 2
+
+
+def test_near_duplicates_are_dropped_across_bands():
+    quiz = QuizSharder(total=6).start("Python")
+
+    quiz.add("beginner", [question("closures"), question("closures", "")])
+    quiz.add("advanced", [question("closures", "!"), question("metaclasses")])
+
+    assert [q["text"] for q in quiz.questions] == ["What do closures do in Python?", "What do metaclasses do in Python?"]
+    assert quiz.duplicates == 2
+
+
+def test_short_and_failed_bands_are_topped_up():
+    llm_service = ScriptedLLMService({
+        "beginner": [[question("closures"), question("generators")]],
+        # One question short, and one repeating a beginner question
+        "moderate": [[question("decorators"), question("closures", "")],
+                     [question("coroutines"), question("iterators")]],
+        "advanced": [ServiceUnavailable("503 simulated provider failure"),
+                     [question("descriptors"), question("metaclasses")]]
+    })
+    service = QuizService(llm_service, sharder=QuizSharder(total=6, top_up_rounds=1))
+
+    quiz = service.create_quiz("Python")
+
+    assert quiz["total_questions"] == 6
+    assert [q["difficulty"] for q in quiz["questions"]] == ["beginner"] * 2 + ["moderate"] * 2 + ["advanced"] * 2
+    assert [q["text"] for q in quiz["questions"] if q["difficulty"] == "moderate"] == [
+        "What do decorators do in Python?", "What do coroutines do in Python?"]
+    top_ups = {request["difficulty"]: request for request in llm_service.requests[3:]}
+    assert set(top_ups) == {"moderate", "advanced"}
+    assert top_ups["moderate"]["count"] == 1
+    assert top_ups["advanced"]["count"] == 2
+    # The top-up prompt lists what was already accepted
+    assert "What do closures do in Python?" in top_ups["moderate"]["avoid"]
+
+
+def test_quiz_with_some_questions_is_returned_when_top_up_rounds_run_out():
+    llm_service = ScriptedLLMService({
+        "beginner": [[question("closures"), question("generators")]],
+        "moderate": [[question("decorators")]],
+        "advanced": [[question("descriptors"), question("metaclasses")]]
+    })
+    service = QuizService(llm_service, sharder=QuizSharder(total=6, top_up_rounds=0))
+
+    quiz = service.create_quiz("Python")
+
+    assert quiz["total_questions"] == 5
+    assert len(llm_service.requests) == 3
@@ -0,0 +1,79 @@
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.resilience import CircuitBreaker, ResilientCaller
+from src.utils.scheduler import LLMScheduler
+
+MODEL = "test-model"
+
+
+class HangingBackend:
+    """Model call that blocks until released, tracking how many run at once"""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.in_flight = 0
+        self.peak = 0
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            self.calls += 1
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+        try:
+            self.release.wait(5)
+            return "answer"
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+def _wait_for(condition, timeout=5):
+    give_up_at = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < give_up_at, "condition not reached"
+        time.sleep(0.005)
+
+
+def test_timed_out_attempts_keep_their_slot_until_they_return():
+    scheduler = LLMScheduler(max_concurrency=2, queue_timeout=0.3)
+    caller = ResilientCaller(timeout=5, attempt_timeout=0.05, max_retries=3, base_delay=0,
+                             breaker=CircuitBreaker(failure_threshold=100))
+    backend = HangingBackend()
+    errors = []
+
+    def request():
+        try:
+            caller.call(backend, admit=lambda: scheduler.slot(MODEL))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=request) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+
+    # Every caller gave up, but the abandoned attempts still hold their slots
+    assert len(errors) == 4
+    assert backend.peak == 2
+    assert backend.calls == 2
+    assert scheduler.stats()["models"][MODEL]["active"] == 2
+
+    backend.release.set()
+    _wait_for(lambda: scheduler.stats()["models"][MODEL]["active"] == 0)
+    assert caller.call(backend, admit=lambda: scheduler.slot(MODEL)) == "answer"
+
+
+def test_slot_is_released_right_after_a_successful_attempt():
+    scheduler = LLMScheduler(max_concurrency=1)
+    caller = ResilientCaller(timeout=5)
+
+    assert caller.call(lambda: "answer", admit=lambda: scheduler.slot(MODEL)) == "answer"
+    assert scheduler.stats()["models"][MODEL]["active"] == 0
@@ -0,0 +1,116 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.response_cache import MemoryCache, ResponseCache, SQLiteCache
+
+
+def test_memory_cache_evicts_least_recently_used():
+    cache = MemoryCache(max_entries=2)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    assert cache.get("a") == "1"  # a is now the most recently used
+    cache.set("c", "3")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "1"
+    assert cache.get("c") == "3"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_memory_cache_expires_entries():
+    cache = MemoryCache(ttl=0.05)
+    cache.set("a", "1")
+    time.sleep(0.1)
+
+    assert cache.get("a") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_memory_cache_byte_limit():
+    cache = MemoryCache(max_bytes=10)
+    cache.set("a", "x" * 6)
+    cache.set("b", "y" * 6)
+
+    assert cache.get("a") is None
+    assert cache.get("b") == "y" * 6
+    assert cache.stats()["bytes"] == 6
+
+    # A value larger than the whole budget is not stored and evicts nothing
+    cache.set("c", "z" * 11)
+    assert cache.get("c") is None
+    assert cache.get("b") == "y" * 6
+
+
+def test_memory_cache_replacing_a_key_keeps_byte_count():
+    cache = MemoryCache()
+    cache.set("a", "12345")
+    cache.set("a", "12")
+
+    assert cache.stats() == {"entries": 1, "bytes": 2, "evictions": 0}
+
+
+def test_sqlite_cache_expires_entries(tmp_path):
+    cache = SQLiteCache(str(tmp_path / "cache.db"), ttl=0.05)
+    cache.set("a", "1")
+    assert cache.get("a") == "1"
+    time.sleep(0.1)
+
+    assert cache.get("a") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_sqlite_cache_prunes_to_most_recently_used(tmp_path):
+    cache = SQLiteCache(str(tmp_path / "cache.db"), max_entries=10)
+    for index in range(99):
+        cache.set(f"key{index}", str(index))
+    assert cache.stats()["entries"] == 99
+
+    time.sleep(0.01)
+    cache.get("key0")  # accessed most recently, so it survives pruning
+    cache.set("key99", "99")  # the 100th write prunes
+
+    assert cache.stats()["entries"] == 10
+    assert cache.get("key0") == "0"
+    assert cache.get("key99") == "99"
+    assert cache.get("key1") is None
+
+
+def test_sqlite_cache_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / "cache.db")
+    SQLiteCache(path).set("a", "1")
+
+    assert SQLiteCache(path).get("a") == "1"
+
+
+def test_make_key_separates_json_and_text_mode():
+    text = ResponseCache.make_key("model", "prompt", None)
+    json_mode = ResponseCache.make_key("model", "prompt", None, json_mode=True)
+
+    assert text != json_mode
+    assert text == ResponseCache.make_key("model", "prompt", None, json_mode=False)
+
+
+def test_make_key_separates_model_template_and_prompt():
+    keys = {
+        ResponseCache.make_key("model", "prompt", None),
+        ResponseCache.make_key("other", "prompt", None),
+        ResponseCache.make_key("model", "prompt", "{prompt}!"),
+        ResponseCache.make_key("model", "prompt2", None),
+        # The separator keeps shifted boundaries apart
+        ResponseCache.make_key("mode", "lprompt", None)
+    }
+    assert len(keys) == 5
+
+
+def test_response_cache_promotes_disk_hits_to_memory(tmp_path):
+    disk = SQLiteCache(str(tmp_path / "cache.db"))
+    disk.set("k", "v")
+    cache = ResponseCache(memory=MemoryCache(), disk=disk)
+
+    assert cache.get("k") == "v"
+    assert cache.memory.get("k") == "v"
+    stats = cache.stats()
+    assert stats["disk_hits"] == 1
@@ -0,0 +1,101 @@
+import os
+import sys
+import threading
+import time
+
+import pytest
+from flask import Flask
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.routes.errors import error_response
+from src.utils.llm_errors import QueueFullError
+from src.utils.scheduler import LLMScheduler, request_priority, PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE
+
+MODEL = "test-model"
+
+
+def _wait_for(condition, timeout=5):
+    give_up_at = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < give_up_at, "condition not reached"
+        time.sleep(0.005)
+
+
+def _waiting(scheduler):
+    return scheduler.stats()["models"][MODEL]["waiting"]
+
+
+def test_interactive_calls_are_admitted_before_background_calls():
+    scheduler = LLMScheduler(max_concurrency=1, queue_timeout=5)
+    admitted = []
+
+    def call(level, name):
+        with request_priority(level), scheduler.slot(MODEL):
+            admitted.append(name)
+
+    with scheduler.slot(MODEL):
+        threads = []
+        # Background calls queue first, the interactive one last
+        for index, (level, name) in enumerate([(PRIORITY_BACKGROUND, "background-1"),
+                                               (PRIORITY_BACKGROUND, "background-2"),
+                                               (PRIORITY_INTERACTIVE, "interactive")]):
+            thread = threading.Thread(target=call, args=(level, name))
+            thread.start()
+            threads.append(thread)
+            _wait_for(lambda: _waiting(scheduler) == index + 1)
+
+    for thread in threads:
+        thread.join(5)
+
+    assert admitted == ["interactive", "background-1", "background-2"]
+    assert scheduler.stats()["admitted_by_priority"] == {"interactive": 1, "normal": 1, "background": 2}
+
+
+def test_queue_overflow_is_rejected_with_retry_after():
+    scheduler = LLMScheduler(max_concurrency=1, max_queue=1, queue_timeout=5)
+
+    def queued_call():
+        with scheduler.slot(MODEL):
+            pass
+
+    with scheduler.slot(MODEL):
+        waiter = threading.Thread(target=queued_call)
+        waiter.start()
+        _wait_for(lambda: _waiting(scheduler) == 1)
+
+        with pytest.raises(QueueFullError) as rejected:
+            with scheduler.slot(MODEL):
+                pass
+    waiter.join(5)
+
+    error = rejected.value
+    assert error.status_code == 429
+    assert error.retry_after >= 1
+    assert scheduler.stats()["rejected"] == 1
+
+    with Flask(__name__).test_request_context():
+        response = error_response(error)
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == str(error.retry_after)
+
+
+def test_timed_out_waiter_leaves_the_heap():
+    scheduler = LLMScheduler(max_concurrency=1, queue_timeout=0.05)
+
+    with scheduler.slot(MODEL):
+        with pytest.raises(QueueFullError, match="Timed out"):
+            with scheduler.slot(MODEL):
+                pass
+
+        slots = scheduler._models[MODEL]
+        assert slots.queue == []
+        assert slots.waiting == 0
+
+    stats = scheduler.stats()
+    assert stats["timed_out"] == 1
+    assert stats["models"][MODEL] == {"limit": 1, "active": 0, "waiting": 0}
+
+    # The slot is free again for the next caller
+    with scheduler.slot(MODEL):
+        assert scheduler.stats()["models"][MODEL]["active"] == 1
@@ -0,0 +1,165 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.llm_errors import DeadlineExceededError
+from src.utils.single_flight import SingleFlight
+
+
+def _in_thread(func):
+    outcome = {}
+
+    def run():
+        try:
+            outcome["result"] = func()
+        except Exception as e:
+            outcome["error"] = e
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread, outcome
+
+
+def test_followers_share_the_leaders_result():
+    flight = SingleFlight(timeout=5)
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def call():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "answer"
+
+    leader, leader_outcome = _in_thread(lambda: flight.do("key", call))
+    started.wait(5)
+    followers = [_in_thread(lambda: flight.do("key", call)) for _ in range(3)]
+    time.sleep(0.05)
+    release.set()
+    for thread, _ in [(leader, leader_outcome)] + followers:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert leader_outcome["result"] == "answer"
+    assert all(outcome["result"] == "answer" for _, outcome in followers)
+    assert flight.stats()["collapsed"] == 3
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_followers_share_provider_errors():
+    flight = SingleFlight(timeout=5)
+    started = threading.Event()
+
+    def call():
+        started.set()
+        time.sleep(0.1)
+        raise ValueError("provider said no")
+
+    leader, leader_outcome = _in_thread(lambda: flight.do("key", call))
+    started.wait(5)
+    follower, follower_outcome = _in_thread(lambda: flight.do("key", lambda: "unused"))
+    leader.join(5)
+    follower.join(5)
+
+    assert isinstance(leader_outcome["error"], ValueError)
+    assert isinstance(follower_outcome["error"], ValueError)
+
+
+def test_follower_reruns_the_call_when_the_leader_runs_out_of_its_deadline():
+    flight = SingleFlight(timeout=5)
+    started = threading.Event()
+
+    def leader_call():
+        started.set()
+        time.sleep(0.1)
+        raise DeadlineExceededError("leader budget spent")
+
+    leader, leader_outcome = _in_thread(lambda: flight.do("key", leader_call))
+    started.wait(5)
+    follower, follower_outcome = _in_thread(lambda: flight.do("key", lambda: "fresh"))
+    leader.join(5)
+    follower.join(5)
+
+    assert isinstance(leader_outcome["error"], DeadlineExceededError)
+    assert follower_outcome["result"] == "fresh"
+    assert flight.stats()["abandoned"] == 1
+
+
+def test_follower_reruns_the_call_when_the_leader_is_cancelled():
+    flight = SingleFlight(timeout=5)
+
+    async def main():
+        async def slow():
+            await asyncio.sleep(5)
+            return "stale"
+
+        async def fresh():
+            return "fresh"
+
+        leader = asyncio.ensure_future(flight.ado("key", slow))
+        await asyncio.sleep(0.01)
+        follower = asyncio.ensure_future(flight.ado("key", fresh))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower
+
+    assert asyncio.run(main()) == "fresh"
+    assert flight.stats()["abandoned"] == 1
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_cancelled_follower_does_not_affect_the_leader():
+    flight = SingleFlight(timeout=5)
+    calls = []
+
+    async def main():
+        async def call():
+            calls.append(1)
+            await asyncio.sleep(0.1)
+            return "answer"
+
+        leader = asyncio.ensure_future(flight.ado("key", call))
+        await asyncio.sleep(0.01)
+        follower = asyncio.ensure_future(flight.ado("key", call))
+        await asyncio.sleep(0.01)
+        follower.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await follower
+        return await leader
+
+    assert asyncio.run(main()) == "answer"
+    assert len(calls) == 1
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_follower_makes_its_own_call_after_the_timeout():
+    flight = SingleFlight(timeout=0.05)
+    started = threading.Event()
+
+    def slow():
+        started.set()
+        time.sleep(0.3)
+        return "slow"
+
+    leader, _ = _in_thread(lambda: flight.do("key", slow))
+    started.wait(5)
+    assert flight.do("key", lambda: "own") == "own"
+    leader.join(5)
+    assert flight.stats()["timeouts"] == 1
+
+
+def test_different_keys_do_not_coalesce():
+    flight = SingleFlight()
+
+    assert flight.do("a", lambda: 1) == 1
+    assert flight.do("b", lambda: 2) == 2
+    assert flight.stats()["collapsed"] == 0